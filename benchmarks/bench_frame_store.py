@@ -0,0 +1,88 @@
+"""Benchmark de los modos de almacenamiento de frames en RAM (``FRAME_STORE_MODE``).
+
+Para cada modo guarda N frames de un video y reporta:
+
+- ``KB/frame``: memoria que ocupa cada frame en la caché (representación comprimida).
+- ``put ms``: costo de codificar al guardar (se paga una vez, tras decodificar).
+- ``get ms``: latencia de acceso en frío (descompresión, sin caché caliente).
+- ``err``: error máximo absoluto por canal respecto del frame original.
+
+Uso:
+    python benchmarks/bench_frame_store.py [video] [--frames 48] [--modes raw,jpeg,png,zlib,yuv420]
+
+Sin video se genera uno sintético 1080p en un directorio temporal.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rotoscopia.frame_store import STORE_MODES, CompressedFrameCache  # noqa: E402
+from rotoscopia.frames import FrameCache  # noqa: E402
+from rotoscopia.ingest import iter_subsampled  # noqa: E402
+
+
+def make_video(path, frames=48, size=(1920, 1080), fps=24):
+    import cv2
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    yy, xx = np.mgrid[0:size[1], 0:size[0]]
+    for i in range(frames):
+        frame = np.dstack([(xx + i * 8) % 256, (yy + i * 4) % 256, (xx + yy) % 256]).astype(np.uint8)
+        cv2.circle(frame, (200 + i * 20, 540), 150, (255, 255, 255), -1)
+        cv2.putText(frame, str(i), (50, 200), cv2.FONT_HERSHEY_SIMPLEX, 5, (0, 0, 0), 8)
+        writer.write(frame)
+    writer.release()
+
+
+def bench_mode(mode, frames):
+    if mode == 'raw':
+        cache = FrameCache(1 << 20)
+    else:
+        cache = CompressedFrameCache(mode, max_mb=1 << 20, hot_mb=0)  # sin caché caliente: acceso en frío
+    t0 = time.perf_counter()
+    for i, frame in enumerate(frames):
+        cache.put(i, frame)
+    put_ms = (time.perf_counter() - t0) * 1000 / len(frames)
+    t0 = time.perf_counter()
+    decoded = [cache.get(i) for i in range(len(frames))]
+    get_ms = (time.perf_counter() - t0) * 1000 / len(frames)
+    err = max(int(np.abs(got.astype(np.int16) - frame.astype(np.int16)).max())
+              for got, frame in zip(decoded, frames))
+    return cache.size_bytes / len(frames) / 1024, put_ms, get_ms, err
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video', nargs='?')
+    parser.add_argument('--frames', type=int, default=48)
+    parser.add_argument('--modes', default=','.join(STORE_MODES))
+    args = parser.parse_args()
+    modes = [m for m in args.modes.split(',') if m.strip()]
+
+    tmp_dir = None
+    path = args.video
+    if not path:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp_dir.name, 'bench.mp4')
+        print('Generando video sintético...')
+        make_video(path, args.frames)
+
+    frames = [f for _i, f in iter_subsampled(path, 1, 0, args.frames)]
+    h, w = frames[0].shape[:2]
+    print(f'Video: {path} ({w}x{h}), {len(frames)} frames, crudo {frames[0].nbytes / 1024:.0f} KB/frame')
+    print(f'{"modo":>7} {"KB/frame":>9} {"ratio":>6} {"put ms":>7} {"get ms":>7} {"err":>4}')
+    for mode in modes:
+        kb, put_ms, get_ms, err = bench_mode(mode, frames)
+        print(f'{mode:>7} {kb:>9.0f} {frames[0].nbytes / 1024 / kb:>6.1f} {put_ms:>7.2f} {get_ms:>7.2f} {err:>4}')
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark de ingesta subsampleada.
+
+Compara, para distintos valores de ``step``, tres formas de obtener uno de cada
+``step`` frames de un video:
+
+- ``read``: ``cap.read()`` en todos los frames y descartar (comportamiento anterior).
+- ``grab``: ``grab()`` para los descartados y ``retrieve()`` sólo para los conservados.
+- ``seek``: ``CAP_PROP_POS_FRAMES`` + ``read()`` por cada frame conservado.
+- ``par``: ``decode_parallel`` con ``--workers`` procesos (segmentos + memoria compartida).
+
+Uso:
+    python benchmarks/bench_ingest.py [video] [--steps 1,2,5,10] [--workers 4]
+
+Sin video se genera uno sintético 1080p de 240 frames en un directorio temporal.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rotoscopia.ingest import decode_parallel, default_workers, iter_subsampled, seek_is_reliable  # noqa: E402
+
+
+def make_video(path, frames=240, size=(1920, 1080), fps=60):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    for i in range(frames):
+        frame = np.roll(base, i * 8, axis=1)
+        cv2.putText(frame, str(i), (50, 200), cv2.FONT_HERSHEY_SIMPLEX, 5, (255, 255, 255), 8)
+        writer.write(frame)
+    writer.release()
+
+
+def ingest_read(path, step):
+    cap = cv2.VideoCapture(path)
+    kept = 0; idx = 0
+    while True:
+        ret, _frame = cap.read()
+        if not ret:
+            break
+        if idx % step == 0:
+            kept += 1
+        idx += 1
+    cap.release()
+    return kept, idx
+
+
+def ingest_grab(path, step):
+    kept = 0; last = 0
+    for idx, _frame in iter_subsampled(path, step):
+        kept += 1; last = idx
+    return kept, last + 1
+
+
+def ingest_seek(path, step):
+    cap = cv2.VideoCapture(path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    kept = 0
+    for idx in range(0, total, step):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ret, _frame = cap.read()
+        if not ret:
+            break
+        kept += 1
+    cap.release()
+    return kept, total
+
+
+def ingest_parallel(path, step, workers):
+    cap = cv2.VideoCapture(path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    ret, first = cap.read()
+    cap.release()
+    kept = 0
+    for _k, frame in decode_parallel(path, range(0, total, step), first.shape, workers):
+        if frame is None:
+            break
+        kept += 1
+    return kept, total
+
+
+METHODS = [('read', ingest_read), ('grab', ingest_grab), ('seek', ingest_seek), ('par', ingest_parallel)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('video', nargs='?')
+    parser.add_argument('--steps', default='1,2,5,10')
+    parser.add_argument('--workers', type=int, default=default_workers())
+    args = parser.parse_args()
+    steps = [int(s) for s in args.steps.split(',') if s.strip()]
+
+    tmp_dir = None
+    path = args.video
+    if not path:
+        tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp_dir.name, 'bench.mp4')
+        print('Generando video sintético...')
+        make_video(path)
+
+    cap = cv2.VideoCapture(path)
+    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)); h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    print(f'Video: {path} ({w}x{h}), seek fiable: {seek_is_reliable(path)}, workers: {args.workers}')
+    print(f'{"step":>5} {"método":>7} {"kept":>6} {"seg":>8} {"kept/s":>9} {"src/s":>9}')
+    for step in steps:
+        for name, fn in METHODS:
+            t0 = time.perf_counter()
+            kept, src = fn(path, step, args.workers) if fn is ingest_parallel else fn(path, step)
+            dt = time.perf_counter() - t0
+            print(f'{step:>5} {name:>7} {kept:>6} {dt:>8.3f} {kept / dt:>9.1f} {src / dt:>9.1f}')
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
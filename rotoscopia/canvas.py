@@ -5,12 +5,18 @@ Punto de entrada de ejecución en ``rotoscopia.main`` (no usar if __name__ == '_
 
 from __future__ import annotations
 
+import time
+
 import cv2
 from pathlib import Path
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from .settings import (
     DEFAULT_ONION_OPACITY,
+    DEFAULT_ONION_FRAMES,
+    MAX_ONION_FRAMES,
+    ONION_FADE,
+    INTERACTIVE_IDLE_MS,
     DEFAULT_ZOOM_MIN,
     DEFAULT_ZOOM_MAX,
     MAX_HISTORY,
@@ -20,9 +26,21 @@ from .settings import (
     PALETTE_COLORS,
     SHORTCUTS,
     DEFAULT_BG_OPACITY,
+    SEQUENCE_DEFAULT_FPS,
+    PROXY_SUGGEST_WIDTH,
+    EXPORT_DIR,
+    PROXY_SCALES,
+    RENDER_STATS,
+    RENDER_STATS_INTERVAL_MS,
 )
 from .utils import cvimg_to_qimage
 from .project import ProjectManager, EXPORT_BG_TRANSPARENT, EXPORT_BG_VIDEO, EXPORT_BG_CROMA
+from .prefetch import FramePrefetcher
+from .playback import AnimationPlayer
+from .render import OnionCache, PixmapCache, TiledPyramid, compose_images, draw_region, draw_tiles
+from .stats import RenderStats
+from .layers import Layer
+from .memory import FrameMemory
 from .tools import (
     BrushTool, EraserTool, LineTool, HandTool, LassoTool, BucketTool, 
     RectangleTool, EllipseTool, PlumaTool, DynamicLineTool,
@@ -30,25 +48,6 @@ from .tools import (
 )
 
 
-class Layer:
-    """Represents a single drawing layer with properties."""
-    
-    def __init__(self, name: str = "Layer", width: int = 640, height: int = 480):
-        self.name = name
-        self.pixmap = QtGui.QPixmap(width, height)
-        self.pixmap.fill(QtCore.Qt.transparent)
-        self.visible = True
-        self.opacity = 1.0  # 0.0 to 1.0
-        
-    def copy(self) -> 'Layer':
-        """Create a deep copy of this layer."""
-        new_layer = Layer(self.name + " Copy", self.pixmap.width(), self.pixmap.height())
-        new_layer.pixmap = QtGui.QPixmap(self.pixmap)
-        new_layer.visible = self.visible
-        new_layer.opacity = self.opacity
-        return new_layer
-
-
 class DrawingCanvas(QtWidgets.QLabel):
     strokeStarted = QtCore.Signal()
     strokeEnded = QtCore.Signal()
@@ -66,12 +65,28 @@ class DrawingCanvas(QtWidgets.QLabel):
         self.current_background: QtGui.QPixmap | None = None
         self.current_opacity = DEFAULT_BG_OPACITY
         self.scale_factor = 1.0
+        # Teselas con mips para pintar con zoom: fondo y overlay (por regiones)
+        self._bg_tiles = TiledPyramid()
+        self._overlay_tiles = TiledPyramid()
         self._panning = False
         self._pan_last = None
+        # Zoom/paneo en curso: repintados rápidos y uno suave al quedar quieto
+        self._interacting = False
+        self._idle_timer = QtCore.QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.setInterval(INTERACTIVE_IDLE_MS)
+        self._idle_timer.timeout.connect(self._end_interaction)
+        # Frame de la reproducción en curso (reemplaza fondo/onion/overlay mientras se reproduce)
+        self.playback_frame: QtGui.QPixmap | None = None
+        # Mediciones de render (ver stats.py); None = desactivadas (RENDER_STATS)
+        self.render_stats: RenderStats | None = None
         # Onion Skin
         self.onion_enabled = False
         self.onion_opacity = DEFAULT_ONION_OPACITY
-        self._onion_cache: dict[int, QtGui.QPixmap] = {}
+        self.onion_before = DEFAULT_ONION_FRAMES
+        self.onion_after = DEFAULT_ONION_FRAMES
+        # Vecinos ya tintados y la pila mezclada, por versión de contenido (sobreviven a la navegación)
+        self._onion_cache = OnionCache()
         # Touch support for pinch zoom
         self._pinch_distance = 0.0
         self._is_pinching = False
@@ -80,6 +95,30 @@ class DrawingCanvas(QtWidgets.QLabel):
         self.project: ProjectManager | None = None
         self.window_ref = None  # MainWindow
 
+    def set_overlay(self, pix: QtGui.QPixmap, dirty: QtCore.QRect | None = None, old_key=None):
+        """Reemplaza el overlay; ``dirty`` indica que sólo cambió esa región respecto del anterior.
+
+        ``old_key`` es el ``cacheKey()`` del overlay anterior cuando ``pix`` es el mismo
+        pixmap pintado en el lugar (su clave ya cambió).
+        """
+        if old_key is None and self.overlay is not None and not self.overlay.isNull():
+            old_key = self.overlay.cacheKey()
+        self._overlay_tiles.changed(old_key, pix, dirty)
+        self.overlay = pix
+
+    def set_playback_frame(self, pix: QtGui.QPixmap | None):
+        self.playback_frame = pix
+        self.update()
+
+    def begin_interaction(self):
+        """Marca un gesto de zoom/paneo en curso (se renueva con cada evento del gesto)."""
+        self._interacting = True
+        self._idle_timer.start()
+
+    def _end_interaction(self):
+        self._interacting = False
+        self.update()
+
     def set_size(self, w: int, h: int):
         if self.overlay is None or self.overlay.size() != QtCore.QSize(w, h):
             pix = QtGui.QPixmap(w, h); pix.fill(QtCore.Qt.transparent)
@@ -88,23 +127,15 @@ class DrawingCanvas(QtWidgets.QLabel):
         # Update all layers in current frame to match new size
         if self.window_ref and self.window_ref.current_frame_idx in self.window_ref.frame_layers:
             for layer in self.window_ref.frame_layers[self.window_ref.current_frame_idx]:
-                if layer.pixmap.size() != QtCore.QSize(w, h):
-                    old_pixmap = layer.pixmap
-                    layer.pixmap = QtGui.QPixmap(w, h)
-                    layer.pixmap.fill(QtCore.Qt.transparent)
-                    # Copy old content if it exists
-                    if not old_pixmap.isNull():
-                        painter = QtGui.QPainter(layer.pixmap)
-                        painter.drawPixmap(0, 0, old_pixmap)
-                        painter.end()
+                if layer.size() != QtCore.QSize(w, h):
+                    layer.resize(w, h)
 
     # ---------------- Tamaño / coordenadas ----------------
     def mapToOverlay(self, point: QtCore.QPoint) -> QtCore.QPoint:
         """Mapea un punto del canvas a coordenadas de la imagen original (considerando zoom y offset)"""
         # Obtener dimensiones del frame actual
         if self.window_ref and self.window_ref.frames:
-            frame = self.window_ref.frames[self.window_ref.current_frame_idx]
-            bh, bw = frame.shape[:2]
+            bh, bw = self.window_ref.frames.shape[:2]
         elif self.overlay is not None:
             bw = self.overlay.width()
             bh = self.overlay.height()
@@ -129,6 +160,10 @@ class DrawingCanvas(QtWidgets.QLabel):
 
     # ---------------- Eventos de ratón ----------------
     def mousePressEvent(self, event: QtGui.QMouseEvent):
+        # Un clic durante la reproducción la detiene (no se dibuja sobre el preview)
+        if self.playback_frame is not None and self.window_ref is not None:
+            self.window_ref.player.stop()
+            return
         # HandTool: manejar sin iniciar un trazo de dibujo
         from .tools import HandTool  # import local para evitar ciclos si se reordena
         if isinstance(self.tool, HandTool) and event.button() == QtCore.Qt.LeftButton:
@@ -154,6 +189,7 @@ class DrawingCanvas(QtWidgets.QLabel):
             if isinstance(parent, QtWidgets.QScrollArea) and self._pan_last is not None:
                 current = event.globalPosition().toPoint() if hasattr(event, 'globalPosition') else event.globalPos()
                 dx = current.x() - self._pan_last.x(); dy = current.y() - self._pan_last.y()
+                self.begin_interaction()
                 parent.horizontalScrollBar().setValue(parent.horizontalScrollBar().value() - dx)
                 parent.verticalScrollBar().setValue(parent.verticalScrollBar().value() - dy)
                 self._pan_last = current
@@ -203,7 +239,7 @@ class DrawingCanvas(QtWidgets.QLabel):
             # Clear the active layer instead of just the overlay
             active_layer = self.window_ref.get_active_layer()
             if active_layer:
-                active_layer.pixmap.fill(QtCore.Qt.transparent)
+                active_layer.clear()
                 self.window_ref.compose_layers()
             else:
                 self.overlay.fill(QtCore.Qt.transparent)
@@ -219,6 +255,17 @@ class DrawingCanvas(QtWidgets.QLabel):
             self.resize(tw, th)
         self.update()
 
+    def update_image_rect(self, rect: QtCore.QRect):
+        """Repinta sólo la parte del widget que muestra ``rect`` (coordenadas de imagen)."""
+        base = self.current_background or self.overlay
+        if base is None:
+            self.update(); return
+        s = self.scale_factor
+        ox = int((self.width() - int(base.width() * s)) / 2.0)
+        oy = int((self.height() - int(base.height() * s)) / 2.0)
+        target = QtCore.QRectF(ox + rect.x() * s, oy + rect.y() * s, rect.width() * s, rect.height() * s)
+        self.update(target.toAlignedRect().adjusted(-2, -2, 2, 2))
+
     # ---------------- Onion API ----------------
     def set_onion_enabled(self, enabled: bool):
         self.onion_enabled = enabled; self.update()
@@ -228,51 +275,66 @@ class DrawingCanvas(QtWidgets.QLabel):
         if self.onion_enabled:
             self.update()
 
+    def set_onion_frames(self, before: int, after: int):
+        self.onion_before = max(0, min(MAX_ONION_FRAMES, int(before)))
+        self.onion_after = max(0, min(MAX_ONION_FRAMES, int(after)))
+        if self.onion_enabled:
+            self.update()
+
     def clear_onion_cache(self):
         self._onion_cache.clear()
 
-    def draw_onion_layer(self, painter: QtGui.QPainter, idx: int, is_prev: bool):
-        """Dibuja el frame vecino tintado sólo sobre sus píxeles (no áreas transparentes)."""
+    def onion_indices(self, cf: int) -> list[tuple[int, bool, int]]:
+        """Frames del onion alrededor de ``cf`` como ``(frame, es_anterior, distancia)``."""
+        n = len(self.window_ref.frames) if self.window_ref is not None else 0
+        out = []
+        for k in range(1, self.onion_before + 1):
+            if cf - k >= 0:
+                out.append((cf - k, True, k))
+        for k in range(1, self.onion_after + 1):
+            if cf + k < n:
+                out.append((cf + k, False, k))
+        return out
+
+    def _onion_source(self, idx: int) -> QtGui.QPixmap | None:
+        """Dibujo compuesto de un frame vecino (None si no tiene o sus capas siguen cargando)."""
+        if idx in self.window_ref.frame_layers:
+            return self.window_ref.compose_layers_for_frame(idx)
+        return None
+
+    def draw_onion(self, painter: QtGui.QPainter, area: QtCore.QRect, origin: QtCore.QPointF,
+                   fast: bool = False):
+        """Dibuja los frames vecinos tintados sólo sobre sus píxeles (no áreas transparentes).
+
+        Anteriores en azul y siguientes en rojo; la opacidad cae con la distancia
+        (``ONION_FADE``). Se pinta una sola pila ya mezclada (``OnionCache``), que se
+        rehace sólo cuando cambian el frame actual, un vecino o la opacidad.
+        """
         if not self.project or not self.window_ref:
             return
-        if idx < 0 or idx >= len(self.window_ref.frames):
-            return
-        pm = self._onion_cache.get(idx)
-        if pm is None:
-            if idx in self.window_ref.frame_layers:
-                pm = self.window_ref.compose_layers_for_frame(idx)
-            else:
-                ov_pix = self.window_ref.overlays.get(idx)
-                if ov_pix is not None:
-                    pm = ov_pix
-                else:
-                    loaded = self.project.load_frame(idx)
-                    if loaded is None:
-                        return
-                    pm = loaded
-            self._onion_cache[idx] = pm
-        if pm.isNull():
-            return
-        base_w = pm.width(); base_h = pm.height()
-        disp_w = int(base_w * self.scale_factor); disp_h = int(base_h * self.scale_factor)
-        if abs(self.scale_factor - 1.0) > 1e-3:
-            pm_draw = pm.scaled(disp_w, disp_h, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
-        else:
-            pm_draw = pm
-        offset_x = (self.width() - disp_w) / 2.0; offset_y = (self.height() - disp_h) / 2.0
-        alpha = int(self.onion_opacity * 255)
-        color = QtGui.QColor(80, 160, 255, alpha) if is_prev else QtGui.QColor(255, 120, 120, alpha)
-        tinted = QtGui.QPixmap(pm_draw.size())
-        tinted.fill(QtCore.Qt.transparent)
-        tp = QtGui.QPainter(tinted)
-        tp.drawPixmap(0, 0, pm_draw)
-        tp.setCompositionMode(QtGui.QPainter.CompositionMode_SourceIn)
-        tp.fillRect(tinted.rect(), color)
-        tp.end()
-        painter.drawPixmap(int(offset_x), int(offset_y), tinted)
+        cf = self.window_ref.current_frame_idx
+        entries = []
+        # Del más lejano al más cercano: los cercanos quedan arriba
+        for idx, is_prev, dist in sorted(self.onion_indices(cf), key=lambda e: -e[2]):
+            color = QtGui.QColor(80, 160, 255) if is_prev else QtGui.QColor(255, 120, 120)
+            alpha = self.onion_opacity * ONION_FADE ** (dist - 1)
+            entries.append((idx, color, self.window_ref.frame_version(idx), alpha))
+        tiles = self._onion_cache.stack(entries, self._onion_source)
+        if tiles is not None:
+            tiles.paint(painter, area, origin, self.scale_factor, fast)
 
     # ---------------- Paint ----------------
     def paintEvent(self, event: QtGui.QPaintEvent):  # noqa: D401
+        stats = self.render_stats
+        if stats is None:
+            self._paint(event)
+            return
+        t0 = time.perf_counter()
+        self._paint(event)
+        stats.add_since('paint', t0)
+
+    def _paint(self, event: QtGui.QPaintEvent):
+        stats = self.render_stats
         painter = QtGui.QPainter(self); painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
         base = self.current_background; ov = self.overlay
         if base is not None:
@@ -283,21 +345,44 @@ class DrawingCanvas(QtWidgets.QLabel):
             bw = self.width(); bh = self.height()
         disp_w = int(bw * self.scale_factor); disp_h = int(bh * self.scale_factor)
         offset_x = (self.width() - disp_w) / 2.0; offset_y = (self.height() - disp_h) / 2.0
+        # Sólo se pinta lo expuesto y visible dentro del scroll area; lo demás se
+        # mapea a coordenadas del frame para escalar únicamente esos píxeles
+        exposed = event.rect().intersected(self.visibleRegion().boundingRect())
+        if exposed.isEmpty():
+            painter.end()
+            return
+        painter.setClipRect(exposed)
+        origin = QtCore.QPointF(int(offset_x), int(offset_y))
+        area = exposed.intersected(QtCore.QRect(int(offset_x), int(offset_y), disp_w, disp_h))
+        # Durante un gesto de zoom/paneo no se escala nada con calidad (ver begin_interaction)
+        fast = self._interacting
+        if self.playback_frame is not None:
+            # Reproducción: un frame nuevo por tick, escalado sólo en lo visible (suave salvo en un gesto)
+            draw_region(painter, self.playback_frame, area, origin, self.scale_factor, smooth=not fast)
+            painter.end()
+            return
         # Fondo
         if base is not None:
-            base_draw = base.scaled(disp_w, disp_h, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation) if abs(self.scale_factor - 1.0) > 1e-3 else base
-            painter.save(); painter.setOpacity(self.current_opacity); painter.drawPixmap(int(offset_x), int(offset_y), base_draw); painter.restore()
+            t0 = time.perf_counter() if stats is not None else 0.0
+            self._bg_tiles.set_pixmap(base)
+            painter.save(); painter.setOpacity(self.current_opacity)
+            self._bg_tiles.paint(painter, area, origin, self.scale_factor, fast)
+            painter.restore()
+            if stats is not None:
+                stats.add_since('fondo', t0)
         # Onion
         if self.onion_enabled and self.window_ref is not None:
-            cf = self.window_ref.current_frame_idx
-            if cf - 1 >= 0:
-                self.draw_onion_layer(painter, cf - 1, True)
-            if cf + 1 < len(self.window_ref.frames):
-                self.draw_onion_layer(painter, cf + 1, False)
+            t0 = time.perf_counter() if stats is not None else 0.0
+            self.draw_onion(painter, area, origin, fast)
+            if stats is not None:
+                stats.add_since('onion', t0)
         # Overlay actual
         if ov is not None and not ov.isNull():
-            ov_draw = ov.scaled(disp_w, disp_h, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation) if abs(self.scale_factor - 1.0) > 1e-3 else ov
-            painter.drawPixmap(int(offset_x), int(offset_y), ov_draw)
+            t0 = time.perf_counter() if stats is not None else 0.0
+            self._overlay_tiles.set_pixmap(ov)
+            self._overlay_tiles.paint(painter, area, origin, self.scale_factor, fast)
+            if stats is not None:
+                stats.add_since('capas', t0)
         
         # Preview de Auto Calco (si está activo)
         if self.window_ref and hasattr(self.window_ref, 'auto_calco_tool'):
@@ -305,22 +390,14 @@ class DrawingCanvas(QtWidgets.QLabel):
             if auto_calco.preview_pixmap is not None and not auto_calco.preview_pixmap.isNull():
                 # Obtener posición original de la captura
                 p = auto_calco.roi_rect.topLeft()
-                
-                # Escalar el preview_pixmap según el zoom actual
-                preview_w = int(auto_calco.preview_pixmap.width() * self.scale_factor)
-                preview_h = int(auto_calco.preview_pixmap.height() * self.scale_factor)
-                scaled_preview = auto_calco.preview_pixmap.scaled(
-                    preview_w, preview_h,
-                    QtCore.Qt.IgnoreAspectRatio,
-                    QtCore.Qt.SmoothTransformation
-                )
-                
-                # Calcular posición en pantalla
-                screen_x = int(offset_x + p.x() * self.scale_factor)
-                screen_y = int(offset_y + p.y() * self.scale_factor)
-                
-                # Dibujar el preview
-                painter.drawPixmap(screen_x, screen_y, scaled_preview)
+                preview = auto_calco.preview_pixmap
+                # Destino en pantalla según el zoom; el clip limita el escalado a lo visible
+                target = QtCore.QRectF(offset_x + p.x() * self.scale_factor, offset_y + p.y() * self.scale_factor,
+                                       preview.width() * self.scale_factor, preview.height() * self.scale_factor)
+                painter.save()
+                painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, not fast)
+                painter.drawPixmap(target, preview, QtCore.QRectF(preview.rect()))
+                painter.restore()
         
         # Dibujo de selección (Lasso) si activo
         from .tools import LassoTool
@@ -395,6 +472,7 @@ class DrawingCanvas(QtWidgets.QLabel):
         current_center = QtCore.QPoint(int(center_x), int(center_y))
         
         if event.type() == QtCore.QEvent.TouchBegin:
+            self.begin_interaction()
             self._pinch_distance = current_distance
             self._last_pinch_center = current_center
             self._is_pinching = True
@@ -449,6 +527,7 @@ class DrawingCanvas(QtWidgets.QLabel):
             # Apply the pan movement (invert delta like mouse pan does)
             h_scrollbar = parent.horizontalScrollBar()
             v_scrollbar = parent.verticalScrollBar()
+            self.begin_interaction()
             
             h_scrollbar.setValue(h_scrollbar.value() - delta_x)
             v_scrollbar.setValue(v_scrollbar.value() - delta_y)
@@ -508,11 +587,13 @@ class MainWindow(QtWidgets.QMainWindow):
         self.setWindowTitle('Rotoscopia MVP - Modular')
         self.resize(1100, 750)
         # Estado
-        self.frames: list = []
+        self.frames: list = []  # FrameSource tras cargar (decodificación bajo demanda)
         self.current_frame_idx = 0
         self.video_path: str | None = None
-        self.undo_stacks: dict[int, list[QtGui.QPixmap]] = {}
-        self.redo_stacks: dict[int, list[QtGui.QPixmap]] = {}
+        # Dibujo por frame con presupuesto de memoria: los frames fríos bajan a disco (ver memory.py)
+        self.memory = FrameMemory(self)
+        self.undo_stacks = self.memory.undo_stacks  # frame_idx -> [Layer.snapshot(), ...]
+        self.redo_stacks = self.memory.redo_stacks
         self.max_history = MAX_HISTORY
         self.dirty_frames: set[int] = set()
         self.is_dirty = False  # Track unsaved changes
@@ -526,12 +607,21 @@ class MainWindow(QtWidgets.QMainWindow):
         self.project_mgr = ProjectManager(self)
         self.project = self.project_mgr  # Alias for specification compliance
         self.thread_pool = QtCore.QThreadPool()
+        self.prefetcher = FramePrefetcher(self)  # fondos/overlays vecinos según dirección de navegación
+        self.player = AnimationPlayer(self)  # reproducción en tiempo real (play/pausa)
+        self.player.playing_changed.connect(lambda on: self.action_play.setText('⏸' if on else '▶'))
+        self.bg_cache = PixmapCache()  # fondos ya convertidos a QPixmap, por frame
         
-        self.frame_layers: dict[int, list[Layer]] = {}  # frame_idx -> list of layers
+        self.frame_layers = self.memory.frame_layers  # frame_idx -> list of layers
         self.current_layer_idx = 0  # index of active layer in current frame
         
-        # Keep old overlay system for backward compatibility during transition
-        self.overlays = {}
+        # Superficie compuesta persistente del frame actual (se actualiza por regiones al dibujar)
+        self._composed: QtGui.QPixmap | None = None
+        self._composed_frame: int | None = None
+        # Capas por debajo / por encima de la activa ya aplanadas (ver _layers_for_compose)
+        self._flat_key = None
+        self._flat_below: QtGui.QPixmap | None = None
+        self._flat_above: QtGui.QPixmap | None = None
         
         self._init_ui()
         
@@ -544,6 +634,32 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.statusBar():
             self.setStatusBar(QtWidgets.QStatusBar())
         self.statusBar().showMessage('Listo')
+        self._init_render_stats()
+
+    def _init_render_stats(self):
+        """Lectura de tiempos de render en la barra de estado (sólo con ``RENDER_STATS``)."""
+        self.render_stats: RenderStats | None = None
+        if not RENDER_STATS:
+            return
+        self.render_stats = self.canvas.render_stats = RenderStats()
+        self.render_stats_label = QtWidgets.QLabel()
+        self.statusBar().addPermanentWidget(self.render_stats_label)
+        self._render_stats_timer = QtCore.QTimer(self)
+        self._render_stats_timer.timeout.connect(self.update_render_stats)
+        self._render_stats_timer.start(RENDER_STATS_INTERVAL_MS)
+
+    def update_render_stats(self):
+        stats = self.render_stats
+        caches = {
+            'frames': getattr(self.frames, 'cache', None),
+            'bg': self.bg_cache,
+            'teselas': self.canvas._bg_tiles._tiles,
+            'onion': self.canvas._onion_cache,
+        }
+        rates = {name: stats.hit_rate(name, cache.hits, cache.misses)
+                 for name, cache in caches.items() if cache is not None and hasattr(cache, 'misses')}
+        self.render_stats_label.setText(stats.summary(rates))
+        self.render_stats_label.setToolTip(f'{stats.details()}\n{self.memory.summary()}')
 
     # ---------------- UI ----------------
     def _init_ui(self):
@@ -579,6 +695,8 @@ class MainWindow(QtWidgets.QMainWindow):
         # Acciones solicitadas (orden): Importar, Exportar Frame (PNG), Guardar, Cargar, Cerrar, Help
         self.action_import = QtGui.QAction('Importar', self)
         self.action_import.triggered.connect(self.open_video)
+        self.action_import_sequence = QtGui.QAction('Importar secuencia de imágenes...', self)
+        self.action_import_sequence.triggered.connect(self.open_sequence)
         self.action_export_frame = QtGui.QAction('Exportar Frame (PNG)', self)
         self.action_export_frame.triggered.connect(self.save_current_overlay)
         self.action_export_animation = QtGui.QAction('Exportar Animación...', self)
@@ -593,6 +711,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.action_help.triggered.connect(self.show_help_manual)
         for a in [
             self.action_import,
+            self.action_import_sequence,
             self.action_export_frame,
             self.action_export_animation,
             self.action_save_project_menu,
@@ -607,7 +726,9 @@ class MainWindow(QtWidgets.QMainWindow):
         act_prev = QtGui.QAction('<<', self); act_prev.triggered.connect(self.prev_frame)
         act_next = QtGui.QAction('>>', self); act_next.triggered.connect(self.next_frame)
         act_copy = QtGui.QAction('Copiar frame anterior', self); act_copy.triggered.connect(self.copy_previous_overlay)
-        tb_frames.addActions([act_prev, act_next, act_copy])
+        self.action_play = QtGui.QAction('▶', self); self.action_play.setToolTip('Reproducir / pausar (Espacio)')
+        self.action_play.triggered.connect(self.toggle_playback)
+        tb_frames.addActions([act_prev, act_next, act_copy, self.action_play])
         self.frame_label = QtWidgets.QLabel('Frame: 0 / 0')
         frame_label_act = QtWidgets.QWidgetAction(self); frame_label_act.setDefaultWidget(self.frame_label)
         tb_frames.addAction(frame_label_act)
@@ -668,6 +789,14 @@ class MainWindow(QtWidgets.QMainWindow):
         self.onion_opacity_slider.valueChanged.connect(lambda v: self.canvas.set_onion_opacity(v / 100.0))
         self.action_onion.toggled.connect(self.onion_opacity_slider.setEnabled)
         self.onion_opacity_slider.setEnabled(self.action_onion.isChecked())
+        # Cantidad de frames del onion antes / después del actual
+        self.onion_before_spin = QtWidgets.QSpinBox()
+        self.onion_after_spin = QtWidgets.QSpinBox()
+        for spin in (self.onion_before_spin, self.onion_after_spin):
+            spin.setRange(0, MAX_ONION_FRAMES)
+            spin.setValue(DEFAULT_ONION_FRAMES)
+            spin.valueChanged.connect(lambda _v: self.canvas.set_onion_frames(
+                self.onion_before_spin.value(), self.onion_after_spin.value()))
 
         # Create layer dock after view controls are defined
         self._create_layer_dock()
@@ -702,9 +831,9 @@ class MainWindow(QtWidgets.QMainWindow):
         except Exception:
             pass
 
-        # Shortcuts y overlays
-        self.overlays = {}
+        # Shortcuts
         QtGui.QShortcut(QtGui.QKeySequence(SHORTCUTS['next_frame']), self, activated=self.next_frame)
+        QtGui.QShortcut(QtGui.QKeySequence(SHORTCUTS['play_pause']), self, activated=self.toggle_playback)
         QtGui.QShortcut(QtGui.QKeySequence(SHORTCUTS['prev_frame']), self, activated=self.prev_frame)
         if 'copy_prev_frame' in SHORTCUTS:
             QtGui.QShortcut(QtGui.QKeySequence(SHORTCUTS['copy_prev_frame']), self, activated=self.copy_previous_overlay)
@@ -712,7 +841,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if 'save_project' in SHORTCUTS:
             QtGui.QShortcut(QtGui.QKeySequence(SHORTCUTS['save_project']), self, activated=self.save_project_dialog)
         if 'export_animation' in SHORTCUTS:
-            QtGui.QShortcut(QtGui.QKeySequence(SHORTCUTS['export_animation']), self, activated=lambda: self.project_mgr.export_animation(self.frames))
+            QtGui.QShortcut(QtGui.QKeySequence(SHORTCUTS['export_animation']), self, activated=self.quick_export_animation)
         QtGui.QShortcut(QtGui.QKeySequence(SHORTCUTS['undo']), self, activated=self.undo)
         QtGui.QShortcut(QtGui.QKeySequence(SHORTCUTS['redo']), self, activated=self.redo)
         QtGui.QShortcut(QtGui.QKeySequence(SHORTCUTS['brush_tool']), self, activated=lambda: self.action_brush.trigger())
@@ -893,6 +1022,15 @@ class MainWindow(QtWidgets.QMainWindow):
         onion_op_row.addWidget(QtWidgets.QLabel('Opacidad Onion:'))
         onion_op_row.addWidget(self.onion_opacity_slider)
         view_layout.addLayout(onion_op_row)
+
+        # Onion frames antes / después
+        onion_frames_row = QtWidgets.QHBoxLayout()
+        onion_frames_row.addWidget(QtWidgets.QLabel('Frames antes:'))
+        onion_frames_row.addWidget(self.onion_before_spin)
+        onion_frames_row.addWidget(QtWidgets.QLabel('después:'))
+        onion_frames_row.addWidget(self.onion_after_spin)
+        onion_frames_row.addStretch()
+        view_layout.addLayout(onion_frames_row)
         
         layer_layout.addWidget(view_group)
         layer_layout.addStretch()
@@ -1025,15 +1163,18 @@ class MainWindow(QtWidgets.QMainWindow):
 
     # ---------------- Core ops ----------------
     # Modified open_video to work with layers
-    def open_video(self):
-        # 1. Check if project is loaded and ask for confirmation
+    def _reset_before_import(self) -> bool:
+        """Pide guardar/cerrar el proyecto abierto y limpia el estado. False si se canceló."""
         if self.project is not None and (self.frames or self.is_dirty):
             if not self.ask_to_save_and_close():
-                return  # User cancelled, abort operation
+                return False  # User cancelled, abort operation
             
             # Reset canvas and clear project state
+            self.player.stop()
+            self.project_mgr.cancel_pending_loads()
+            self.prefetcher.reset()
+            self.bg_cache.clear()
             self.frames.clear()
-            self.overlays.clear()
             self.frame_layers.clear()
             self.undo_stacks.clear()
             self.redo_stacks.clear()
@@ -1052,6 +1193,12 @@ class MainWindow(QtWidgets.QMainWindow):
             except Exception:
                 pass
             # Note: Don't set self.project = None as we still need the ProjectManager
+        return True
+
+    def open_video(self):
+        # 1. Check if project is loaded and ask for confirmation
+        if not self._reset_before_import():
+            return
             
         # Select video file
         filter_str = 'Videos/Imagenes (*.mp4 *.MP4 *.mov *.MOV *.avi *.AVI *.mkv *.MKV *.png *.PNG *.jpg *.JPG *.jpeg *.JPEG *.bmp *.BMP);;Todos (*.*)'
@@ -1061,6 +1208,7 @@ class MainWindow(QtWidgets.QMainWindow):
         # Detect if image (omit FPS dialog)
         ext = Path(path).suffix.lower()
         image_exts = {'.png', '.jpg', '.jpeg', '.bmp'}
+        proxy_scale = 1.0
         if ext in image_exts:
             target_fps = 1
         else:
@@ -1069,6 +1217,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 QtWidgets.QMessageBox.critical(self, 'Error', f'No se pudo abrir el video:\n{path}')
                 return
             fps_original = cap.get(cv2.CAP_PROP_FPS) or 12.0
+            video_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+            video_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
             cap.release()
             if fps_original <= 0:
                 fps_original = 12.0
@@ -1082,12 +1232,50 @@ class MainWindow(QtWidgets.QMainWindow):
             )
             if not ok:
                 return
+            if video_w > PROXY_SUGGEST_WIDTH:
+                # Video pesado (4K+): ofrecer modo proxy para dibujar más fluido
+                items = [f'{int(s * 100)}% ({int(video_w * s)}x{int(video_h * s)})' for s in PROXY_SCALES]
+                default = 1 if len(items) > 1 else 0
+                choice, ok = QtWidgets.QInputDialog.getItem(
+                    self,
+                    "Resolución de trabajo",
+                    "El video es muy grande. ¿A qué resolución querés dibujar?\n"
+                    "(la exportación se hace siempre a resolución completa)",
+                    items, default, False
+                )
+                if not ok:
+                    return
+                proxy_scale = PROXY_SCALES[items.index(choice)]
         # 3. Load resource with target FPS using ProjectManager
         if self.project is None:  # puede haber quedado en None tras cerrar
             self.project = self.project_mgr
-        if not self.project.load_video(path, target_fps):
+        if not self.project.load_video(path, target_fps, proxy_scale):
             return  # Loading failed
 
+    def open_sequence(self):
+        """Importa una carpeta de imágenes numeradas (plates PNG/JPG) como fuente."""
+        if not self._reset_before_import():
+            return
+        folder = QtWidgets.QFileDialog.getExistingDirectory(self, 'Seleccionar carpeta de la secuencia', '')
+        if not folder:
+            return
+        # Una secuencia no trae fps: preguntar a cuántos fue generada y cuántos cargar
+        fps_original, ok = QtWidgets.QInputDialog.getInt(
+            self, "Frames por segundo", "¿A cuántos FPS está la secuencia?",
+            SEQUENCE_DEFAULT_FPS, 1, 240
+        )
+        if not ok:
+            return
+        target_fps, ok = QtWidgets.QInputDialog.getInt(
+            self, "Frames por segundo", "¿Cuántos FPS querés cargar de la secuencia?",
+            min(12, fps_original), 1, fps_original
+        )
+        if not ok:
+            return
+        if self.project is None:
+            self.project = self.project_mgr
+        self.project.load_video(folder, target_fps, fps_original=fps_original)
+
     def get_active_layer(self) -> Layer | None:
         """Get the currently active layer for drawing."""
         if self.current_frame_idx not in self.frame_layers:
@@ -1099,6 +1287,8 @@ class MainWindow(QtWidgets.QMainWindow):
     
     def ensure_frame_has_layers(self, frame_idx: int, width: int = 640, height: int = 480):
         """Ensure a frame has at least one layer."""
+        if frame_idx in self.project_mgr.pending_frames:
+            return  # sus capas están llegando del worker de carga
         if frame_idx not in self.frame_layers:
             self.frame_layers[frame_idx] = [Layer("Layer 1", width, height)]
     
@@ -1111,7 +1301,7 @@ class MainWindow(QtWidgets.QMainWindow):
             layer_count = len(self.frame_layers.get(self.current_frame_idx, []))
             name = f"Layer {layer_count + 1}"
         
-        h, w = self.frames[self.current_frame_idx].shape[:2]
+        h, w = self.frames.shape[:2]
         new_layer = Layer(name, w, h)
         
         if self.current_frame_idx not in self.frame_layers:
@@ -1122,8 +1312,14 @@ class MainWindow(QtWidgets.QMainWindow):
         self.compose_layers()
         return new_layer
     
-    def compose_layers(self):
-        """Compose all visible layers in current frame into the canvas overlay."""
+    def compose_layers(self, dirty: QtCore.QRect | None = None):
+        """Compose all visible layers in current frame into the canvas overlay.
+
+        ``dirty`` (coordenadas de imagen) indica que sólo cambió esa región desde la
+        última composición: si el overlay es la superficie compuesta de este frame,
+        se recompone sólo ese rectángulo en el lugar y se repinta sólo esa parte
+        del canvas, así un trazo cuesta según el pincel y no según el frame.
+        """
         if not self.frames or self.current_frame_idx not in self.frame_layers:
             return
         
@@ -1131,22 +1327,99 @@ class MainWindow(QtWidgets.QMainWindow):
         if not layers:
             return
         
-        # Create composed pixmap
-        h, w = self.frames[self.current_frame_idx].shape[:2]
-        composed = QtGui.QPixmap(w, h)
-        composed.fill(QtCore.Qt.transparent)
+        t0 = time.perf_counter() if self.render_stats is not None else 0.0
+        h, w = self.frames.shape[:2]
+        composed = self.canvas.overlay
+        incremental = (dirty is not None and composed is not None and composed is self._composed
+                       and self._composed_frame == self.current_frame_idx and composed.size() == QtCore.QSize(w, h))
+        old_key = None
+        if incremental:
+            area = dirty.intersected(composed.rect())
+            if area.isEmpty():
+                return
+            old_key = composed.cacheKey()
+        else:
+            # Create composed pixmap (fill: sin esto el pixmap puede quedar sin canal alfa)
+            composed = QtGui.QPixmap(w, h)
+            composed.fill(QtCore.Qt.transparent)
+            area = composed.rect()
         
         painter = QtGui.QPainter(composed)
+        painter.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
+        painter.fillRect(area, QtCore.Qt.transparent)
+        painter.setCompositionMode(QtGui.QPainter.CompositionMode_SourceOver)
         painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
-        for layer in layers:
-            if layer.visible and not layer.pixmap.isNull():
-                painter.setOpacity(layer.opacity)
-                painter.drawPixmap(0, 0, layer.pixmap)
+        for tiles, opacity in self._layers_for_compose(layers, drawing=dirty is not None):
+            painter.setOpacity(opacity)
+            draw_tiles(painter, tiles, area)
         painter.end()
-        
-        self.canvas.overlay = composed
-        self.canvas.update_display()
-    
+        if self.render_stats is not None:
+            self.render_stats.add_since('compose', t0)
+        
+        self._composed = composed
+        self._composed_frame = self.current_frame_idx
+        self.prefetcher.invalidate(self.current_frame_idx)
+        self.canvas.set_overlay(composed, dirty, old_key)
+        if incremental:
+            self.canvas.update_image_rect(area)
+        else:
+            self.canvas.update_display()
+
+    def _layers_for_compose(self, layers: list[Layer], drawing: bool = False) -> list[tuple]:
+        """``(teselas, opacidad)`` a mezclar en orden para componer el frame actual.
+
+        Al dibujar sólo cambia la capa activa: las de abajo y las de arriba se
+        aplanan una vez en dos superficies y cada trazo mezcla tres imágenes en vez
+        de todas las capas. Las superficies se identifican por identidad, orden,
+        contenido (``cache_key``), visibilidad y opacidad de las capas no activas,
+        así que cualquier cambio en ellas (panel de capas, deshacer, cambio de capa
+        activa) las rehace solo.
+        """
+        visible = [(layer.tiles, layer.opacity) for layer in layers
+                   if layer.visible and not layer.is_empty()]
+        active = self.current_layer_idx
+        if len(visible) < 3 or not 0 <= active < len(layers):
+            return visible
+        key = (self.current_frame_idx, active, tuple(
+            (id(layer), layer.cache_key(), layer.visible, layer.opacity)
+            for i, layer in enumerate(layers) if i != active))
+        if key != self._flat_key:
+            if not drawing:
+                return visible  # navegar/recomponer no paga el aplanado
+            self._flat_below = self._flatten_layers(layers[:active])
+            self._flat_above = self._flatten_layers(layers[active + 1:])
+            self._flat_key = key
+        out = []
+        if self._flat_below is not None:
+            out.append(({(0, 0): self._flat_below}, 1.0))
+        layer = layers[active]
+        if layer.visible and not layer.is_empty():
+            out.append((layer.tiles, layer.opacity))
+        if self._flat_above is not None:
+            out.append(({(0, 0): self._flat_above}, 1.0))
+        return out
+
+    def _flatten_layers(self, layers: list[Layer]) -> QtGui.QImage | None:
+        """Mezcla ``layers`` (en orden) en una sola imagen; None si ninguna es visible."""
+        visible = [(layer.tiles, layer.opacity) for layer in layers
+                   if layer.visible and not layer.is_empty()]
+        if not visible:
+            return None
+        return compose_images(visible, layers[0].size())
+
+    def frame_version(self, frame_idx: int) -> tuple:
+        """Identifica el contenido dibujado de un frame (cambia con cualquier edición).
+
+        Usa ``Layer.cache_key()``, que cambia al pintar sobre la capa, junto con
+        visibilidad y opacidad de cada capa.
+        """
+        if self.memory.is_spilled(frame_idx):
+            return self.memory.version(frame_idx)
+        layers = self.frame_layers.get(frame_idx)
+        if layers is not None:
+            return ('layers',) + tuple((layer.cache_key(), layer.visible, layer.opacity) for layer in layers)
+        return ('file',)
+
     def compose_layers_for_frame(self, frame_idx: int) -> QtGui.QPixmap:
         """Compose layers for a specific frame (used for onion skinning)."""
         if frame_idx not in self.frame_layers or not self.frames:
@@ -1156,59 +1429,92 @@ class MainWindow(QtWidgets.QMainWindow):
         if not layers:
             return QtGui.QPixmap()
         
-        h, w = self.frames[frame_idx].shape[:2]
+        h, w = self.frames.shape[:2]
         composed = QtGui.QPixmap(w, h)
         composed.fill(QtCore.Qt.transparent)
         
         painter = QtGui.QPainter(composed)
-        painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
         for layer in layers:
-            if layer.visible and not layer.pixmap.isNull():
+            if layer.visible:
                 painter.setOpacity(layer.opacity)
-                painter.drawPixmap(0, 0, layer.pixmap)
+                layer.draw(painter)
         painter.end()
         
         return composed
 
+    def frame_drawing(self, frame_idx: int) -> list[tuple] | None:
+        """Dibujo de ``frame_idx`` como ``[(teselas, opacidad), ...]`` para componer en otro hilo.
+
+        Se llama en el hilo de la UI; las teselas son ``Layer.snapshot()``, así que
+        seguir dibujando no altera lo que recibe el worker. None = frame sin dibujo.
+        Un frame bajado a disco no se trae: sus teselas se leen al recorrerlo.
+        """
+        if self.memory.is_spilled(frame_idx):
+            return self.memory.drawing(frame_idx)
+        layers = self.frame_layers.get(frame_idx)
+        if layers is not None:
+            return [(layer.snapshot(), layer.opacity) for layer in layers
+                    if layer.visible and not layer.is_empty()]
+        return None
+
     def refresh_view(self):
         if not self.frames:
             return
-        idx = self.current_frame_idx; frame = self.frames[idx]
-        qimg = cvimg_to_qimage(frame)
-        if qimg is None:
-            return
-        bg_pix = QtGui.QPixmap.fromImage(qimg)
+        idx = self.current_frame_idx
+        self.memory.visit(idx)
+        bg_pix = self.bg_cache.get(idx)
+        if bg_pix is None:
+            qimg = self.prefetcher.image(idx)  # preparado en segundo plano si veníamos navegando
+            if qimg is None:
+                # Envolver el buffer sin copiar: fromImage hace la única copia
+                qimg = cvimg_to_qimage(self.frames[idx], rgb=self.frames.rgb, copy=False)
+            if qimg is None:
+                return
+            bg_pix = QtGui.QPixmap.fromImage(qimg)
+            self.bg_cache.put(idx, bg_pix)
         self.canvas.set_size(bg_pix.width(), bg_pix.height())
         
         # Ensure frame has layers
         self.ensure_frame_has_layers(idx, bg_pix.width(), bg_pix.height())
+        if idx in self.project_mgr.pending_frames:
+            # Todavía cargando: adelantar este frame (y sus vecinos del onion) en la cola
+            onion = sorted(self.canvas.onion_indices(idx), key=lambda e: -e[2])
+            self.project_mgr.prioritize_frames([i for i, _prev, _dist in onion] + [idx])
+            self.statusBar().showMessage(f'Cargando capas del frame {idx + 1}...')
         
         if idx in self.frame_layers:
-            self.compose_layers()
-        elif idx in self.overlays and self.overlays[idx] is not None:
-            self.canvas.overlay = self.overlays[idx]
+            composed = self.prefetcher.take_overlay(idx)
+            if composed is not None:
+                # Queda como superficie compuesta del frame: el primer trazo ya es incremental
+                self.canvas.set_overlay(composed)
+                self._composed = composed; self._composed_frame = idx
+            else:
+                self.compose_layers()
         else:
-            blank = QtGui.QPixmap(bg_pix.size()); blank.fill(QtCore.Qt.transparent); self.canvas.overlay = blank
+            blank = QtGui.QPixmap(bg_pix.size()); blank.fill(QtCore.Qt.transparent)
+            self.canvas.set_overlay(blank)
+            self._composed = blank; self._composed_frame = idx
         
         opacity = self.opacity_slider.value() / 100.0 if self.show_background else 0.0
         self.canvas.update_display(background_pixmap=bg_pix, opacity=opacity)
         self.frame_label.setText(f'Frame: {idx + 1} / {len(self.frames)}')
         
         self.update_layer_list()
+        self.prefetcher.navigate(idx)
 
-    def store_current_overlay(self):
-        if self.canvas.overlay is not None:
-            # Store in both systems during transition
-            self.overlays[self.current_frame_idx] = QtGui.QPixmap(self.canvas.overlay)
-            # Layers are already stored in frame_layers, no need to duplicate
+    def store_current_frame(self):
+        """Al dejar el frame: sus capas ya son su dibujo, sólo se recortan a lo que quedó con tinta."""
+        for layer in self.frame_layers.get(self.current_frame_idx) or ():
+            layer.trim()
 
     def next_frame(self):
         if not self.frames:
             return
-        self.maybe_autosave_current(); self.store_current_overlay()
+        self.player.stop()
+        self.maybe_autosave_current(); self.store_current_frame()
         if self.current_frame_idx < len(self.frames) - 1:
             self.current_frame_idx += 1
-            h, w = self.frames[self.current_frame_idx].shape[:2]
+            h, w = self.frames.shape[:2]
             self.ensure_frame_has_layers(self.current_frame_idx, w, h)
             
             # Reset layer index if it's out of bounds for new frame
@@ -1217,18 +1523,16 @@ class MainWindow(QtWidgets.QMainWindow):
                 if self.current_layer_idx > max_layer_idx:
                     self.current_layer_idx = max_layer_idx
             
-            # Fallback to old overlay system if no layers
-            if self.current_frame_idx in self.overlays:
-                self.canvas.overlay = self.overlays[self.current_frame_idx]
-            self.canvas.clear_onion_cache(); self.refresh_view(); self.statusBar().showMessage(f'Frame: {self.current_frame_idx + 1}')
+            self.refresh_view(); self.statusBar().showMessage(f'Frame: {self.current_frame_idx + 1}')
 
     def prev_frame(self):
         if not self.frames:
             return
-        self.maybe_autosave_current(); self.store_current_overlay()
+        self.player.stop()
+        self.maybe_autosave_current(); self.store_current_frame()
         if self.current_frame_idx > 0:
             self.current_frame_idx -= 1
-            h, w = self.frames[self.current_frame_idx].shape[:2]
+            h, w = self.frames.shape[:2]
             self.ensure_frame_has_layers(self.current_frame_idx, w, h)
             
             # Reset layer index if it's out of bounds for new frame
@@ -1237,10 +1541,11 @@ class MainWindow(QtWidgets.QMainWindow):
                 if self.current_layer_idx > max_layer_idx:
                     self.current_layer_idx = max_layer_idx
             
-            # Fallback to old overlay system if no layers
-            if self.current_frame_idx in self.overlays:
-                self.canvas.overlay = self.overlays[self.current_frame_idx]
-            self.canvas.clear_onion_cache(); self.refresh_view(); self.statusBar().showMessage(f'Frame: {self.current_frame_idx + 1}')
+            self.refresh_view(); self.statusBar().showMessage(f'Frame: {self.current_frame_idx + 1}')
+
+    def toggle_playback(self):
+        """Reproduce / pausa la animación desde el frame actual (ver ``playback.py``)."""
+        self.player.toggle()
 
     def activar_auto_calco(self):
         """Activa la herramienta Auto-Calco, muestra el dock y captura el viewport."""
@@ -1261,6 +1566,7 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.information(self, 'Info', 'No hay frame anterior para copiar.')
             return
         prev_idx = self.current_frame_idx - 1
+        self.project_mgr.ensure_frame_loaded(prev_idx)
         
         if prev_idx in self.frame_layers:
             prev_layers = self.frame_layers[prev_idx]
@@ -1272,26 +1578,15 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.statusBar().showMessage(f'Copiadas {len(prev_layers)} capas del frame anterior')
                 return
         
-        # Fallback to old overlay system
-        if prev_idx in self.overlays and self.overlays[prev_idx] is not None:
-            self.canvas.overlay = QtGui.QPixmap(self.overlays[prev_idx]); self.overlays[self.current_frame_idx] = QtGui.QPixmap(self.canvas.overlay)
-            self.canvas.clear_onion_cache(); self.refresh_view()
-        else:
-            QtWidgets.QMessageBox.information(self, 'Info', 'No hay overlay en el frame anterior.')
+        QtWidgets.QMessageBox.information(self, 'Info', 'No hay dibujo en el frame anterior.')
 
     def clear_current_overlay(self):
         active_layer = self.get_active_layer()
         if active_layer:
             self.push_undo_snapshot()
-            active_layer.pixmap.fill(QtCore.Qt.transparent)
+            active_layer.clear()
             self.compose_layers()
             self.mark_dirty_current()
-        else:
-            # Fallback to old system
-            self.push_undo_snapshot(); self.canvas.clear_overlay()
-            if self.current_frame_idx in self.overlays:
-                del self.overlays[self.current_frame_idx]
-            self.mark_dirty_current()
 
     def save_current_overlay(self):
         """Exporta el frame actual con opciones avanzadas usando ExportFrameDialog."""
@@ -1300,6 +1595,7 @@ class MainWindow(QtWidgets.QMainWindow):
             return
         
         idx = self.current_frame_idx
+        self.project_mgr.ensure_frame_loaded(idx)
         default_name = f"frame_{idx:05d}.png"
         
         # Mostrar diálogo de exportación
@@ -1334,7 +1630,7 @@ class MainWindow(QtWidgets.QMainWindow):
                     if not layer.visible:
                         continue
                     layer_filename = parent / f"{stem}_layer_{i:02d}_{layer.name}.png"
-                    self._export_single_layer(layer.pixmap, str(layer_filename), options, idx)
+                    self._export_single_layer(QtGui.QPixmap.fromImage(layer.to_image()), str(layer_filename), options, idx)
                 
                 QtWidgets.QMessageBox.information(
                     self, 'Exportación Completa',
@@ -1342,12 +1638,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 )
             else:
                 # Exportar composición única
-                if idx in self.frame_layers:
-                    composed = self.compose_layers_for_frame(idx)
-                else:
-                    composed = self.overlays.get(idx)
-                
-                if composed is None or composed.isNull():
+                composed = self.compose_layers_for_frame(idx)
+                if composed.isNull():
                     QtWidgets.QMessageBox.information(self, 'Info', 'Overlay vacío: nada para guardar.')
                     return
                 
@@ -1363,11 +1655,16 @@ class MainWindow(QtWidgets.QMainWindow):
         """Exporta un solo pixmap con las opciones especificadas."""
         from PIL import Image
         import numpy as np
+
+        if getattr(self.frames, 'is_proxy', False):
+            # Modo proxy: exportar a la resolución completa del video
+            fh, fw = self.frames.full_shape[:2]
+            pixmap = pixmap.scaled(fw, fh, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
         
         # Determinar el fondo
         if options['include_background'] and frame_idx < len(self.frames):
             # Componer con el fondo del video
-            bg_frame = self.frames[frame_idx]
+            bg_frame = self.frames.full_frame(frame_idx) if hasattr(self.frames, 'full_frame') else self.frames[frame_idx]
             h, w = bg_frame.shape[:2]
             
             # Crear imagen de salida
@@ -1375,7 +1672,7 @@ class MainWindow(QtWidgets.QMainWindow):
             painter = QtGui.QPainter(final_pixmap)
             
             # Dibujar fondo
-            bg_qimg = cvimg_to_qimage(bg_frame)
+            bg_qimg = cvimg_to_qimage(bg_frame, rgb=getattr(self.frames, 'rgb', False))
             painter.drawImage(0, 0, bg_qimg)
             
             # Dibujar overlay
@@ -1417,25 +1714,41 @@ class MainWindow(QtWidgets.QMainWindow):
                 QtWidgets.QMessageBox.warning(self, 'Error', 'No se seleccionó una ruta de salida.')
                 return
             
-            # ¡Crear el Worker!
-            worker = ExportWorker(
-                self.project_mgr,
-                self.frames,
-                path,
-                opts['fps'],
-                opts['background_mode']
-            )
-            
-            # Conectar las señales del worker a la UI
-            worker.signals.finished.connect(self.on_export_finished)
-            worker.signals.error.connect(self.on_export_error)
-            # (Podríamos conectar 'progress' a un QProgressBar en el futuro)
-            
-            # Iniciar el worker en el hilo separado
-            self.thread_pool.start(worker)
-            
-            # Informar al usuario
-            self.statusBar().showMessage(f'Exportando animación a {path} en segundo plano...')
+            self.start_export_animation(path, opts['fps'], opts['background_mode'])
+
+    def quick_export_animation(self):
+        """Atajo de exportación: video con fondo en exports/, sin diálogo."""
+        if not self.frames:
+            QtWidgets.QMessageBox.information(self, 'Exportar', 'No hay frames para exportar.')
+            return
+        path = EXPORT_DIR / ((self.project_name or 'animacion') + '.mp4')
+        self.start_export_animation(path, 12, EXPORT_BG_VIDEO)
+
+    def start_export_animation(self, path, fps, background_mode):
+        """Exporta la animación en un ``ExportWorker`` (la UI sigue respondiendo)."""
+        # Las capas que sigan cargando se completan antes de exportar
+        self.project_mgr.finish_pending_loads()
+
+        # ¡Crear el Worker!
+        worker = ExportWorker(
+            self.project_mgr,
+            self.frames,
+            path,
+            fps,
+            background_mode
+        )
+        
+        # Conectar las señales del worker a la UI
+        worker.signals.finished.connect(self.on_export_finished)
+        worker.signals.error.connect(self.on_export_error)
+        # (Podríamos conectar 'progress' a un QProgressBar en el futuro)
+        
+        # Iniciar el worker en el hilo separado (la referencia mantiene vivas sus señales)
+        self._export_worker = worker
+        self.thread_pool.start(worker)
+        
+        # Informar al usuario
+        self.statusBar().showMessage(f'Exportando animación a {path} en segundo plano...')
 
     def mark_dirty_current(self):
         self.dirty_frames.add(self.current_frame_idx)
@@ -1467,7 +1780,13 @@ class MainWindow(QtWidgets.QMainWindow):
         if clicked_button == save_btn:
             # Save and continue
             if hasattr(self, 'project_mgr') and self.project_mgr:
-                self.project_mgr.save_project_overlay()
+                if self.project_path:
+                    for idx in sorted(self.dirty_frames):
+                        self.project_mgr.save_frame_layers(idx)
+                    self.dirty_frames.clear()
+                    self.project_mgr.write_meta()
+                else:
+                    self.project_mgr.save_project_dialog()
                 self.is_dirty = False  # Mark as saved
             return True
         elif clicked_button == discard_btn:
@@ -1479,10 +1798,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def maybe_autosave_current(self):
         if self.project_path and self.current_frame_idx in self.dirty_frames:
-            if self.current_frame_idx in self.frame_layers:
-                self.project_mgr.save_frame_layers(self.current_frame_idx)
-            else:
-                self.project_mgr.save_project_overlay(self.current_frame_idx)
+            self.project_mgr.save_frame_layers(self.current_frame_idx)
             self.dirty_frames.discard(self.current_frame_idx)
             self.project_mgr.write_meta()
             # Reset global dirty flag if no more dirty frames
@@ -1557,7 +1873,7 @@ class MainWindow(QtWidgets.QMainWindow):
     # ---------------- Undo / Redo ----------------
     def push_undo_snapshot(self, force: bool = False):
         active_layer = self.get_active_layer()
-        if active_layer is None or active_layer.pixmap.isNull():
+        if active_layer is None:
             return
         # Respect the force flag: only skip snapshot if not forced and the current tool opts out
         if not force and self.canvas.tool and hasattr(self.canvas.tool, 'requires_snapshot') and not self.canvas.tool.requires_snapshot:
@@ -1565,7 +1881,7 @@ class MainWindow(QtWidgets.QMainWindow):
         stack = self.undo_stacks.setdefault(self.current_frame_idx, [])
         if len(stack) >= self.max_history:
             stack.pop(0)
-        stack.append(QtGui.QPixmap(active_layer.pixmap))
+        stack.append(active_layer.snapshot())
         self.redo_stacks.setdefault(self.current_frame_idx, []).clear()
 
     def undo(self):
@@ -1575,11 +1891,9 @@ class MainWindow(QtWidgets.QMainWindow):
         active_layer = self.get_active_layer()
         if not active_layer:
             return
-        current = QtGui.QPixmap(active_layer.pixmap) if not active_layer.pixmap.isNull() else None
         prev = stack.pop(); rstack = self.redo_stacks.setdefault(self.current_frame_idx, [])
-        if current is not None:
-            rstack.append(current)
-        active_layer.pixmap = QtGui.QPixmap(prev)
+        rstack.append(active_layer.snapshot())
+        active_layer.restore(prev)
         self.compose_layers()
 
     def redo(self):
@@ -1589,11 +1903,9 @@ class MainWindow(QtWidgets.QMainWindow):
         active_layer = self.get_active_layer()
         if not active_layer:
             return
-        current = QtGui.QPixmap(active_layer.pixmap) if not active_layer.pixmap.isNull() else None
         nxt = rstack.pop(); stack = self.undo_stacks.setdefault(self.current_frame_idx, [])
-        if current is not None:
-            stack.append(current)
-        active_layer.pixmap = QtGui.QPixmap(nxt)
+        stack.append(active_layer.snapshot())
+        active_layer.restore(nxt)
         self.compose_layers()
 
     # ---------------- Zoom ----------------
@@ -1627,6 +1939,7 @@ class MainWindow(QtWidgets.QMainWindow):
         new_scale = max(self.zoom_min, min(self.zoom_max, new_scale))
         if abs(new_scale - old_scale) < 1e-3:
             return
+        self.canvas.begin_interaction()  # ruedas/pinch seguidos: repintado rápido hasta quedar quieto
 
         # Convertir posición del cursor a coords de overlay (para futura extensión)
         overlay_pos = self.canvas.mapToOverlay(cursor_pos)
@@ -1647,9 +1960,9 @@ class MainWindow(QtWidgets.QMainWindow):
         old_h = hbar.value()
         old_v = vbar.value()
 
-        # Aplicar escala y refrescar (redimensiona canvas)
+        # Aplicar escala y redimensionar el canvas (el contenido no cambia: no se recompone)
         self.canvas.scale_factor = new_scale
-        self.refresh_view()
+        self.canvas.update_display()
 
         scale_ratio = new_scale / old_scale
         new_h = int((old_h + cursor_pos.x()) * scale_ratio - cursor_pos.x())
@@ -1680,6 +1993,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.ask_to_save_and_close():
             return  # User cancelled, don't proceed
             
+        self.player.stop()
         self.project_mgr.load_project_dialog()
         if self.project_name:
             self.is_dirty = False  # Reset dirty flag after loading project
@@ -1692,8 +2006,11 @@ class MainWindow(QtWidgets.QMainWindow):
             return  # User cancelled, don't proceed
             
         # Reset all project state
+        self.player.stop()
+        self.project_mgr.cancel_pending_loads()
+        self.prefetcher.reset()
+        self.bg_cache.clear()
         self.frames.clear()
-        self.overlays.clear()
         self.frame_layers.clear()
         self.undo_stacks.clear()
         self.redo_stacks.clear()
@@ -1723,6 +2040,8 @@ class MainWindow(QtWidgets.QMainWindow):
             self.brush_slider.setValue(DEFAULT_BRUSH_SIZE)
             self.opacity_slider.setValue(int(DEFAULT_BG_OPACITY * 100))
             self.onion_opacity_slider.setValue(int(DEFAULT_ONION_OPACITY * 100))
+            self.onion_before_spin.setValue(DEFAULT_ONION_FRAMES)
+            self.onion_after_spin.setValue(DEFAULT_ONION_FRAMES)
             if hasattr(self, 'action_onion'):
                 self.action_onion.setChecked(False)
             if hasattr(self, 'action_bg_toggle'):
@@ -2047,6 +2366,8 @@ class ExportWorker(QtCore.QRunnable):
         self.path = path
         self.fps = fps
         self.background_mode = background_mode
+        # Las capas se leen acá, en el hilo de la UI; el worker sólo ve estas copias
+        self.drawings = project_mgr.snapshot_drawings()
         self.signals = ExportSignals()  # Crear la instancia de señales
 
     @QtCore.Slot()  # Indica que esto es un "slot" para ser ejecutado por el hilo
@@ -2060,7 +2381,8 @@ class ExportWorker(QtCore.QRunnable):
                 self.frames,
                 self.path,
                 self.fps,
-                self.background_mode
+                self.background_mode,
+                self.drawings
             )
             
             # Si todo sale bien, emitimos la señal de "finished"
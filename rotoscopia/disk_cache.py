@@ -0,0 +1,210 @@
+"""Caché persistente de frames decodificados en disco (memoria mapeada).
+
+Reabrir un proyecto obligaba a volver a decodificar el video fuente. Esta caché
+guarda los frames ya subsampleados en un único archivo crudo por proyecto
+(``<proyecto>/cache/frames_<clave>.raw``) que se abre con ``np.memmap``: en
+aperturas posteriores los frames se leen directo del mapa, sin decodificar.
+
+- Clave: ruta del video, mtime, tamaño, ``fps_original``, ``fps_target`` y orden de canales.
+  Si cualquiera cambia se usa (y crea) otro archivo.
+- Integridad: el encabezado JSON guarda la clave, la forma y un CRC32 por frame.
+  Al abrir se valida clave y tamaño del archivo; cada frame se verifica contra
+  su CRC la primera vez que se lee en la sesión (un frame corrupto se vuelve a
+  decodificar).
+- Tamaño: si la caché no entra en ``DISK_CACHE_MAX_MB`` no se crea, y al crear
+  una nueva se borran las más viejas de la carpeta hasta entrar en el límite.
+
+El archivo se llena a medida que se decodifican frames (write-through).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from .settings import DISK_CACHE_MAX_MB
+
+CACHE_DIR_NAME = 'cache'
+_HEADER_VERSION = 1
+_FLUSH_EVERY = 32  # puts entre escrituras del encabezado
+
+
+def cache_key(video_path: str, fps_original, fps_target, channel_order: str = 'bgr') -> dict | None:
+    """Clave que identifica una decodificación concreta de un video."""
+    try:
+        st = os.stat(video_path)
+    except OSError:
+        return None
+    return {
+        'video_path': str(Path(video_path).resolve()),
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+        'fps_original': fps_original,
+        'fps_target': fps_target,
+        'channel_order': channel_order,
+    }
+
+
+def _key_hash(key: dict) -> str:
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class DiskFrameCache:
+    """Archivo crudo ``count × alto × ancho × canales`` (uint8) mapeado en memoria."""
+
+    def __init__(self, raw_path: Path, header_path: Path, key: dict, count: int, shape: tuple):
+        self.raw_path = raw_path
+        self.header_path = header_path
+        self.key = key
+        self.count = count
+        self.shape = tuple(shape)
+        self.frame_bytes = int(np.prod(self.shape))
+        self.crc: list[int | None] = [None] * count
+        self._verified: set[int] = set()
+        self._dirty = 0
+        self._lock = threading.Lock()
+        self._map: np.memmap | None = None
+
+    # --- Apertura ---
+    @classmethod
+    def open(cls, cache_dir: Path, key: dict, count: int, shape: tuple,
+             max_mb: float = DISK_CACHE_MAX_MB) -> 'DiskFrameCache | None':
+        """Abre (o crea) la caché para ``key``. None si no entra en el límite o falla el disco."""
+        if key is None or count <= 0:
+            return None
+        frame_bytes = int(np.prod(shape))
+        total = frame_bytes * count
+        max_bytes = int(max_mb * 1024 * 1024)
+        if total > max_bytes:
+            return None
+        cache_dir = Path(cache_dir)
+        name = f'frames_{_key_hash(key)}'
+        cache = cls(cache_dir / f'{name}.raw', cache_dir / f'{name}.json', key, count, shape)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            if not cache._load_header(total):
+                _prune(cache_dir, keep=name, budget=max_bytes - total)
+                cache._create(total)
+            cache._map = np.memmap(cache.raw_path, dtype=np.uint8, mode='r+',
+                                   shape=(count,) + cache.shape)
+        except (OSError, ValueError):
+            return None
+        os.utime(cache.header_path)  # marca de uso para el orden de poda
+        return cache
+
+    def _load_header(self, total: int) -> bool:
+        try:
+            with open(self.header_path, 'r', encoding='utf-8') as f:
+                header = json.load(f)
+            if (header.get('version') != _HEADER_VERSION or header.get('key') != self.key
+                    or tuple(header.get('shape', ())) != self.shape or header.get('count') != self.count):
+                return False
+            if self.raw_path.stat().st_size != total:
+                return False
+            crc = header.get('crc', [])
+            if len(crc) != self.count:
+                return False
+            self.crc = crc
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _create(self, total: int):
+        with open(self.raw_path, 'wb') as f:
+            f.truncate(total)  # archivo disperso: no ocupa disco hasta escribir
+        self.crc = [None] * self.count
+        self.flush(force=True)
+
+    # --- Acceso ---
+    def get(self, idx: int):
+        """Frame ``idx`` como vista de solo lectura sobre el mapa, o None si falta/está corrupto."""
+        if self._map is None or not (0 <= idx < self.count):
+            return None
+        with self._lock:
+            expected = self.crc[idx]
+            if expected is None:
+                return None
+            view = self._map[idx]
+            if idx not in self._verified:
+                if zlib.crc32(view) != expected:
+                    self.crc[idx] = None
+                    self._dirty += 1
+                    return None
+                self._verified.add(idx)
+        view = view.view(np.ndarray)
+        view.flags.writeable = False
+        return view
+
+    def put(self, idx: int, frame: np.ndarray):
+        if self._map is None or not (0 <= idx < self.count) or frame.shape != self.shape:
+            return
+        with self._lock:
+            self._map[idx] = frame
+            self.crc[idx] = zlib.crc32(np.ascontiguousarray(frame))
+            self._verified.add(idx)
+            self._dirty += 1
+            flush = self._dirty >= _FLUSH_EVERY
+        if flush:
+            self.flush()
+
+    def flush(self, force: bool = False):
+        """Escribe el encabezado (atómico) si hubo cambios desde la última vez."""
+        with self._lock:
+            if not force and not self._dirty:
+                return
+            if self._map is not None:
+                self._map.flush()
+            header = {
+                'version': _HEADER_VERSION,
+                'key': self.key,
+                'shape': list(self.shape),
+                'count': self.count,
+                'dtype': 'uint8',
+                'crc': self.crc,
+            }
+            self._dirty = 0
+        tmp = self.header_path.with_suffix('.tmp')
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(header, f)
+            os.replace(tmp, self.header_path)
+        except OSError:
+            pass
+
+    def close(self):
+        self.flush()
+        self._map = None
+
+    @property
+    def filled(self) -> int:
+        return sum(1 for c in self.crc if c is not None)
+
+
+def _prune(cache_dir: Path, keep: str, budget: int):
+    """Borra cachés de la carpeta (la menos usada primero) hasta que ocupen <= ``budget``."""
+    entries = []
+    for header in cache_dir.glob('frames_*.json'):
+        if header.stem == keep:
+            continue
+        raw = header.with_suffix('.raw')
+        try:
+            size = raw.stat().st_size if raw.exists() else 0
+            entries.append((header.stat().st_mtime, size, header, raw))
+        except OSError:
+            continue
+    used = sum(e[1] for e in entries)
+    for _mtime, size, header, raw in sorted(entries, key=lambda e: e[0]):
+        if used <= max(0, budget):
+            break
+        for p in (raw, header):
+            try:
+                p.unlink()
+            except OSError:
+                pass
+        used -= size
@@ -0,0 +1,153 @@
+"""Representaciones comprimidas en memoria para la caché de frames.
+
+Un frame BGR 1080p ocupa ~6 MB. ``FRAME_STORE_MODE`` (settings) elige cómo se
+guardan los frames en la caché en RAM de las fuentes (``FrameSource.cache``):
+
+- ``raw``: ndarray BGR tal cual (sin costo de CPU, máximo uso de RAM).
+- ``jpeg``: bytes JPEG a ``FRAME_STORE_JPEG_QUALITY`` (con pérdida, ~10-20x menos).
+- ``png``: bytes PNG sin pérdida (compresión rápida, nivel 1).
+- ``zlib``: buffer crudo comprimido con zlib sin pérdida.
+- ``yuv420``: planar YUV 4:2:0 (I420): 1,5 bytes/píxel, decodificación muy barata.
+
+Los modos comprimidos mantienen delante una caché "caliente" chica de frames ya
+decodificados (``FRAME_STORE_HOT_MB``) para que ir y volver entre frames
+vecinos no pague la descompresión.
+"""
+
+from __future__ import annotations
+
+import threading
+import zlib
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from .settings import FRAME_CACHE_MB, FRAME_STORE_MODE, FRAME_STORE_JPEG_QUALITY, FRAME_STORE_HOT_MB
+
+STORE_MODES = ('raw', 'jpeg', 'png', 'zlib', 'yuv420')
+
+
+class FrameCodec:
+    """Codifica/decodifica un frame BGR uint8 a la representación de un modo."""
+
+    def __init__(self, mode: str, jpeg_quality: int = FRAME_STORE_JPEG_QUALITY):
+        if mode not in STORE_MODES:
+            raise ValueError(f'modo de almacenamiento desconocido: {mode}')
+        self.mode = mode
+        self.jpeg_quality = int(jpeg_quality)
+
+    def encode(self, frame: np.ndarray):
+        """Devuelve ``(datos, shape)``; ``datos`` expone ``nbytes`` o ``len``."""
+        shape = frame.shape
+        if self.mode == 'raw':
+            return frame, shape
+        if self.mode == 'jpeg':
+            ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            return buf.tobytes() if ok else None, shape
+        if self.mode == 'png':
+            ok, buf = cv2.imencode('.png', frame, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+            return buf.tobytes() if ok else None, shape
+        if self.mode == 'zlib':
+            return zlib.compress(np.ascontiguousarray(frame).data, 1), shape
+        # yuv420: I420 exige alto/ancho pares; se rellena el borde y se recorta al leer
+        h, w = shape[:2]
+        if h % 2 or w % 2:
+            frame = cv2.copyMakeBorder(frame, 0, h % 2, 0, w % 2, cv2.BORDER_REPLICATE)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420), shape
+
+    def decode(self, data, shape: tuple) -> np.ndarray | None:
+        if data is None:
+            return None
+        if self.mode == 'raw':
+            return data
+        if self.mode in ('jpeg', 'png'):
+            frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        elif self.mode == 'zlib':
+            frame = np.frombuffer(zlib.decompress(data), np.uint8).reshape(shape)
+        else:
+            frame = cv2.cvtColor(data, cv2.COLOR_YUV2BGR_I420)[:shape[0], :shape[1]]
+        if frame is None:
+            return None
+        frame.flags.writeable = False
+        return frame
+
+
+def _data_size(data) -> int:
+    if data is None:
+        return 0
+    return data.nbytes if isinstance(data, np.ndarray) else len(data)
+
+
+class CompressedFrameCache:
+    """Caché LRU de frames guardados comprimidos, con una caché caliente de decodificados.
+
+    Misma interfaz que ``frames.FrameCache`` (``get``/``put``/``clear``/``in``);
+    ``max_mb`` acota los bytes comprimidos y ``hot_mb`` los frames decodificados.
+    """
+
+    def __init__(self, mode: str, max_mb: float = FRAME_CACHE_MB, hot_mb: float = FRAME_STORE_HOT_MB,
+                 jpeg_quality: int = FRAME_STORE_JPEG_QUALITY):
+        from .frames import FrameCache  # evitar import circular
+        self.codec = FrameCodec(mode, jpeg_quality)
+        self.max_bytes = max(0, int(max_mb * 1024 * 1024))
+        self.hot = FrameCache(hot_mb)
+        self._items: OrderedDict[int, tuple] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: int):
+        frame = self.hot.get(key)
+        if frame is not None:
+            self.hits += 1
+            return frame
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+        frame = self.codec.decode(*item)
+        if frame is not None:
+            self.hot.put(key, frame)
+        return frame
+
+    def put(self, key: int, frame: np.ndarray):
+        self.hot.put(key, frame)
+        data, shape = self.codec.encode(frame)
+        size = _data_size(data)
+        if data is None or size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= _data_size(old[0])
+            self._items[key] = (data, shape)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._items:
+                _, (evicted, _shape) = self._items.popitem(last=False)
+                self._bytes -= _data_size(evicted)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.hot or key in self._items
+
+    def clear(self):
+        self.hot.clear()
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes + self.hot.size_bytes
+
+
+def make_frame_cache(max_mb: float = FRAME_CACHE_MB, mode: str = FRAME_STORE_MODE):
+    """Caché en RAM para una fuente de frames según ``FRAME_STORE_MODE``."""
+    if mode == 'raw':
+        from .frames import FrameCache
+        return FrameCache(max_mb)
+    return CompressedFrameCache(mode, max_mb)
@@ -0,0 +1,496 @@
+"""Fuentes de frames con decodificación bajo demanda.
+
+``MainWindow.frames`` ya no guarda todos los frames del video como ndarrays BGR:
+al cargar sólo se construye un índice (qué frame del video original corresponde a
+cada frame subsampleado) y cada frame se decodifica al pedirlo, pasando por una
+caché LRU acotada en MB (opcionalmente comprimida, ver ``frame_store.py``).
+
+Las fuentes se comportan como una lista de solo lectura (``len``, ``frames[i]``,
+iteración, ``bool``), de modo que el resto del código puede seguir usando
+``window.frames[idx]`` sin cambios.
+
+Tipos de fuente (``source_type`` en meta.json): ``image`` (imagen única),
+``video`` (contenedor) y ``sequence`` (carpeta de imágenes numeradas).
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .settings import FRAME_CACHE_MB, FRAME_CHANNEL_ORDER, INGEST_WORKERS, SEQUENCE_WORKERS
+from .ingest import SubsampledReader, decode_parallel
+from .frame_store import make_frame_cache
+
+IMAGE_EXTS = {'.png', '.jpg', '.jpeg', '.bmp'}
+
+
+class FrameCache:
+    """Caché LRU de frames decodificados, limitada por tamaño total en MB."""
+
+    def __init__(self, max_mb: float = FRAME_CACHE_MB):
+        self.max_bytes = max(0, int(max_mb * 1024 * 1024))
+        self._items: OrderedDict[int, np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: int):
+        with self._lock:
+            frame = self._items.get(key)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return frame
+
+    def put(self, key: int, frame: np.ndarray):
+        size = frame.nbytes
+        if size > self.max_bytes:
+            return  # no cabe ni solo: no cachear
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._items[key] = frame
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._items:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._items  # sin tocar el orden LRU ni los contadores
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class FrameSource:
+    """Secuencia de frames de solo lectura decodificada bajo demanda.
+
+    Las subclases implementan ``_decode(src_idx)``; ``indices`` mapea cada frame
+    visible (tras subsampling) a su índice en el recurso original.
+
+    Modo proxy: con ``proxy_scale < 1`` los frames se entregan reducidos y
+    ``shape`` es el tamaño de trabajo (canvas, capas, Auto-Calco); ``full_shape`` y
+    ``full_frame()`` dan la resolución original para exportar.
+
+    ``channel_order`` ('bgr' o 'rgb', ver ``FRAME_CHANNEL_ORDER``) es el orden de
+    canales de los frames entregados; la conversión se hace una vez al decodificar.
+    """
+
+    source_type = 'video'
+    channel_order = FRAME_CHANNEL_ORDER
+
+    def __init__(self, path: str, indices: list[int], shape: tuple, cache_mb: float = FRAME_CACHE_MB,
+                 proxy_scale: float = 1.0):
+        self.path = path
+        self.indices = list(indices)
+        self.full_shape = tuple(shape)  # (alto, ancho, canales) del recurso original
+        self.cache = make_frame_cache(cache_mb)  # frames al tamaño de trabajo (ver FRAME_STORE_MODE)
+        self.disk_cache = None  # DiskFrameCache opcional (write-through, resolución completa)
+        self._lock = threading.RLock()
+        self.set_proxy_scale(proxy_scale)
+
+    def set_proxy_scale(self, scale: float):
+        """Fija el factor de trabajo (1.0 = resolución completa)."""
+        scale = max(0.05, min(1.0, float(scale or 1.0)))
+        h, w = self.full_shape[:2]
+        pw = max(1, int(round(w * scale))); ph = max(1, int(round(h * scale)))
+        if (pw, ph) == (w, h):
+            scale = 1.0
+        self.proxy_scale = scale
+        self.shape = (ph, pw) + self.full_shape[2:]  # tamaño de trabajo común a todos los frames
+        self.cache.clear()
+
+    @property
+    def is_proxy(self) -> bool:
+        return self.proxy_scale != 1.0
+
+    @property
+    def rgb(self) -> bool:
+        return self.channel_order == 'rgb'
+
+    @property
+    def sequential_only(self) -> bool:
+        """True si ir hacia atrás obliga a decodificar hacia adelante desde un punto anterior."""
+        return False
+
+    def _from_decoder(self, frame):
+        """Frame BGR recién decodificado -> orden de canales de la fuente (solo lectura)."""
+        if frame is None:
+            return None
+        if self.rgb:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame.flags.writeable = False  # compartido vía caché: nadie debe mutarlo
+        return frame
+
+    # --- Protocolo de lista ---
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __bool__(self) -> bool:
+        return bool(self.indices)
+
+    def _check_index(self, idx: int) -> int:
+        if idx < 0:
+            idx += len(self.indices)
+        if idx < 0 or idx >= len(self.indices):
+            raise IndexError('frame fuera de rango')
+        return idx
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        idx = self._check_index(idx)
+        frame = self.cache.get(idx)
+        if frame is not None:
+            return frame
+        full, from_disk = self._full(idx)
+        if not self.is_proxy:
+            if not from_disk:
+                self.cache.put(idx, full)
+            # desde disco es una vista sobre el archivo mapeado: no ocupa la caché en RAM
+            return full
+        frame = cv2.resize(full, (self.shape[1], self.shape[0]), interpolation=cv2.INTER_AREA)
+        frame.flags.writeable = False
+        self.cache.put(idx, frame)
+        return frame
+
+    def full_frame(self, idx: int) -> np.ndarray:
+        """Frame a resolución original (para exportar); en modo proxy no pasa por la caché en RAM."""
+        if not self.is_proxy:
+            return self[idx]
+        return self._full(self._check_index(idx))[0]
+
+    def _full(self, idx: int):
+        """Devuelve ``(frame_completo, vino_de_disco)``."""
+        disk = self.disk_cache
+        if disk is not None:
+            frame = disk.get(idx)
+            if frame is not None:
+                return frame, True
+        with self._lock:
+            frame = self._from_decoder(self._decode(self.indices[idx]))
+        if frame is None:
+            raise IndexError(f'no se pudo decodificar el frame {idx}')
+        if disk is not None:
+            disk.put(idx, frame)
+        return frame, False
+
+    def __iter__(self):
+        for i in range(len(self.indices)):
+            yield self[i]
+
+    def iter_full_frames(self):
+        """Itera ``(idx, frame)`` a resolución completa, en orden (exportación)."""
+        for i in range(len(self.indices)):
+            yield i, self.full_frame(i)
+
+    def clear(self):
+        """Libera recursos y deja la fuente vacía (equivalente a ``list.clear``)."""
+        with self._lock:
+            self.release()
+            self.attach_disk_cache(None)
+            self.indices = []
+            self.cache.clear()
+
+    def attach_disk_cache(self, disk_cache):
+        """Asocia (o con None, cierra) la caché persistente en disco."""
+        if self.disk_cache is not None and self.disk_cache is not disk_cache:
+            self.disk_cache.close()
+        self.disk_cache = disk_cache
+
+    def flush_disk_cache(self):
+        if self.disk_cache is not None:
+            self.disk_cache.flush()
+
+    # --- A implementar por subclases ---
+    def _decode(self, src_idx: int):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class ImageFrameSource(FrameSource):
+    """Imagen estática como fuente de un único frame."""
+
+    source_type = 'image'
+
+    def __init__(self, path: str, image: np.ndarray, cache_mb: float = FRAME_CACHE_MB,
+                 proxy_scale: float = 1.0):
+        super().__init__(path, [0], image.shape, cache_mb, proxy_scale)
+        self._image = image
+        self._image.flags.writeable = False
+
+    def _decode(self, src_idx: int):
+        return self._image
+
+    def release(self):
+        self._image = None
+
+
+class VideoFrameSource(FrameSource):
+    """Video decodificado bajo demanda con una única captura abierta.
+
+    La lectura pasa por ``SubsampledReader``: los frames intermedios que se
+    descartan por el subsampling se avanzan con ``grab()`` (sin ``retrieve()``),
+    y los saltos largos usan seek cuando el contenedor lo soporta con precisión.
+    """
+
+    source_type = 'video'
+
+    def __init__(self, path: str, indices: list[int], shape: tuple, fps_original: float,
+                 step: int, cache_mb: float = FRAME_CACHE_MB, proxy_scale: float = 1.0):
+        super().__init__(path, indices, shape, cache_mb, proxy_scale)
+        self.fps_original = fps_original
+        self.step = step
+        self._reader = SubsampledReader(path)
+
+    @property
+    def sequential_only(self) -> bool:
+        return not self._reader.reliable_seek
+
+    def _decode(self, src_idx: int):
+        return self._reader.read(src_idx)
+
+    def iter_full_frames(self, workers: int | None = None):
+        """Como ``FrameSource.iter_full_frames`` pero decodifica en paralelo lo que falte.
+
+        Los frames que ya están en la caché en disco se leen de ahí; el resto se
+        decodifica por segmentos en varios procesos (``ingest.decode_parallel``) y
+        se escribe en la caché en disco al pasar.
+        """
+        workers = (INGEST_WORKERS or None) if workers is None else workers
+        disk = self.disk_cache
+        missing = [i for i in range(len(self.indices))
+                   if disk is None or disk.crc[i] is None]
+        decoded = decode_parallel(self.path, [self.indices[i] for i in missing],
+                                  self.full_shape, workers)
+        missing_set = set(missing)
+        try:
+            for i in range(len(self.indices)):
+                frame = None
+                if i in missing_set:
+                    _k, frame = next(decoded)
+                    frame = self._from_decoder(frame)
+                    if frame is not None and disk is not None:
+                        disk.put(i, frame)
+                elif disk is not None:
+                    frame = disk.get(i)
+                if frame is None:
+                    frame = self._full(i)[0]  # corrupto en disco o falló la decodificación
+                yield i, frame
+        finally:
+            decoded.close()
+
+    def release(self):
+        self._reader.release()
+
+
+def _read_image(file: str, shape: tuple):
+    """Lee una imagen de la secuencia; si difiere en tamaño se ajusta a ``shape``."""
+    img = cv2.imread(file, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    if img.shape != shape:
+        img = cv2.resize(img, (shape[1], shape[0]), interpolation=cv2.INTER_AREA)
+    return img
+
+
+class ImageSequenceSource(FrameSource):
+    """Carpeta de imágenes numeradas (plates PNG/JPG) decodificadas bajo demanda.
+
+    Los archivos se indexan al abrir; cada imagen se lee en un pool de hilos
+    (``cv2.imread`` libera el GIL) y al pedir un frame se encolan también los
+    siguientes en la dirección en que se está recorriendo la secuencia.
+    """
+
+    source_type = 'sequence'
+
+    def __init__(self, path: str, files: list[str], indices: list[int], shape: tuple, fps_original: float,
+                 step: int, cache_mb: float = FRAME_CACHE_MB, proxy_scale: float = 1.0,
+                 workers: int = SEQUENCE_WORKERS):
+        super().__init__(path, indices, shape, cache_mb, proxy_scale)
+        self.files = list(files)
+        self.fps_original = fps_original
+        self.step = step
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='rotoscopia-seq')
+        self._futures: OrderedDict[int, object] = OrderedDict()
+        self._futures_lock = threading.Lock()
+        self._last_pos: int | None = None
+        self._direction = 1
+
+    def _submit(self, src_idx: int):
+        with self._futures_lock:
+            future = self._futures.get(src_idx)
+            if future is None:
+                future = self._pool.submit(_read_image, self.files[src_idx], self.full_shape)
+                self._futures[src_idx] = future
+                while len(self._futures) > self.workers * 4:
+                    _, old = self._futures.popitem(last=False)
+                    old.cancel()
+            return future
+
+    def _read_ahead(self, pos: int):
+        n = len(self.indices)
+        for k in range(1, self.workers + 1):
+            p = pos + k * self._direction
+            if 0 <= p < n and p not in self.cache:
+                self._submit(self.indices[p])
+
+    def _decode(self, src_idx: int):
+        pos = src_idx // self.step
+        if self._last_pos is not None and pos != self._last_pos:
+            self._direction = 1 if pos > self._last_pos else -1
+        self._last_pos = pos
+        future = self._submit(src_idx)
+        self._read_ahead(pos)
+        try:
+            return future.result()
+        finally:
+            with self._futures_lock:
+                if self._futures.get(src_idx) is future:
+                    del self._futures[src_idx]
+
+    def release(self):
+        with self._futures_lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_SEQ_NUMBER = re.compile(r'^(.*?)(\d+)$')
+
+
+def list_sequence_files(path: str) -> list[str]:
+    """Archivos de la secuencia en orden numérico.
+
+    ``path`` puede ser la carpeta (toma la secuencia más larga que contenga) o un
+    archivo de la secuencia (toma los que comparten prefijo y extensión:
+    ``plate_0001.png``, ``plate_0002.png``...).
+    """
+    p = Path(path)
+    prefix = ext = None
+    if p.is_file():
+        m = _SEQ_NUMBER.match(p.stem)
+        prefix = m.group(1) if m else p.stem
+        ext = p.suffix.lower()
+        p = p.parent
+    if not p.is_dir():
+        return []
+    groups: dict[tuple[str, str], list] = {}
+    for f in p.iterdir():
+        if not f.is_file() or f.suffix.lower() not in IMAGE_EXTS:
+            continue
+        m = _SEQ_NUMBER.match(f.stem)
+        head, number = (m.group(1), int(m.group(2))) if m else (f.stem, -1)
+        groups.setdefault((head, f.suffix.lower()), []).append((number, f.name, str(f)))
+    if prefix is not None:
+        entries = groups.get((prefix, ext), [])
+    else:
+        entries = max(groups.values(), key=len, default=[])
+    return [e[2] for e in sorted(entries)]
+
+
+def compute_step(fps_original: float, target_fps: float) -> int:
+    """Cada cuántos frames del original se conserva uno para llegar a ``target_fps``."""
+    return max(1, int(round(float(fps_original) / max(1, float(target_fps)))))
+
+
+def _count_frames(cap: cv2.VideoCapture) -> int:
+    """Cuenta frames con ``grab()`` cuando el contenedor no reporta un total fiable."""
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    n = 0
+    while cap.grab():
+        n += 1
+    return n
+
+
+def open_image_source(path: str, cache_mb: float = FRAME_CACHE_MB,
+                      proxy_scale: float = 1.0) -> ImageFrameSource | None:
+    img = cv2.imread(path, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    return ImageFrameSource(path, img, cache_mb, proxy_scale)
+
+
+def open_video_source(path: str, target_fps: float | None = None, fps_original: float | None = None,
+                      cache_mb: float = FRAME_CACHE_MB, proxy_scale: float = 1.0) -> VideoFrameSource | None:
+    """Abre un video y construye su índice de frames sin decodificarlos todos.
+
+    - ``fps_original``: si se pasa (p.ej. desde meta.json) tiene prioridad sobre el del contenedor.
+    - ``target_fps``: None = conservar todos los frames (proyectos antiguos).
+
+    Devuelve None si el video no se puede abrir o no tiene frames.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return None
+    try:
+        real_fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        if not fps_original or fps_original <= 0:
+            fps_original = real_fps if real_fps > 0 else 12.0
+        step = 1 if target_fps is None else compute_step(fps_original, target_fps)
+        ret, first = cap.read()
+        if not ret:
+            return None
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        if total > 1:
+            # Validar el total reportado: algunos contenedores lo sobreestiman
+            last = ((total - 1) // step) * step
+            cap.set(cv2.CAP_PROP_POS_FRAMES, last)
+            if not cap.grab():
+                total = _count_frames(cap)
+        elif total <= 0:
+            total = _count_frames(cap)
+        total = max(1, total)
+    finally:
+        cap.release()
+    indices = list(range(0, total, step))
+    return VideoFrameSource(path, indices, first.shape, float(fps_original), step, cache_mb, proxy_scale)
+
+
+def open_sequence_source(path: str, target_fps: float | None = None, fps_original: float | None = None,
+                         cache_mb: float = FRAME_CACHE_MB, proxy_scale: float = 1.0) -> ImageSequenceSource | None:
+    """Indexa una secuencia de imágenes (carpeta o archivo de la secuencia) sin decodificarla.
+
+    Una secuencia no trae fps: ``fps_original`` lo indica el usuario (o meta.json).
+    """
+    files = list_sequence_files(path)
+    if not files:
+        return None
+    first = cv2.imread(files[0], cv2.IMREAD_COLOR)
+    if first is None:
+        return None
+    if not fps_original or fps_original <= 0:
+        fps_original = 24.0
+    step = 1 if target_fps is None else compute_step(fps_original, target_fps)
+    indices = list(range(0, len(files), step))
+    return ImageSequenceSource(path, files, indices, first.shape, float(fps_original), step,
+                               cache_mb, proxy_scale)
+
+
+def open_source(path: str, target_fps: float | None = None, fps_original: float | None = None,
+                cache_mb: float = FRAME_CACHE_MB, proxy_scale: float = 1.0) -> FrameSource | None:
+    """Abre secuencia (carpeta), imagen o video según la ruta."""
+    if Path(path).is_dir():
+        return open_sequence_source(path, target_fps, fps_original, cache_mb, proxy_scale)
+    if Path(path).suffix.lower() in IMAGE_EXTS:
+        return open_image_source(path, cache_mb, proxy_scale)
+    return open_video_source(path, target_fps, fps_original, cache_mb, proxy_scale)
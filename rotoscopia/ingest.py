@@ -0,0 +1,276 @@
+"""Lectura subsampleada de video que evita decodificar frames descartados.
+
+Con ``step > 1`` la mayoría de los frames del original se tiran. ``cap.read()``
+equivale a ``grab()`` + ``retrieve()``; el costo caro de conversión de color y
+copia está en ``retrieve()``, así que para los frames que se saltean basta con
+``grab()``. Si el salto es grande y el contenedor permite buscar con precisión,
+se usa ``CAP_PROP_POS_FRAMES`` (que decodifica desde el keyframe previo). Si no,
+para volver atrás se busca ``KEYFRAME_WINDOW`` frames antes, se ubica el frame
+en que cayó la captura por su timestamp y se avanza con ``grab()`` desde ahí, en
+lugar de reabrir y recorrer desde el frame 0.
+
+Para decodificar muchos frames de una vez (exportar, llenar la caché en disco)
+``decode_parallel`` reparte el rango en segmentos entre varios procesos: cada
+uno abre su propia captura, busca el inicio de su segmento y deja los frames en
+memoria compartida; el proceso principal los entrega en orden.
+
+Este módulo sólo depende de OpenCV/numpy para poder usarse fuera del hilo de la
+UI y en procesos hijos (no importa Qt).
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+# Saltos hacia adelante menores a esto se resuelven con grab(); a partir de aquí
+# conviene buscar (un seek decodifica desde el keyframe anterior, ~1 GOP).
+SEEK_MIN_GAP = 48
+# Sin seek preciso, volver atrás busca esta cantidad de frames antes del pedido
+# (más que un GOP típico) y avanza con grab(): el seek puede caer un poco corrido.
+KEYFRAME_WINDOW = 120
+# Frames por segmento enviado a cada proceso, y mínimo para que valga la pena
+# levantar el pool (arrancar un proceso cuesta importar cv2/numpy).
+SEGMENT_FRAMES = 24
+PARALLEL_MIN_FRAMES = 64
+
+_seek_reliability: dict[str, bool] = {}
+
+
+def seek_is_reliable(path: str, probe_idx: int | None = None) -> bool:
+    """Comprueba (y cachea por ruta) si buscar por número de frame es exacto.
+
+    Decodifica un frame de prueba secuencialmente y por seek y compara ambos.
+    En códecs de GOP largo o contenedores sin índice el seek suele caer en el
+    keyframe más cercano, y ahí conviene avanzar con ``grab()``.
+    """
+    cached = _seek_reliability.get(path)
+    if cached is not None:
+        return cached
+    reliable = False
+    cap = cv2.VideoCapture(path)
+    try:
+        if cap.isOpened():
+            total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+            if probe_idx is None:
+                probe_idx = min(total - 1, SEEK_MIN_GAP + 7) if total > 1 else 0
+            if probe_idx <= 0:
+                reliable = True
+            else:
+                for _ in range(probe_idx):
+                    if not cap.grab():
+                        break
+                ok_seq, seq = cap.read()
+                cap.set(cv2.CAP_PROP_POS_FRAMES, probe_idx)
+                ok_seek, sought = cap.read()
+                reliable = bool(ok_seq and ok_seek and seq.shape == sought.shape
+                                and cv2.norm(seq, sought, cv2.NORM_INF) == 0)
+    finally:
+        cap.release()
+    _seek_reliability[path] = reliable
+    return reliable
+
+
+class SubsampledReader:
+    """Lector de frames del original que se mueve con ``grab()`` o seek según el salto.
+
+    Mantiene la posición de la captura para que accesos secuenciales (navegar,
+    exportar) no tengan que volver a buscar.
+    """
+
+    def __init__(self, path: str, seek_min_gap: int = SEEK_MIN_GAP, reliable_seek: bool | None = None):
+        self.path = path
+        self.seek_min_gap = seek_min_gap
+        self._reliable_seek = reliable_seek
+        self._cap: cv2.VideoCapture | None = None
+        self._pos = 0  # próximo índice que devolvería grab()/read()
+
+    @property
+    def reliable_seek(self) -> bool:
+        if self._reliable_seek is None:
+            self._reliable_seek = seek_is_reliable(self.path)
+        return self._reliable_seek
+
+    def _open(self) -> bool:
+        self.release()
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            return False
+        self._cap = cap
+        self._pos = 0
+        return True
+
+    def read(self, src_idx: int):
+        """Devuelve el frame ``src_idx`` del original (BGR) o None."""
+        if self._cap is None and not self._open():
+            return None
+        gap = src_idx - self._pos
+        if gap < 0 or gap >= self.seek_min_gap:
+            if self.reliable_seek:
+                self._cap.set(cv2.CAP_PROP_POS_FRAMES, src_idx)
+                self._pos = src_idx
+            elif gap < 0 and not self._seek_before(src_idx):
+                return None
+        while self._pos < src_idx:
+            if not self._cap.grab():
+                self.release()
+                return None
+            self._pos += 1
+        ret, frame = self._cap.read()
+        if not ret:
+            self.release()
+            return None
+        self._pos += 1
+        return frame
+
+    def _seek_before(self, src_idx: int) -> bool:
+        """Seek impreciso: deja la captura en un frame conocido anterior a ``src_idx``.
+
+        Busca ``KEYFRAME_WINDOW`` frames antes y toma la posición real del
+        timestamp del frame en que cayó; si no se puede ubicar (sin fps, cae
+        después del pedido), vuelve al inicio y se avanza con ``grab()``.
+        """
+        anchor = src_idx - KEYFRAME_WINDOW
+        fps = self._cap.get(cv2.CAP_PROP_FPS) or 0.0
+        if anchor > 0 and fps > 0:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, anchor)
+            if self._cap.grab():
+                landed = round(self._cap.get(cv2.CAP_PROP_POS_MSEC) * fps / 1000.0)
+                if 0 <= landed < src_idx:
+                    self._pos = landed + 1
+                    return True
+        return self._open()
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        self._pos = 0
+
+
+def iter_subsampled(path: str, step: int = 1, start: int = 0, stop: int | None = None):
+    """Itera ``(src_idx, frame)`` conservando uno de cada ``step`` frames.
+
+    Sólo se llama a ``retrieve()`` para los frames que se conservan; los demás se
+    avanzan con ``grab()``.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return
+    try:
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        idx = start
+        while stop is None or idx < stop:
+            if not cap.grab():
+                break
+            if (idx - start) % step == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                yield idx, frame
+            idx += 1
+    finally:
+        cap.release()
+
+
+def default_workers() -> int:
+    """Procesos de decodificación por defecto: núcleos disponibles menos uno (UI), máx. 4."""
+    return max(1, min(4, (os.cpu_count() or 1) - 1))
+
+
+def _decode_segment(path: str, src_indices: list[int], shape: tuple, shm_name: str) -> int:
+    """Proceso hijo: decodifica ``src_indices`` en la memoria compartida ``shm_name``.
+
+    Devuelve cuántos frames (desde el principio del segmento) quedaron escritos.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    reader = SubsampledReader(path, reliable_seek=True)
+    done = 0
+    try:
+        out = np.ndarray((len(src_indices),) + tuple(shape), dtype=np.uint8, buffer=shm.buf)
+        for k, src_idx in enumerate(src_indices):
+            frame = reader.read(src_idx)
+            if frame is None or frame.shape != out.shape[1:]:
+                break
+            out[k] = frame
+            done += 1
+        del out
+    finally:
+        reader.release()
+        shm.close()
+    return done
+
+
+def _decode_sequential(path: str, src_indices: list[int]):
+    reader = SubsampledReader(path)
+    try:
+        for k, src_idx in enumerate(src_indices):
+            yield k, reader.read(src_idx)
+    finally:
+        reader.release()
+
+
+def decode_parallel(path: str, src_indices: list[int], shape: tuple, workers: int | None = None,
+                    segment_frames: int = SEGMENT_FRAMES):
+    """Itera ``(k, frame)`` para ``src_indices`` (en orden), decodificando por segmentos en paralelo.
+
+    ``shape`` es la forma de los frames del video (todos iguales). ``frame`` es
+    None si no se pudo decodificar. Cae a decodificación secuencial si hay pocos
+    frames, un solo worker, o el seek del contenedor no es exacto (códecs de GOP
+    largo): ahí cada segmento tendría que decodificar desde el principio.
+    """
+    src_indices = list(src_indices)
+    workers = default_workers() if workers is None else workers
+    if (workers <= 1 or len(src_indices) < PARALLEL_MIN_FRAMES
+            or not seek_is_reliable(path)):
+        yield from _decode_sequential(path, src_indices)
+        return
+
+    shape = tuple(shape)
+    frame_bytes = int(np.prod(shape))
+    segments = [src_indices[i:i + segment_frames] for i in range(0, len(src_indices), segment_frames)]
+    ctx = multiprocessing.get_context('spawn')  # fork + Qt/hilos no es seguro
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+    pending = []  # (inicio, segmento, shm, future) en orden de segmento
+    next_seg = 0
+    start = 0
+    try:
+        while next_seg < len(segments) or pending:
+            # Mantener a lo sumo 2 segmentos por worker en vuelo (acota la memoria)
+            while next_seg < len(segments) and len(pending) < workers * 2:
+                seg = segments[next_seg]
+                shm = shared_memory.SharedMemory(create=True, size=frame_bytes * len(seg))
+                pending.append((start, seg, shm,
+                                pool.submit(_decode_segment, path, seg, shape, shm.name)))
+                start += len(seg)
+                next_seg += 1
+            seg_start, seg, shm, future = pending.pop(0)
+            try:
+                done = future.result()
+            except Exception:
+                done = 0  # proceso caído: se decodifica este segmento aquí
+            try:
+                block = np.ndarray((len(seg),) + shape, dtype=np.uint8, buffer=shm.buf)
+                for k in range(done):
+                    yield seg_start + k, block[k].copy()
+                del block
+            finally:
+                shm.close()
+                shm.unlink()
+            if done < len(seg):
+                for k, frame in _decode_sequential(path, seg[done:]):
+                    yield seg_start + done + k, frame
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        for _start, _seg, shm, _future in pending:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,306 @@
+"""Capas de dibujo ralas en teselas compartidas (copia al escribir).
+
+Cada frame visitado recibía una capa transparente del tamaño del frame (8 MB a
+1080p) aunque nunca se dibujara en ella, y una capa típica es un puñado de
+trazos sobre una superficie casi vacía. ``Layer`` guarda el contenido en
+teselas de ``LAYER_GRID`` × ``LAYER_GRID`` (``tiles``, ``{(x, y): QImage}``
+con la esquina en coordenadas del frame) y sólo donde hay trazo:
+
+- Una capa nueva o borrada no tiene teselas.
+- Las herramientas dibujan con ``painter(rect)``, que crea las teselas que
+  faltan para cubrir ``rect`` y devuelve un ``QPainter`` en coordenadas del
+  frame; al terminar, las teselas que quedaron vacías se descartan.
+- Duplicar una capa (``copy``, Ctrl+D, duplicar capa) sólo copia el dict: las
+  teselas son ``QImage`` con copia implícita y se comparten hasta que se dibuja
+  sobre una, que es la única que se copia. Las teselas que un trazo no cambió
+  siguen compartidas.
+- Para leerla fuera del hilo de la UI, ``snapshot()`` da las teselas como
+  copias implícitas que no cambian aunque se siga dibujando.
+
+Así la memoria crece con la tinta y no con frames × resolución, y los frames
+sostenidos (holds) cuestan sólo las teselas que difieren. Al guardar, cada
+tesela se escribe una vez por contenido (``tile_digest``, ver ``project.py``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+
+import numpy as np
+from PySide6 import QtCore, QtGui
+
+from .render import draw_tiles
+from .settings import LAYER_GRID
+
+FORMAT = QtGui.QImage.Format_ARGB32_Premultiplied
+
+# Identificadores de contenido (``Layer.cache_key``): únicos en todo el proceso
+_next_key = itertools.count(1).__next__
+
+
+def _alpha(image: QtGui.QImage) -> np.ndarray:
+    """Canal alfa de ``image`` (en ``FORMAT``) como vista ``(alto, ancho)``."""
+    h, w = image.height(), image.width()
+    rows = np.frombuffer(image.constBits(), np.uint8, count=h * image.bytesPerLine()).reshape(h, -1)
+    return rows[:, 3:w * 4:4]  # BGRA en memoria (little endian)
+
+
+def is_blank(image: QtGui.QImage) -> bool:
+    """True si ``image`` es totalmente transparente."""
+    if image.format() != FORMAT:
+        image = image.convertToFormat(FORMAT)
+    return not _alpha(image).any()
+
+
+def split_tiles(image: QtGui.QImage, grid: int = LAYER_GRID) -> dict[tuple[int, int], QtGui.QImage]:
+    """Parte ``image`` (un frame completo) en teselas de ``grid``, omitiendo las vacías."""
+    if image.format() != FORMAT:
+        image = image.convertToFormat(FORMAT)
+    h, w = image.height(), image.width()
+    alpha = _alpha(image)
+    tiles = {}
+    for y in range(0, h, grid):
+        cols = np.flatnonzero(alpha[y:y + grid].any(axis=0))
+        for x in np.unique(cols // grid) * grid:
+            x = int(x)
+            tiles[(x, y)] = image.copy(x, y, min(grid, w - x), min(grid, h - y))
+    return tiles
+
+
+def tile_digest(image: QtGui.QImage) -> str:
+    """Hash del contenido de una tesela (nombre con el que se guarda en el proyecto)."""
+    if image.format() != FORMAT:
+        image = image.convertToFormat(FORMAT)
+    digest = hashlib.sha1(f'{image.width()}x{image.height()}'.encode())
+    digest.update(image.constBits()[:image.sizeInBytes()])
+    return digest.hexdigest()
+
+
+def _blank(size: QtCore.QSize) -> QtGui.QImage:
+    image = QtGui.QImage(size, FORMAT)
+    image.fill(QtCore.Qt.transparent)
+    return image
+
+
+class _TilesPainter(QtGui.QPainter):
+    """``QPainter`` sobre una imagen provisoria que cubre varias teselas.
+
+    ``end()`` reparte el resultado: las teselas sin cambios se conservan (siguen
+    compartidas), las que quedaron vacías se descartan.
+    """
+
+    def __init__(self, layer: 'Layer', keys: list[tuple[int, int]]):
+        self.layer = layer
+        self.keys = keys
+        region = QtCore.QRect()
+        for key in keys:
+            region = region.united(layer.tile_rect(key))
+        self.region = region
+        self.scratch = _blank(region.size())
+        p = QtGui.QPainter(self.scratch)
+        p.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
+        for key in keys:
+            tile = layer.tiles.get(key)
+            if tile is not None:
+                p.drawImage(QtCore.QPoint(*key) - region.topLeft(), tile)
+        p.end()
+        super().__init__(self.scratch)
+        self.translate(-region.topLeft())
+
+    def end(self) -> bool:
+        ok = super().end()
+        tiles = self.layer.tiles
+        for key in self.keys:
+            piece = self.scratch.copy(self.layer.tile_rect(key).translated(-self.region.topLeft()))
+            old = tiles.get(key)
+            if old is not None and piece == old:
+                continue
+            if is_blank(piece):
+                tiles.pop(key, None)
+            else:
+                tiles[key] = piece
+        return ok
+
+
+class Layer:
+    """Represents a single drawing layer with properties.
+
+    ``tiles`` (``{(x, y): QImage}`` ARGB32 premultiplicado) guarda sólo las
+    teselas con contenido; ``size()`` es el del frame.
+    """
+
+    def __init__(self, name: str = "Layer", width: int = 640, height: int = 480):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.tiles: dict[tuple[int, int], QtGui.QImage] = {}
+        self._key = 0
+        self.visible = True
+        self.opacity = 1.0  # 0.0 to 1.0
+
+    @classmethod
+    def from_image(cls, name: str, image: QtGui.QImage) -> 'Layer':
+        """Capa del tamaño de ``image`` (un frame completo), partida en teselas."""
+        layer = cls(name, image.width(), image.height())
+        layer.set_image(image)
+        return layer
+
+    @classmethod
+    def from_tiles(cls, name: str, size: QtCore.QSize, tiles: dict) -> 'Layer':
+        """Capa de ``size`` con ``tiles`` ya partidas (p. ej. leídas por ``loader``)."""
+        layer = cls(name, size.width(), size.height())
+        layer.restore(tiles)
+        return layer
+
+    # --- Geometría ---
+    def size(self) -> QtCore.QSize:
+        return QtCore.QSize(self.width, self.height)
+
+    def rect(self) -> QtCore.QRect:
+        return QtCore.QRect(0, 0, self.width, self.height)
+
+    def tile_rect(self, key: tuple[int, int]) -> QtCore.QRect:
+        """Zona del frame que cubre la tesela ``key`` (las del borde son más chicas)."""
+        x, y = key
+        return QtCore.QRect(x, y, min(LAYER_GRID, self.width - x), min(LAYER_GRID, self.height - y))
+
+    def tile_keys(self, rect: QtCore.QRect) -> list[tuple[int, int]]:
+        """Teselas (existan o no) que tocan ``rect``."""
+        area = rect.normalized().intersected(self.rect())
+        if area.isEmpty():
+            return []
+        g = LAYER_GRID
+        return [(x, y)
+                for y in range(area.top() // g * g, area.bottom() + 1, g)
+                for x in range(area.left() // g * g, area.right() + 1, g)]
+
+    def is_empty(self) -> bool:
+        return not self.tiles
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes de las teselas (las compartidas con otras capas cuentan en cada una)."""
+        return sum(tile.sizeInBytes() for tile in self.tiles.values())
+
+    def cache_key(self) -> int:
+        """Cambia con cualquier edición (único en el proceso); 0 = vacía."""
+        return self._key if self.tiles else 0
+
+    def _touch(self):
+        self._key = _next_key()
+
+    # --- Escritura ---
+    def painter(self, rect: QtCore.QRect, grow: bool = True) -> QtGui.QPainter | None:
+        """``QPainter`` en coordenadas del frame para dibujar dentro de ``rect``.
+
+        Con ``grow`` se crean las teselas que falten para cubrir ``rect``; sin
+        ``grow`` (borrar) sólo se tocan las que ya existen. Lo que se pinte fuera
+        de ``rect`` puede perderse. None si no hay dónde pintar; el que llama hace
+        ``end()``.
+        """
+        keys = self.tile_keys(rect)
+        if not grow:
+            keys = [key for key in keys if key in self.tiles]
+        if not keys:
+            return None
+        self._touch()
+        if len(keys) > 1:
+            return _TilesPainter(self, keys)
+        # Una sola tesela (un punto, un trazo corto): se pinta directo sobre ella
+        key = keys[0]
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.tiles[key] = _blank(self.tile_rect(key).size())
+        p = QtGui.QPainter(tile)
+        p.translate(-QtCore.QPoint(*key))
+        return p
+
+    def set_image(self, image: QtGui.QImage):
+        """Reemplaza el contenido por ``image`` (tamaño del frame), partida en teselas."""
+        self.tiles = split_tiles(image)
+        self._touch()
+
+    def clear(self):
+        self.tiles = {}
+        self._touch()
+
+    def trim(self):
+        """Descarta las teselas que quedaron vacías (p. ej. después de borrar)."""
+        for key in [key for key, tile in self.tiles.items() if is_blank(tile)]:
+            del self.tiles[key]
+
+    def resize(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        for key, tile in list(self.tiles.items()):
+            rect = self.tile_rect(key)
+            if rect.isEmpty():
+                del self.tiles[key]
+            elif rect.size() != tile.size():
+                resized = _blank(rect.size())
+                p = QtGui.QPainter(resized)
+                p.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
+                p.drawImage(0, 0, tile)
+                p.end()
+                self.tiles[key] = resized
+        self._touch()
+
+    # --- Lectura ---
+    def draw(self, painter: QtGui.QPainter, area: QtCore.QRect | None = None):
+        """Pinta el contenido en ``painter`` (coordenadas del frame), sólo dentro de ``area``."""
+        draw_tiles(painter, self.tiles, area)
+
+    def to_image(self) -> QtGui.QImage:
+        """La capa como imagen del tamaño del frame (nueva; p. ej. para exportar o rellenar)."""
+        out = _blank(self.size())
+        if self.tiles:
+            p = QtGui.QPainter(out)
+            p.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
+            draw_tiles(p, self.tiles)
+            p.end()
+        return out
+
+    def snapshot(self) -> dict[tuple[int, int], QtGui.QImage]:
+        """Teselas actuales, seguras de usar desde otro hilo (copia implícita por tesela)."""
+        return {key: QtGui.QImage(tile) for key, tile in self.tiles.items()}
+
+    def restore(self, state: dict[tuple[int, int], QtGui.QImage]):
+        """Vuelve a un ``snapshot()`` (deshacer/rehacer)."""
+        self.tiles = {key: QtGui.QImage(tile) for key, tile in state.items()}
+        self._touch()
+
+    def restore_rect(self, state: dict[tuple[int, int], QtGui.QImage], rect: QtCore.QRect):
+        """Devuelve sólo ``rect`` al contenido de ``state`` (borra una previsualización)."""
+        if rect is None or rect.isEmpty():
+            return
+        for key in self.tile_keys(rect):
+            tile_rect = self.tile_rect(key)
+            old = state.get(key)
+            if rect.contains(tile_rect) or (old is None and key not in self.tiles):
+                # Tesela entera: vuelve a ser la del estado (compartida)
+                if old is None:
+                    self.tiles.pop(key, None)
+                else:
+                    self.tiles[key] = QtGui.QImage(old)
+                continue
+            tile = self.tiles.get(key)
+            if tile is None:
+                tile = self.tiles[key] = _blank(tile_rect.size())
+            part = rect.intersected(tile_rect).translated(-tile_rect.topLeft())
+            p = QtGui.QPainter(tile)
+            p.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
+            p.fillRect(part, QtCore.Qt.transparent)
+            if old is not None:
+                p.drawImage(part.topLeft(), old, part)
+            p.end()
+        self._touch()
+
+    def copy(self) -> 'Layer':
+        """Copy of this layer that shares its tiles until either one is drawn on."""
+        new_layer = Layer(self.name + " Copy", self.width, self.height)
+        new_layer.tiles = self.snapshot()
+        new_layer._key = self._key
+        new_layer.visible = self.visible
+        new_layer.opacity = self.opacity
+        return new_layer
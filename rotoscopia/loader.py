@@ -0,0 +1,183 @@
+"""Carga progresiva de las capas de un proyecto en segundo plano.
+
+``load_project_dialog`` leía todos los PNG de capas listados en
+``frames_with_layers`` antes de mostrar nada. Ahora el video sólo se indexa (ver
+``frames.py``) y las capas se leen en un ``ProjectLoadWorker``:
+
+- El frame 0 sale primero y el resto llega en orden, frame a frame.
+- Navegar a un frame que todavía no llegó sube su prioridad (y la de sus
+  vecinos, para el onion) en la cola del worker.
+- El worker sólo produce ``QImage`` (seguro fuera del hilo de la UI); los
+  ``Layer`` se arman en el hilo de la UI al recibir la señal.
+- Las teselas que comparten varios frames (``tiles/``, ver ``layers.py``) se
+  leen una sola vez y vuelven a quedar compartidas en memoria.
+- Los overlays del sistema anterior a capas (``frames/frame_XXXXX.png``) se
+  leen como una capa más (``read_legacy_overlay``): la ventana sólo conoce
+  capas. Al guardar ese frame se escriben sus teselas y el PNG se borra.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import threading
+from pathlib import Path
+
+from PySide6 import QtCore, QtGui
+
+from .layers import FORMAT, split_tiles
+from .render import compose_images
+
+TILES_DIR_NAME = 'tiles'  # teselas del proyecto, una por contenido: tiles/<tile_digest>.png
+
+
+def read_tile(project_path: Path, name: str, cache: dict | None = None) -> QtGui.QImage | None:
+    """Lee ``tiles/<name>.png``; con ``cache`` cada tesela se lee una vez y se comparte."""
+    if cache is not None and name in cache:
+        return cache[name]
+    image = QtGui.QImage(str(Path(project_path) / TILES_DIR_NAME / f'{name}.png'))
+    if image.isNull():
+        return None
+    image = image.convertToFormat(FORMAT)
+    if cache is not None:
+        cache[name] = image
+    return image
+
+
+def read_frame_layers(project_path: Path, frame_idx: int, work_size: QtCore.QSize | None = None,
+                      tile_cache: dict | None = None) -> list[dict]:
+    """Lee ``frames/frame_XXXXX/layers.json`` y sus teselas como ``QImage``.
+
+    Devuelve una lista de dicts (``name``, ``visible``, ``opacity``, ``size``,
+    ``tiles``); sin ``layers.json`` se migra el overlay antiguo del frame, si lo
+    hay, y si tampoco existe la lista sale vacía. Cada capa lista sus
+    teselas como ``[x, y, nombre]`` (ver ``read_tile``); las guardadas antes de
+    las teselas (``file``: un PNG del tamaño del frame) se parten acá, así el
+    trabajo no se paga en el hilo de la UI. Las capas guardadas con otra
+    resolución de trabajo (proxy) se adaptan a ``work_size``.
+    """
+    frame_dir = Path(project_path) / 'frames' / f'frame_{frame_idx:05d}'
+    meta_path = frame_dir / 'layers.json'
+    if not meta_path.exists():
+        qimg = read_legacy_overlay(project_path, frame_idx)
+        return [] if qimg is None else [_layer_data('Layer 1', True, 1.0, qimg, work_size)]
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            layer_metadata = json.load(f)
+    except Exception:
+        return []
+    out = []
+    for layer_info in layer_metadata:
+        name = layer_info['name']
+        visible = layer_info.get('visible', True)
+        opacity = layer_info.get('opacity', 1.0)
+        if 'tiles' in layer_info:
+            size = QtCore.QSize(*layer_info['size'])
+            tiles = {}
+            for x, y, tile_name in layer_info['tiles']:
+                tile = read_tile(project_path, tile_name, tile_cache)
+                if tile is not None:
+                    tiles[(x, y)] = tile
+            if work_size is None or size == work_size:
+                out.append({'name': name, 'visible': visible, 'opacity': opacity, 'size': size, 'tiles': tiles})
+                continue
+            qimg = compose_images([(tiles, 1.0)], size)
+        else:
+            layer_path = frame_dir / layer_info['file']
+            if not layer_path.exists():
+                continue
+            qimg = QtGui.QImage(str(layer_path))
+            if qimg.isNull():
+                continue
+        out.append(_layer_data(name, visible, opacity, qimg, work_size))
+    return out
+
+
+def _layer_data(name: str, visible: bool, opacity: float, qimg: QtGui.QImage,
+                work_size: QtCore.QSize | None) -> dict:
+    """Capa desde una imagen del tamaño del frame, adaptada a ``work_size`` y partida en teselas."""
+    if work_size is not None and qimg.size() != work_size:
+        qimg = qimg.scaled(work_size, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+    return {'name': name, 'visible': visible, 'opacity': opacity, 'size': qimg.size(),
+            'tiles': split_tiles(qimg)}
+
+
+def legacy_overlay_path(project_path: Path, frame_idx: int) -> Path:
+    """PNG del overlay de un frame en proyectos anteriores a las capas."""
+    return Path(project_path) / 'frames' / f'frame_{frame_idx:05d}.png'
+
+
+def read_legacy_overlay(project_path: Path, frame_idx: int) -> QtGui.QImage | None:
+    """Overlay del sistema anterior a capas (``frames/frame_XXXXX.png``)."""
+    frame_file = legacy_overlay_path(project_path, frame_idx)
+    if not frame_file.exists():
+        return None
+    qimg = QtGui.QImage(str(frame_file))
+    return None if qimg.isNull() else qimg
+
+
+class ProjectLoadSignals(QtCore.QObject):
+    frame_loaded = QtCore.Signal(int, int, object)  # generación, frame, capas (``read_frame_layers``)
+    progress = QtCore.Signal(int, int, int)         # generación, hechos, total
+    finished = QtCore.Signal(int)                   # generación
+
+
+class ProjectLoadWorker(QtCore.QRunnable):
+    """Lee las capas (u overlays antiguos) de un proyecto según una cola de prioridad.
+
+    ``frames``: índices a cargar. Sin cambios de prioridad salen en orden
+    ascendente; ``prioritize`` adelanta frames.
+    """
+
+    def __init__(self, project_path: Path, frames, work_size, generation: int,
+                 tile_cache: dict | None = None):
+        super().__init__()
+        self.project_path = Path(project_path)
+        self.work_size = work_size
+        self.generation = generation
+        # Teselas compartidas entre frames (holds): se leen y quedan en memoria una vez
+        self.tile_cache = tile_cache if tile_cache is not None else {}
+        self.signals = ProjectLoadSignals()
+        self._remaining = set(frames)
+        self.total = len(self._remaining)
+        self._heap = [(1, idx, idx) for idx in self._remaining]  # (clase, orden, frame)
+        heapq.heapify(self._heap)
+        self._bump = 0
+        self._lock = threading.Lock()
+        self._cancelled = False
+
+    def prioritize(self, indices):
+        """Adelanta ``indices`` en la cola; el último de la lista sale primero."""
+        with self._lock:
+            for idx in indices:
+                if idx in self._remaining:
+                    self._bump -= 1
+                    heapq.heappush(self._heap, (0, self._bump, idx))
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _next(self) -> int | None:
+        with self._lock:
+            while self._heap:
+                _cls, _order, idx = heapq.heappop(self._heap)
+                if idx in self._remaining:
+                    self._remaining.discard(idx)
+                    return idx
+        return None
+
+    @QtCore.Slot()
+    def run(self):
+        done = 0
+        while not self._cancelled:
+            idx = self._next()
+            if idx is None:
+                break
+            layers = read_frame_layers(self.project_path, idx, self.work_size, self.tile_cache)
+            if self._cancelled:
+                break
+            done += 1
+            self.signals.frame_loaded.emit(self.generation, idx, layers)
+            self.signals.progress.emit(self.generation, done, self.total)
+        if not self._cancelled:
+            self.signals.finished.emit(self.generation)
@@ -9,6 +9,7 @@ También soporta ejecución directa del archivo:
 
 import sys
 import os
+import multiprocessing
 from PySide6 import QtWidgets
 
 # Agregar el directorio padre al path para imports cuando se ejecuta directamente
@@ -26,6 +27,7 @@ except ImportError:
 
 
 def main():
+    multiprocessing.freeze_support()  # procesos de decodificación en el ejecutable de PyInstaller
     app = QtWidgets.QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,440 @@
+"""Presupuesto de memoria del dibujo: los frames fríos bajan a disco y vuelven al navegar.
+
+``frame_layers``, ``undo_stacks`` y ``redo_stacks`` crecían sin límite al
+recorrer una toma larga (en proyectos de miles de frames se llegaba a
+quedarse sin memoria). ``FrameMemory`` es dueño de los tres: cada uno es un
+``FrameDict`` (se usa como un ``dict`` por frame) y el manager lleva la cuenta
+de los bytes de cada frame y del total.
+
+- Las teselas (``layers.Layer``) compartidas entre frames o con el deshacer
+  cuentan una sola vez (por ``QImage.cacheKey()``).
+- Al pasarse de ``DRAWING_MEMORY_MB``, los frames visitados hace más tiempo
+  (nunca el actual) se bajan enteros —capas, deshacer y rehacer— a
+  una carpeta temporal, sin pérdida. Las teselas se escriben una vez por
+  contenido (``tile_digest``), así que los holds ocupan poco también en disco.
+- Acceder a un frame bajado lo vuelve a traer (``FrameDict.__getitem__``); las
+  teselas que sigan en memoria en otro frame se vuelven a compartir.
+- Para componer en otro hilo (reproducción, prefetch, export) no hace falta
+  traerlo: ``drawing(idx)`` da un ``SpilledDrawing`` que lee sus teselas al
+  recorrerlo, y ``version(idx)`` la versión que tenía al bajar.
+- Cada archivo de la carpeta temporal cuenta cuántos frames bajados y
+  ``SpilledDrawing`` vivos lo usan; al llegar a cero se borra, así la carpeta
+  ocupa lo que está bajado ahora y no todo lo que se bajó en la sesión.
+"""
+
+from __future__ import annotations
+
+import shutil
+import struct
+import tempfile
+import threading
+import weakref
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+
+from PySide6 import QtGui
+
+from .layers import FORMAT, tile_digest
+from .settings import DRAWING_MEMORY_MB, SCRATCH_DIR
+
+KINDS = ('layers', 'undo', 'redo')
+
+
+def write_image(path: Path, image: QtGui.QImage):
+    """Guarda ``image`` sin pérdida (ancho, alto y píxeles en ``FORMAT`` con zlib)."""
+    if image.format() != FORMAT:
+        image = image.convertToFormat(FORMAT)
+    data = struct.pack('<II', image.width(), image.height())
+    data += zlib.compress(image.constBits()[:image.sizeInBytes()], 1)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_bytes(data)
+    tmp.replace(path)  # quien lea desde otro hilo nunca ve un archivo a medias
+
+
+def read_image(path: Path) -> QtGui.QImage | None:
+    """Lee una imagen de ``write_image``; None si ya no está."""
+    try:
+        data = path.read_bytes()
+        w, h = struct.unpack_from('<II', data)
+        pixels = zlib.decompress(data[8:])
+    except (OSError, struct.error, zlib.error):
+        return None
+    return QtGui.QImage(pixels, w, h, w * 4, FORMAT).copy()
+
+
+class SpilledDrawing:
+    """Dibujo de un frame que está en disco, como ``MainWindow.frame_drawing``.
+
+    Recorrerlo da ``(teselas, opacidad)`` leyendo las teselas en ese momento; se
+    puede hacer desde cualquier hilo (los archivos no cambian mientras existen).
+    """
+
+    def __init__(self, scratch: Path, parts: list[tuple[dict, float]]):
+        self.scratch = scratch
+        self.parts = parts  # [({(x, y): digest}, opacidad), ...]
+
+    def __len__(self) -> int:
+        return len(self.parts)
+
+    def __iter__(self):
+        read = {}
+        for refs, opacity in self.parts:
+            tiles = {}
+            for key, digest in refs.items():
+                if digest not in read:
+                    read[digest] = read_image(self.scratch / digest)
+                if read[digest] is not None:
+                    tiles[key] = read[digest]
+            yield tiles, opacity
+
+
+class _SpilledFrame:
+    """Lo que queda en memoria de un frame bajado a disco: metadatos y nombres de teselas."""
+
+    __slots__ = ('layers', 'undo', 'redo', 'version')
+
+    def __init__(self):
+        self.layers = None   # [(Layer sin teselas, {(x, y): digest}), ...]
+        self.undo = None     # [{(x, y): digest}, ...]
+        self.redo = None
+        self.version = None  # ``MainWindow.frame_version`` al bajar
+
+    def has(self, kind: str) -> bool:
+        return getattr(self, kind) is not None
+
+
+def _frame_digests(frame: _SpilledFrame, kinds):
+    """Archivos que usa ``frame`` para ``kinds`` (uno por cada lugar donde aparece)."""
+    if 'layers' in kinds:
+        for _layer, refs in frame.layers or ():
+            yield from refs.values()
+    for kind in ('undo', 'redo'):
+        if kind in kinds:
+            for refs in getattr(frame, kind) or ():
+                yield from refs.values()
+
+
+class FrameDict(MutableMapping):
+    """Uno de los dicts por frame de ``FrameMemory``: trae de disco lo que se pida."""
+
+    def __init__(self, memory: 'FrameMemory', kind: str):
+        self.memory = memory
+        self.kind = kind
+        self.data: dict = {}  # sólo lo que está en memoria
+
+    def __getitem__(self, idx):
+        if idx not in self.data:
+            self.memory.fault_in(idx)
+        return self.data[idx]
+
+    def __setitem__(self, idx, value):
+        self.memory.fault_in(idx)
+        self.data[idx] = value
+        self.memory.note(idx)
+        self.memory.enforce(keep=idx)
+
+    def __delitem__(self, idx):
+        self.memory.fault_in(idx)
+        del self.data[idx]
+        self.memory.note(idx)
+
+    def __contains__(self, idx) -> bool:
+        return idx in self.data or self.memory.is_spilled(idx, self.kind)
+
+    def __iter__(self):
+        return iter(sorted(set(self.data) | self.memory.spilled_keys(self.kind)))
+
+    def __len__(self) -> int:
+        return len(set(self.data) | self.memory.spilled_keys(self.kind))
+
+    def clear(self):
+        self.data.clear()
+        self.memory.forget(self.kind)
+
+
+class FrameMemory:
+    """Lleva la cuenta de la memoria del dibujo por frame y baja a disco los frames fríos."""
+
+    def __init__(self, window, budget_mb: float = DRAWING_MEMORY_MB, scratch_dir=SCRATCH_DIR):
+        self.window = window
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.scratch_parent = scratch_dir
+        self._scratch: Path | None = None
+        self.stores = {kind: FrameDict(self, kind) for kind in KINDS}
+        self.frame_layers = self.stores['layers']
+        self.undo_stacks = self.stores['undo']
+        self.redo_stacks = self.stores['redo']
+        self.spilled: dict[int, _SpilledFrame] = {}
+        self._lru: OrderedDict[int, None] = OrderedDict()   # frames en memoria, del más frío al más reciente
+        self._stale: set[int] = set()                       # frames a volver a medir
+        self._visited: int | None = None                    # último frame visitado (se dibuja sobre él)
+        self._frame_keys: dict[int, dict[int, int]] = {}    # frame -> {cacheKey: bytes}
+        self._refs: dict[int, int] = {}                     # cacheKey -> frames que lo usan
+        self.total = 0
+        self._digests: dict[int, str] = {}                  # cacheKey -> tile_digest (ya escrito en disco)
+        self._by_digest: dict[str, int] = {}
+        self._alive: dict[int, weakref.ref] = {}            # cacheKey -> alguna tesela viva con ese contenido
+        self._disk_refs: dict[str, int] = {}                # digest -> usos del archivo (frames bajados, dibujos)
+        self._disk_lock = threading.Lock()                  # los dibujos se sueltan desde otros hilos
+        self._prune_at = 4096
+        self.spills = 0
+        self.faults = 0
+
+    # --- Consultas sin traer de disco ---
+    def is_spilled(self, idx: int, kind: str | None = None) -> bool:
+        frame = self.spilled.get(idx)
+        return frame is not None and (kind is None or frame.has(kind))
+
+    def spilled_keys(self, kind: str) -> set[int]:
+        return {idx for idx, frame in self.spilled.items() if frame.has(kind)}
+
+    def layer_count(self, idx: int) -> int:
+        frame = self.spilled.get(idx)
+        if frame is not None:
+            return len(frame.layers or ())
+        return len(self.frame_layers.data.get(idx) or ())
+
+    def version(self, idx: int):
+        """Versión del dibujo de un frame bajado (``MainWindow.frame_version``)."""
+        return self.spilled[idx].version
+
+    def drawing(self, idx: int) -> SpilledDrawing | None:
+        """Dibujo de un frame bajado para componer en otro hilo (como ``frame_drawing``)."""
+        frame = self.spilled[idx]
+        if frame.layers is None:
+            return None
+        parts = [(refs, layer.opacity) for layer, refs in frame.layers if layer.visible and refs]
+        digests = [digest for refs, _opacity in parts for digest in refs.values()]
+        self._hold(digests)  # sus archivos siguen aunque el frame vuelva a memoria
+        drawing = SpilledDrawing(self._scratch, parts)
+        weakref.finalize(drawing, self._release, digests)
+        return drawing
+
+    def spilled_layers(self, idx: int) -> list[tuple]:
+        """Capas de un frame bajado (sin teselas) con ``{(x, y): digest}`` de cada una."""
+        return list(self.spilled[idx].layers or ())
+
+    def read_spilled(self, digest: str) -> QtGui.QImage | None:
+        """Tesela ``digest`` de la carpeta temporal (``tile_digest`` de su contenido)."""
+        return read_image(self.scratch / digest)
+
+    # --- Navegación ---
+    def visit(self, idx: int):
+        """El frame ``idx`` pasa a ser el más reciente; baja los más fríos si hace falta."""
+        if self._visited is not None:
+            self._stale.add(self._visited)  # lo que se dibujó en el frame que se deja
+        self._visited = idx
+        if idx in self._lru:
+            self._lru.move_to_end(idx)
+        self.enforce()
+
+    def note(self, idx: int):
+        """El contenido de ``idx`` cambió (se vuelve a medir en el próximo ``enforce``)."""
+        self._stale.add(idx)
+        self._lru[idx] = None
+        self._lru.move_to_end(idx)
+
+    def enforce(self, keep: int | None = None):
+        """Baja frames fríos a disco hasta entrar en el presupuesto (nunca el actual ni ``keep``)."""
+        current = self.window.current_frame_idx
+        for idx in self._stale | {current}:
+            self._measure(idx)
+        self._stale.clear()
+        if self.total <= self.budget:
+            return
+        for idx in list(self._lru):
+            if self.total <= self.budget:
+                break
+            if idx != current and idx != keep:
+                self.spill(idx)
+        if max(len(self._alive), len(self._digests)) > self._prune_at:
+            self._prune()
+
+    # --- Cuenta de bytes ---
+    def _frame_tiles(self, idx: int):
+        for layer in self.frame_layers.data.get(idx) or ():
+            yield from layer.tiles.values()
+        for kind in ('undo', 'redo'):
+            for state in self.stores[kind].data.get(idx) or ():
+                yield from state.values()
+
+    def _measure(self, idx: int):
+        keys = {}
+        for tile in self._frame_tiles(idx):
+            key = tile.cacheKey()
+            if key not in keys:
+                keys[key] = tile.sizeInBytes()
+                self._alive[key] = weakref.ref(tile)
+        self._set_keys(idx, keys)
+        if not keys and not any(idx in store.data for store in self.stores.values()):
+            self._lru.pop(idx, None)
+
+    def _set_keys(self, idx: int, keys: dict[int, int]):
+        old = self._frame_keys.pop(idx, {})
+        for key, size in old.items():
+            self._refs[key] -= 1
+            if not self._refs[key]:
+                del self._refs[key]
+                self.total -= size
+        for key, size in keys.items():
+            if key not in self._refs:
+                self._refs[key] = 0
+                self.total += size
+            self._refs[key] += 1
+        if keys:
+            self._frame_keys[idx] = keys
+
+    def _prune(self):
+        """Olvida teselas que ya no existen (sus cacheKey no vuelven)."""
+        for key in [key for key, ref in self._alive.items() if ref() is None]:
+            del self._alive[key]
+        for key in [key for key in self._digests if key not in self._alive]:
+            digest = self._digests.pop(key)
+            if self._by_digest.get(digest) == key:
+                del self._by_digest[digest]
+        self._prune_at = max(4096, 2 * max(len(self._alive), len(self._digests)))
+
+    # --- Disco ---
+    @property
+    def scratch(self) -> Path:
+        if self._scratch is None:
+            self._scratch = Path(tempfile.mkdtemp(prefix='rotoscopia-', dir=self.scratch_parent))
+            weakref.finalize(self, shutil.rmtree, self._scratch, True)
+        return self._scratch
+
+    def _save_image(self, image: QtGui.QImage) -> str:
+        """Escribe ``image`` (una vez por contenido) y cuenta un uso más de su archivo."""
+        key = image.cacheKey()
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = self._digests[key] = tile_digest(image)
+            self._by_digest[digest] = key
+        path = self.scratch / digest
+        with self._disk_lock:
+            self._disk_refs[digest] = self._disk_refs.get(digest, 0) + 1
+            if not path.exists():
+                write_image(path, image)
+        return digest
+
+    def _hold(self, digests):
+        with self._disk_lock:
+            for digest in digests:
+                self._disk_refs[digest] += 1
+
+    def _release(self, digests):
+        """Suelta un uso de cada archivo; el que queda sin usos se borra."""
+        with self._disk_lock:
+            for digest in digests:
+                n = self._disk_refs[digest] - 1
+                if n:
+                    self._disk_refs[digest] = n
+                    continue
+                del self._disk_refs[digest]
+                if self._scratch is not None:
+                    (self._scratch / digest).unlink(missing_ok=True)
+                key = self._by_digest.pop(digest, None)
+                if key is not None:
+                    self._digests.pop(key, None)
+
+    def _load_image(self, digest: str, read: dict) -> QtGui.QImage | None:
+        """Imagen ``digest``: compartida con una tesela viva igual o leída de disco."""
+        source = read.get(digest)
+        if source is None:
+            key = self._by_digest.get(digest)
+            ref = self._alive.get(key) if key is not None else None
+            source = ref() if ref is not None else None
+            if source is None or source.cacheKey() != key:
+                source = read_image(self.scratch / digest)
+                if source is None:
+                    return None
+                key = source.cacheKey()
+                self._digests[key] = digest
+                self._by_digest[digest] = key
+                self._alive[key] = weakref.ref(source)
+                read[digest] = source
+                return source
+            read[digest] = source
+        return QtGui.QImage(source)  # cada lugar con su propio objeto (pintar no afecta a los demás)
+
+    def _save_tiles(self, tiles: dict) -> dict:
+        return {key: self._save_image(tile) for key, tile in tiles.items()}
+
+    def _load_tiles(self, refs: dict, read: dict) -> dict:
+        tiles = {}
+        for key, digest in refs.items():
+            tile = self._load_image(digest, read)
+            if tile is not None:
+                tiles[key] = tile
+        return tiles
+
+    def spill(self, idx: int):
+        """Baja a disco todo el dibujo de ``idx`` (capas, deshacer y rehacer)."""
+        frame = _SpilledFrame()
+        frame.version = self.window.frame_version(idx)
+        layers = self.frame_layers.data.pop(idx, None)
+        if layers is not None:
+            frame.layers = []
+            for layer in layers:
+                frame.layers.append((layer, self._save_tiles(layer.tiles)))
+                layer.tiles = {}
+        for kind in ('undo', 'redo'):
+            states = self.stores[kind].data.pop(idx, None)
+            if states is not None:
+                setattr(frame, kind, [self._save_tiles(state) for state in states])
+        self._set_keys(idx, {})
+        self._lru.pop(idx, None)
+        self._stale.discard(idx)
+        self.spilled[idx] = frame
+        self.spills += 1
+
+    def fault_in(self, idx: int):
+        """Trae de disco el dibujo de ``idx`` si estaba bajado (no hace nada si no)."""
+        frame = self.spilled.pop(idx, None)
+        if frame is None:
+            return
+        read = {}
+        if frame.layers is not None:
+            for layer, refs in frame.layers:
+                layer.tiles = self._load_tiles(refs, read)  # conserva cache_key: el contenido es el mismo
+            self.frame_layers.data[idx] = [layer for layer, _refs in frame.layers]
+        for kind in ('undo', 'redo'):
+            states = getattr(frame, kind)
+            if states is not None:
+                self.stores[kind].data[idx] = [self._load_tiles(refs, read) for refs in states]
+        self._release(list(_frame_digests(frame, KINDS)))
+        self.faults += 1
+        self.note(idx)
+        self.enforce(keep=idx)
+
+    def forget(self, kind: str):
+        """Descarta lo bajado de ``kind``; sin nada en memoria ni en disco, vuelve a cero."""
+        for idx, frame in list(self.spilled.items()):
+            self._release(list(_frame_digests(frame, (kind,))))
+            setattr(frame, kind, None)
+            if not any(frame.has(k) for k in KINDS):
+                del self.spilled[idx]
+        self._stale.update(self._lru)
+        if not self.spilled and not any(store.data for store in self.stores.values()):
+            self._reset()
+
+    def _reset(self):
+        self._lru.clear()
+        self._stale.clear()
+        self._visited = None
+        self._frame_keys.clear()
+        self._refs.clear()
+        self.total = 0
+        self._alive.clear()
+        if self._disk_refs:
+            return  # dibujos bajados todavía en uso (p. ej. una exportación en curso)
+        self._digests.clear()
+        self._by_digest.clear()
+        if self._scratch is not None:
+            shutil.rmtree(self._scratch, ignore_errors=True)
+            self._scratch = None
+
+    def summary(self) -> str:
+        return (f'dibujo {self.total / 2**20:.0f}/{self.budget / 2**20:.0f} MB, '
+                f'{len(self.spilled)} frames en disco')
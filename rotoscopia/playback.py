@@ -0,0 +1,271 @@
+"""Reproducción en tiempo real de la animación (fondo + capas).
+
+Para ver el movimiento había que recorrer los frames a mano o exportar la
+animación completa. ``AnimationPlayer`` reproduce a ``fps_target`` desde un
+buffer circular de frames ya compuestos:
+
+- Un ``PlaybackWorker`` (hilo de su propio pool) decodifica el fondo, lo mezcla
+  con las capas del frame en un ``QImage`` y lo deja en el ``PlaybackRing``.
+- Las capas las toma el reproductor en el hilo de la UI, unos frames por delante
+  del reloj, como ``MainWindow.frame_drawing`` (copias implícitas, O(1)): el
+  worker las lee sin carreras aunque se siga dibujando.
+- El reloj manda: en cada tick se muestra el frame que corresponde al tiempo
+  transcurrido. Si el worker va atrasado se saltean frames (se cuentan como
+  perdidos) en lugar de frenar la reproducción, y el worker no decodifica los
+  que ya quedaron atrás.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+from PySide6 import QtCore, QtGui
+
+from .render import draw_tiles
+from .settings import PLAYBACK_BUFFER_FRAMES
+from .utils import cvimg_to_qimage
+
+
+class PlaybackRing:
+    """Buffer circular acotado de ``(n, frame, QImage)`` compartido entre hilos.
+
+    ``n`` es el número de frame de la reproducción (0, 1, 2... aunque dé la
+    vuelta al clip); ``put`` espera mientras el buffer está lleno.
+    """
+
+    def __init__(self, capacity: int = PLAYBACK_BUFFER_FRAMES):
+        self.capacity = max(1, int(capacity))
+        self._items: deque = deque()
+        self._cond = threading.Condition()
+        self.closed = False
+
+    def put(self, n: int, idx: int, image: QtGui.QImage) -> bool:
+        with self._cond:
+            while len(self._items) >= self.capacity and not self.closed:
+                self._cond.wait(0.05)
+            if self.closed:
+                return False
+            self._items.append((n, idx, image))
+            return True
+
+    def take(self, n: int):
+        """Entrega el frame ``n`` si ya está; descarta los anteriores (llegaron tarde)."""
+        with self._cond:
+            while self._items and self._items[0][0] < n:
+                self._items.popleft()
+            item = None
+            if self._items and self._items[0][0] == n:
+                item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._items.clear()
+            self._cond.notify_all()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class PlaybackWorker(QtCore.QRunnable):
+    """Compone fondo + dibujo de cada frame en orden y lo deja en el ring."""
+
+    def __init__(self, player: 'AnimationPlayer', frames, start: int, bg_opacity: float):
+        super().__init__()
+        self.player = player
+        self.frames = frames
+        self.start = start
+        self.bg_opacity = bg_opacity
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    @QtCore.Slot()
+    def run(self):
+        n = 0
+        total = len(self.frames)
+        ring = self.player.ring
+        while not self._cancelled:
+            # Frames que el reloj ya dejó atrás no se decodifican
+            n = max(n, self.player.clock_frame)
+            idx = (self.start + n) % total
+            drawing = self.player.drawing_for(idx, lambda: self._cancelled)
+            if self._cancelled:
+                break
+            try:
+                frame = self.frames[idx]
+            except Exception:
+                break
+            bg = cvimg_to_qimage(frame, rgb=getattr(self.frames, 'rgb', False))
+            if bg is None:
+                break
+            out = QtGui.QImage(bg.size(), QtGui.QImage.Format_RGB32)
+            out.fill(QtCore.Qt.white)
+            p = QtGui.QPainter(out)
+            if self.bg_opacity > 0:
+                p.setOpacity(self.bg_opacity)
+                p.drawImage(0, 0, bg)
+                p.setOpacity(1.0)
+            for tiles, opacity in drawing or ():
+                p.setOpacity(opacity)
+                draw_tiles(p, tiles)
+            p.end()
+            if not ring.put(n, idx, out):
+                break
+            n += 1
+
+
+class AnimationPlayer(QtCore.QObject):
+    """Play/pausa de la animación en el canvas, con fps logrados y frames perdidos."""
+
+    playing_changed = QtCore.Signal(bool)
+
+    def __init__(self, window, buffer_frames: int = PLAYBACK_BUFFER_FRAMES):
+        super().__init__(window)
+        self.window = window
+        self.buffer_frames = max(1, int(buffer_frames))
+        self.ring: PlaybackRing | None = None
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._worker: PlaybackWorker | None = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        self._clock = QtCore.QElapsedTimer()
+        self.fps = 12.0
+        self.start_idx = 0
+        self.clock_frame = 0   # frame de la reproducción que corresponde al reloj (lo lee el worker)
+        self.shown = 0
+        self.dropped = 0
+        self.last_idx: int | None = None
+        self._next_feed = 0
+        # Capas de cada frame (``frame_drawing``; None = frame sin dibujo)
+        self._drawings: OrderedDict[int, list | None] = OrderedDict()
+        self._drawings_lock = threading.Condition()
+        self._rate_window: deque = deque()
+        self._last_status = 0.0
+
+    @property
+    def playing(self) -> bool:
+        return self._timer.isActive()
+
+    def playback_fps(self) -> float:
+        w = self.window
+        fps = getattr(w, 'fps_target', None) or getattr(w, 'fps_original', None) or 12.0
+        return max(1.0, float(fps))
+
+    def toggle(self):
+        if self.playing:
+            self.stop()
+        else:
+            self.play()
+
+    def play(self):
+        w = self.window
+        if self.playing or not w.frames:
+            return
+        w.maybe_autosave_current(); w.store_current_frame()
+        self.fps = self.playback_fps()
+        self.start_idx = w.current_frame_idx
+        self.clock_frame = 0
+        self.shown = 0
+        self.dropped = 0
+        self.last_idx = None
+        self._rate_window.clear()
+        with self._drawings_lock:
+            self._drawings.clear()
+        self._next_feed = 0
+        self._feed_drawings()
+        bg_opacity = w.opacity_slider.value() / 100.0 if w.show_background else 0.0
+        self.ring = PlaybackRing(self.buffer_frames)
+        self._worker = PlaybackWorker(self, w.frames, self.start_idx, bg_opacity)
+        self.pool.start(self._worker)
+        self._clock.start()
+        self._timer.start(max(5, int(500 / self.fps)))  # dos muestras por frame
+        self.playing_changed.emit(True)
+
+    def stop(self):
+        if not self.playing and self._worker is None:
+            return
+        self._timer.stop()
+        if self._worker is not None:
+            self._worker.cancel()
+        if self.ring is not None:
+            self.ring.close()
+        with self._drawings_lock:
+            self._drawings_lock.notify_all()
+        self.pool.waitForDone(2000)
+        self._worker = None
+        self.ring = None
+        with self._drawings_lock:
+            self._drawings.clear()
+        w = self.window
+        w.canvas.set_playback_frame(None)
+        if self.last_idx is not None and w.frames:
+            w.current_frame_idx = self.last_idx
+        if w.frames:
+            w.refresh_view()
+        w.statusBar().showMessage(self.summary(), 4000)
+        self.playing_changed.emit(False)
+
+    def summary(self) -> str:
+        return f'Reproducción detenida: {self.shown} frames mostrados, {self.dropped} perdidos'
+
+    # --- Dibujos (hilo de la UI) ---
+    def drawing_for(self, idx: int, cancelled) -> list | None:
+        """Capas de ``idx`` para el worker; espera si la UI todavía no las tomó."""
+        with self._drawings_lock:
+            while idx not in self._drawings and not cancelled():
+                self._drawings_lock.wait(0.05)
+            return self._drawings.get(idx)
+
+    def _feed_drawings(self):
+        """Toma (en el hilo de la UI) las capas de los frames que vienen."""
+        w = self.window
+        total = len(w.frames)
+        limit = self.clock_frame + 2 * self.buffer_frames
+        self._next_feed = max(self._next_feed, self.clock_frame)
+        while self._next_feed <= limit:
+            idx = (self.start_idx + self._next_feed) % total
+            self._next_feed += 1
+            if idx in self._drawings:
+                continue
+            drawing = w.frame_drawing(idx)
+            with self._drawings_lock:
+                self._drawings[idx] = drawing
+                while len(self._drawings) > 3 * self.buffer_frames:
+                    self._drawings.popitem(last=False)
+                self._drawings_lock.notify_all()
+
+    # --- Reloj ---
+    def _tick(self):
+        if self.ring is None:
+            return
+        elapsed = self._clock.nsecsElapsed() / 1e9
+        n = int(elapsed * self.fps)
+        if n > self.clock_frame:
+            self.clock_frame = n
+            self._feed_drawings()
+        item = self.ring.take(n)
+        if item is not None:
+            _n, idx, image = item
+            self.window.canvas.set_playback_frame(QtGui.QPixmap.fromImage(image))
+            self.last_idx = idx
+            self.shown += 1
+            self._rate_window.append(elapsed)
+        # Perdidos: frames que el reloj ya pasó y nunca se mostraron
+        self.dropped = max(0, n + (1 if item is not None else 0) - self.shown)
+        while self._rate_window and elapsed - self._rate_window[0] > 1.0:
+            self._rate_window.popleft()
+        now = time.monotonic()
+        if now - self._last_status > 0.25:
+            self._last_status = now
+            idx = self.last_idx if self.last_idx is not None else self.start_idx
+            self.window.statusBar().showMessage(
+                f'▶ Frame {idx + 1}/{len(self.window.frames)} — {len(self._rate_window)} fps '
+                f'(objetivo {self.fps:g}) — perdidos: {self.dropped}')
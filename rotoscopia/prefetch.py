@@ -0,0 +1,194 @@
+"""Prefetch de frames vecinos según la dirección de navegación.
+
+Al mantener apretada una flecha, cada ``next_frame``/``prev_frame`` pagaba en el
+hilo de la UI la decodificación, ``cvimg_to_qimage`` y la composición de capas.
+``FramePrefetcher`` aprende la dirección en la que se está recorriendo el video
+y prepara por adelantado los próximos N frames en esa dirección:
+
+- Fondos: decodificación + conversión a ``QImage`` en un hilo del pool
+  (``QImage`` puede usarse fuera del hilo de la UI, ``QPixmap`` no).
+- Overlays compuestos: las capas son ``QImage``; se toman con
+  ``MainWindow.frame_drawing`` (copias implícitas) y se mezclan en el mismo
+  pool. El resultado se guarda con la versión del frame (``frame_version``) y
+  se descarta si el frame se editó mientras tanto; a pixmap se pasa recién al
+  mostrarlo.
+
+Cuando cambia la dirección se descartan las tareas encoladas y se desalojan los
+resultados que quedaron del lado contrario. Hacia atrás, en fuentes sin seek
+exacto (``sequential_only``), los fondos se piden en orden ascendente: de a uno
+del más cercano al más lejano, cada lectura caería detrás de la anterior y
+volvería a buscar.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+
+from PySide6 import QtCore, QtGui
+
+from .render import compose_images
+from .settings import PREFETCH_FRAMES
+from .utils import cvimg_to_qimage
+
+
+class PrefetchSignals(QtCore.QObject):
+    image_ready = QtCore.Signal(int, int, object)  # generación, frame, QImage
+    overlay_ready = QtCore.Signal(int, int, object, object)  # generación, frame, versión, QImage
+
+
+class PrefetchTask(QtCore.QRunnable):
+    """Decodifica un frame y lo convierte a QImage fuera del hilo de la UI."""
+
+    def __init__(self, prefetcher: 'FramePrefetcher', frames, idx: int, generation: int):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.frames = frames
+        self.idx = idx
+        self.generation = generation
+        self.signals = prefetcher.signals
+
+    @QtCore.Slot()
+    def run(self):
+        # Descartar si la dirección cambió mientras la tarea esperaba en cola
+        if self.generation != self.prefetcher.generation:
+            return
+        try:
+            frame = self.frames[self.idx]
+        except Exception:
+            return
+        qimg = cvimg_to_qimage(frame, rgb=getattr(self.frames, 'rgb', False))
+        if qimg is not None:
+            self.signals.image_ready.emit(self.generation, self.idx, qimg)
+
+
+class ComposeTask(QtCore.QRunnable):
+    """Mezcla las capas (``frame_drawing``) de un frame fuera del hilo de la UI."""
+
+    def __init__(self, prefetcher: 'FramePrefetcher', idx: int, version, drawing: list, size: QtCore.QSize):
+        super().__init__()
+        self.prefetcher = prefetcher
+        self.idx = idx
+        self.version = version
+        self.drawing = drawing
+        self.size = size
+        self.generation = prefetcher.generation
+        self.signals = prefetcher.signals
+
+    @QtCore.Slot()
+    def run(self):
+        # Soltar el dibujo al terminar: uno bajado a disco retiene sus archivos temporales
+        drawing, self.drawing = self.drawing, None
+        if self.generation != self.prefetcher.generation:
+            return
+        image = compose_images(drawing, self.size)
+        self.signals.overlay_ready.emit(self.generation, self.idx, self.version, image)
+
+
+class FramePrefetcher(QtCore.QObject):
+    """Prepara fondos y overlays compuestos de los frames hacia donde se navega."""
+
+    def __init__(self, window, depth: int = PREFETCH_FRAMES):
+        super().__init__(window)
+        self.window = window
+        self.depth = max(0, depth)
+        self.generation = 0
+        self.direction = 1
+        self._last_idx: int | None = None
+        self._images: OrderedDict[int, QtGui.QImage] = OrderedDict()
+        self._pending: set[int] = set()
+        self._overlays: dict[int, tuple[object, QtGui.QImage]] = {}  # frame -> (versión, compuesto)
+        self._pending_overlays: set[int] = set()
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)  # la fuente de frames serializa la decodificación igual
+        self.signals = PrefetchSignals()
+        self.signals.image_ready.connect(self._on_image_ready)
+        self.signals.overlay_ready.connect(self._on_overlay_ready)
+
+    # --- API usada por MainWindow ---
+    def navigate(self, idx: int):
+        """Registra la navegación a ``idx`` y agenda el prefetch en la dirección actual."""
+        if self.depth <= 0 or not self.window.frames:
+            return
+        if self._last_idx is not None and idx != self._last_idx:
+            direction = 1 if idx > self._last_idx else -1
+            if direction != self.direction:
+                self.direction = direction
+                self._cancel_pending()
+        self._last_idx = idx
+        wanted = self._wanted(idx)
+        self._evict(set(wanted) | {idx})
+        order = wanted
+        if self.direction < 0 and getattr(self.window.frames, 'sequential_only', False):
+            order = sorted(wanted)  # una sola búsqueda hacia atrás y el resto con grab()
+        for i in order:
+            if i not in self._images and i not in self._pending:
+                self._pending.add(i)
+                self.pool.start(PrefetchTask(self, self.window.frames, i, self.generation))
+        h, w = self.window.frames.shape[:2]
+        for i in wanted:
+            if i in self.window.frame_layers and i not in self._overlays and i not in self._pending_overlays:
+                drawing = self.window.frame_drawing(i)
+                if drawing:
+                    self._pending_overlays.add(i)
+                    self.pool.start(ComposeTask(self, i, self.window.frame_version(i), drawing, QtCore.QSize(w, h)))
+
+    def image(self, idx: int) -> QtGui.QImage | None:
+        """Fondo ya convertido para ``idx`` (o None si todavía no está listo)."""
+        return self._images.get(idx)
+
+    def take_overlay(self, idx: int) -> QtGui.QPixmap | None:
+        """Entrega (y olvida) el overlay compuesto por adelantado para ``idx``, si sigue vigente."""
+        entry = self._overlays.pop(idx, None)
+        if entry is None or entry[0] != self.window.frame_version(idx):
+            return None
+        return QtGui.QPixmap.fromImage(entry[1])
+
+    def invalidate(self, idx: int):
+        """El contenido de ``idx`` cambió: descartar su overlay precompuesto."""
+        self._overlays.pop(idx, None)
+
+    def reset(self):
+        """Descarta todo (al cargar/cerrar un proyecto)."""
+        self._cancel_pending()
+        self._images.clear()
+        self._overlays.clear()
+        self._last_idx = None
+        self.direction = 1
+
+    # --- Interno ---
+    def _wanted(self, idx: int) -> list[int]:
+        n = len(self.window.frames)
+        out = []
+        for k in range(1, self.depth + 1):
+            i = idx + k * self.direction
+            if 0 <= i < n:
+                out.append(i)
+        return out
+
+    def _cancel_pending(self):
+        self.generation += 1
+        self.pool.clear()  # tareas encoladas que aún no empezaron
+        self._pending.clear()
+        self._pending_overlays.clear()
+
+    def _evict(self, keep: set[int]):
+        for i in [i for i in self._images if i not in keep]:
+            del self._images[i]
+        for i in [i for i in self._overlays if i not in keep]:
+            del self._overlays[i]
+
+    def _on_image_ready(self, generation: int, idx: int, qimg):
+        self._pending.discard(idx)
+        if generation != self.generation:
+            return
+        if self._last_idx is not None and idx not in self._wanted(self._last_idx) and idx != self._last_idx:
+            return
+        self._images[idx] = qimg
+
+    def _on_overlay_ready(self, generation: int, idx: int, version, image):
+        self._pending_overlays.discard(idx)
+        if generation != self.generation:
+            return
+        if self._last_idx is not None and idx not in self._wanted(self._last_idx):
+            return
+        self._overlays[idx] = (version, image)
@@ -1,12 +1,17 @@
 import json, os
 from pathlib import Path
-from PySide6 import QtWidgets, QtGui
+from PySide6 import QtCore, QtWidgets, QtGui
 import numpy as np
 from PIL import Image
 import cv2
 
-from .settings import PROJECTS_DIR, EXPORT_DIR, MAX_BRUSH_SIZE
-from .utils import cvimg_to_qimage, qpixmap_to_pil
+from .settings import PROJECTS_DIR, EXPORT_DIR, MAX_BRUSH_SIZE, DISK_FRAME_CACHE
+from .utils import cvimg_to_qimage, qimage_to_pil, qpixmap_to_pil
+from .frames import IMAGE_EXTS, open_image_source, open_sequence_source, open_video_source
+from .disk_cache import CACHE_DIR_NAME, DiskFrameCache, cache_key
+from .loader import TILES_DIR_NAME, ProjectLoadWorker, legacy_overlay_path, read_frame_layers
+from .layers import Layer, tile_digest
+from .render import compose_images
 
 # Modos de exportación de fondo
 EXPORT_BG_TRANSPARENT = 0
@@ -17,21 +22,30 @@ class ProjectManager:
     """Centraliza toda la lógica de manejo de archivos del proyecto y exportaciones.
 
     Responsabilidades:
-    - Guardar/cargar overlays dentro de un proyecto (carpeta frames/).
+    - Guardar/cargar las capas de cada frame dentro de un proyecto (carpeta frames/);
+      los overlays de versiones anteriores se leen como capas y se migran al guardar.
     - Guardar frames sueltos en la carpeta global de exports/.
     - Exportar una animación compuesta (video o secuencia) desde las capas existentes.
     - Persistir metadatos (meta.json).
+    - Cargar las capas de un proyecto en segundo plano (ver ``loader.py``).
     """
 
     def __init__(self, window):
         self.window = window  # referencia a MainWindow
         self.meta = {}  # almacena la última metadata cargada/guardada
         self.total_frames = 0  # número de frames realmente cargados (tras subsampling)
+        self.pending_frames: set[int] = set()  # frames cuyas capas todavía no llegaron del worker
+        self._load_worker: ProjectLoadWorker | None = None
+        self._load_generation = 0
+        self._tile_cache: dict[str, QtGui.QImage] = {}  # teselas leídas en la carga en curso (ver loader.read_tile)
+        self._tile_names: dict[int, str] = {}  # QImage.cacheKey() -> tile_digest (las compartidas se hashean una vez)
+        self._tile_names_prune_at = 4096
 
     def save_project_dialog(self):
         if not self.window.frames:
             QtWidgets.QMessageBox.information(self.window, "Info", "Carga un video antes de guardar un proyecto.")
             return
+        self.finish_pending_loads()
         name, ok = QtWidgets.QInputDialog.getText(self.window, "Nombre del Proyecto", "Nombre:")
         if not ok or not name.strip():
             return
@@ -41,21 +55,49 @@ class ProjectManager:
         
         for frame_idx in self.window.frame_layers:
             self.save_frame_layers(frame_idx)
-        
-        # Fallback: save old overlay system for compatibility
-        for idx, pix in self.window.overlays.items():
-            if pix is not None and idx not in self.window.frame_layers:
-                self.save_project_overlay(idx)
+        self.prune_tiles()
+        self._prune_tile_names()
         
         self.write_meta()
+        if getattr(self.window.frames, 'disk_cache', None) is None:
+            self.attach_disk_cache()
+        else:
+            self.window.frames.flush_disk_cache()
         QtWidgets.QMessageBox.information(self.window, "Proyecto", f"Proyecto guardado en {self.window.project_path}")
 
+    def _release_frames(self, new_frames):
+        """Cierra la fuente de frames anterior (captura, caché en disco, pool) antes de reemplazarla."""
+        self.window.player.stop()
+        old = self.window.frames
+        if old is not new_frames and hasattr(old, 'release'):
+            old.clear()
+
+    def attach_disk_cache(self):
+        """Activa la caché persistente de frames decodificados del proyecto actual.
+
+        Sólo aplica a videos con proyecto guardado; la caché se llena a medida que
+        se decodifican frames y en aperturas posteriores evita decodificar.
+        """
+        frames = self.window.frames
+        if not DISK_FRAME_CACHE or not self.window.project_path or getattr(frames, 'source_type', None) != 'video':
+            return
+        key = cache_key(frames.path, self.window.fps_original, self.window.fps_target, frames.channel_order)
+        cache = DiskFrameCache.open(self.window.project_path / CACHE_DIR_NAME, key, len(frames), frames.full_shape)
+        frames.attach_disk_cache(cache)
+
     def save_frame_layers(self, frame_idx):
         """Save all layers for a specific frame."""
         if not self.window.project_path or frame_idx not in self.window.frame_layers:
             return
         
-        layers = self.window.frame_layers[frame_idx]
+        memory = self.window.memory
+        if memory.is_spilled(frame_idx, 'layers'):
+            # Frame bajado a disco: sus teselas ya tienen nombre (tile_digest), no se trae a memoria
+            layers = memory.spilled_layers(frame_idx)
+            save_tile = self._save_spilled_tile
+        else:
+            layers = [(layer, layer.tiles) for layer in self.window.frame_layers[frame_idx]]
+            save_tile = self._save_tile
         if not layers:
             return
         
@@ -63,22 +105,27 @@ class ProjectManager:
         frame_dir = self.window.project_path / 'frames' / f'frame_{frame_idx:05d}'
         frame_dir.mkdir(parents=True, exist_ok=True)
         
-        # Save each layer
+        tiles_dir = self.window.project_path / TILES_DIR_NAME
+        tiles_dir.mkdir(exist_ok=True)
+        
+        # Save each layer (its tiles, each one once per content)
         layer_metadata = []
-        for i, layer in enumerate(layers):
-            if not layer.pixmap.isNull():
-                # Save layer image
-                layer_path = frame_dir / f'layer_{i:02d}.png'
-                pil = qpixmap_to_pil(layer.pixmap)
-                pil.save(str(layer_path))
-                
-                # Store layer metadata
-                layer_metadata.append({
-                    'name': layer.name,
-                    'visible': layer.visible,
-                    'opacity': layer.opacity,
-                    'file': f'layer_{i:02d}.png'
-                })
+        for layer, layer_tiles in layers:
+            tiles = [[x, y, save_tile(tiles_dir, tile)] for (x, y), tile in sorted(layer_tiles.items())]
+            
+            # Store layer metadata
+            layer_metadata.append({
+                'name': layer.name,
+                'visible': layer.visible,
+                'opacity': layer.opacity,
+                'size': [layer.width, layer.height],
+                'tiles': tiles,
+            })
+        
+        # PNG de capas completas y overlay de versiones anteriores: ahora los reemplazan las teselas
+        for old in frame_dir.glob('layer_*.png'):
+            old.unlink()
+        legacy_overlay_path(self.window.project_path, frame_idx).unlink(missing_ok=True)
         
         # Save layer metadata
         if layer_metadata:
@@ -86,70 +133,159 @@ class ProjectManager:
             with open(meta_path, 'w', encoding='utf-8') as f:
                 json.dump(layer_metadata, f, ensure_ascii=False, indent=2)
 
+    def _save_tile(self, tiles_dir: Path, tile: QtGui.QImage) -> str:
+        """Escribe ``tile`` en ``tiles_dir`` si su contenido no está guardado; devuelve su nombre."""
+        name = self._tile_names.get(tile.cacheKey())
+        if name is None:
+            if len(self._tile_names) >= self._tile_names_prune_at:
+                self._prune_tile_names()
+            name = self._tile_names[tile.cacheKey()] = tile_digest(tile)
+        path = tiles_dir / f'{name}.png'
+        if not path.exists():
+            qimage_to_pil(tile).save(str(path))
+        return name
+
+    def _save_spilled_tile(self, tiles_dir: Path, digest: str) -> str:
+        """Como ``_save_tile`` para una tesela en la carpeta temporal de ``FrameMemory``."""
+        path = tiles_dir / f'{digest}.png'
+        if not path.exists():
+            tile = self.window.memory.read_spilled(digest)
+            if tile is not None:
+                qimage_to_pil(tile).save(str(path))
+        return digest
+
+    def _prune_tile_names(self):
+        """Olvida los nombres de teselas que ya no están en ninguna capa en memoria.
+
+        Cada versión pintada de una tesela tiene otro ``cacheKey`` y la anterior
+        no vuelve; las de frames bajados a disco vuelven con otra clave.
+        """
+        live = {tile.cacheKey() for layers in self.window.memory.frame_layers.data.values()
+                for layer in layers for tile in layer.tiles.values()}
+        self._tile_names = {key: name for key, name in self._tile_names.items() if key in live}
+        self._tile_names_prune_at = max(4096, 2 * len(self._tile_names))
+
+    def prune_tiles(self):
+        """Borra de ``tiles/`` las teselas que ya no usa ningún ``layers.json`` del proyecto."""
+        project_path = self.window.project_path
+        tiles_dir = project_path / TILES_DIR_NAME if project_path else None
+        if tiles_dir is None or not tiles_dir.is_dir():
+            return
+        used = set()
+        for meta_path in (project_path / 'frames').glob('frame_*/layers.json'):
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    layer_metadata = json.load(f)
+            except Exception:
+                return  # ante la duda no se borra nada
+            for layer_info in layer_metadata:
+                used.update(name for _x, _y, name in layer_info.get('tiles', ()))
+        for path in tiles_dir.glob('*.png'):
+            if path.stem not in used:
+                path.unlink()
+
     def load_frame_layers(self, frame_idx):
         """Load all layers for a specific frame."""
         if not self.window.project_path:
             return []
-        
-        frame_dir = self.window.project_path / 'frames' / f'frame_{frame_idx:05d}'
-        meta_path = frame_dir / 'layers.json'
-        
-        if not frame_dir.exists() or not meta_path.exists():
-            return []
-        
-        try:
-            with open(meta_path, 'r', encoding='utf-8') as f:
-                layer_metadata = json.load(f)
-        except Exception:
-            return []
-        
+        return self._layers_from_data(read_frame_layers(self.window.project_path, frame_idx, self._work_size()))
+
+    def _work_size(self) -> QtCore.QSize | None:
+        """Tamaño de trabajo de las capas (en modo proxy difiere del guardado)."""
+        if not self.window.frames:
+            return None
+        h, w = self.window.frames.shape[:2]
+        return QtCore.QSize(w, h)
+
+    def _layers_from_data(self, layer_data: list[dict]) -> list:
+        """Arma los ``Layer`` a partir de lo leído (ya en teselas) por ``read_frame_layers``."""
         layers = []
-        for layer_info in layer_metadata:
-            layer_path = frame_dir / layer_info['file']
-            if layer_path.exists():
-                qimg = QtGui.QImage(str(layer_path))
-                if not qimg.isNull():
-                    # Import Layer class locally to avoid circular imports
-                    from .canvas import Layer
-                    layer = Layer(layer_info['name'], qimg.width(), qimg.height())
-                    layer.pixmap = QtGui.QPixmap.fromImage(qimg)
-                    layer.visible = layer_info.get('visible', True)
-                    layer.opacity = layer_info.get('opacity', 1.0)
-                    layers.append(layer)
-        
+        for info in layer_data:
+            layer = Layer.from_tiles(info['name'], info['size'], info['tiles'])
+            layer.visible = info['visible']
+            layer.opacity = info['opacity']
+            layers.append(layer)
         return layers
 
-    # --- Proyecto (persistencia interna) ---
-    def save_project_overlay(self, idx):
-        """Guarda el overlay de un frame dentro de la carpeta del proyecto.
+    # --- Carga progresiva de capas ---
+    def start_background_load(self, frames):
+        """Lanza el worker que trae las capas del proyecto; el frame 0 llega primero."""
+        self.cancel_pending_loads()
+        self.pending_frames = set(frames)
+        if not self.pending_frames:
+            return
+        self._tile_cache = {}
+        worker = ProjectLoadWorker(self.window.project_path, self.pending_frames,
+                                   self._work_size(), self._load_generation, self._tile_cache)
+        worker.signals.frame_loaded.connect(self._on_frame_loaded)
+        worker.signals.progress.connect(self._on_load_progress)
+        worker.signals.finished.connect(self._on_load_finished)
+        self._load_worker = worker
+        self.window.thread_pool.start(worker)
 
-        Se usa para autosave y guardado manual del proyecto.
-        """
-        if not self.window.project_path:
+    def cancel_pending_loads(self):
+        """Descarta la carga en curso (al cerrar o abrir otro recurso)."""
+        self._load_generation += 1
+        if self._load_worker is not None:
+            self._load_worker.cancel()
+            self._load_worker = None
+        self.pending_frames = set()
+        self._tile_cache = {}
+        self._tile_names = {}  # eran del proyecto anterior
+        self._tile_names_prune_at = 4096
+
+    def prioritize_frames(self, indices):
+        """Adelanta en la cola los frames pendientes de ``indices`` (el último, primero)."""
+        if self._load_worker is not None and self.pending_frames:
+            self._load_worker.prioritize([i for i in indices if i in self.pending_frames])
+
+    def ensure_frame_loaded(self, idx: int):
+        """Si ``idx`` sigue pendiente, lo carga ya en el hilo de la UI."""
+        if idx not in self.pending_frames or not self.window.project_path:
             return
-        pix = self.window.overlays.get(idx)
-        if pix is None:
+        self._apply_loaded_frame(idx, read_frame_layers(self.window.project_path, idx, self._work_size(),
+                                                         self._tile_cache))
+
+    def finish_pending_loads(self):
+        """Completa en el hilo de la UI lo que el worker no entregó (antes de guardar/exportar)."""
+        if not self.pending_frames:
             return
-        pil = qpixmap_to_pil(pix)
-        out_dir = self.window.project_path / 'frames'
-        out_dir.mkdir(exist_ok=True, parents=True)
-        out_path = out_dir / f"frame_{idx:05d}.png"
-        pil.save(str(out_path))
+        pending = sorted(self.pending_frames)
+        if self._load_worker is not None:
+            self._load_worker.cancel()
+            self._load_worker = None
+        self._load_generation += 1  # ignorar señales que queden en vuelo
+        for idx in pending:
+            self.ensure_frame_loaded(idx)
+        self.pending_frames = set()
+        self._tile_cache = {}
 
-    def load_frame(self, frame_index):
-        """Carga (solo overlay) desde frames/ del proyecto actual.
+    def _on_frame_loaded(self, generation: int, idx: int, layer_data):
+        if generation != self._load_generation or idx not in self.pending_frames:
+            return
+        self._apply_loaded_frame(idx, layer_data)
 
-        Devuelve QPixmap o None.
-        """
-        if not self.window.project_path:
-            return None
-        frame_file = self.window.project_path / 'frames' / f"frame_{frame_index:05d}.png"
-        if not frame_file.exists():
-            return None
-        qimg = QtGui.QImage(str(frame_file))
-        if qimg.isNull():
-            return None
-        return QtGui.QPixmap.fromImage(qimg)
+    def _apply_loaded_frame(self, idx: int, layer_data: list[dict]):
+        self.pending_frames.discard(idx)
+        layers = self._layers_from_data(layer_data)
+        if layers:
+            self.window.frame_layers[idx] = layers
+        self.window.prefetcher.invalidate(idx)
+        current = self.window.current_frame_idx
+        if idx == current:
+            self.window.refresh_view()
+        elif any(i == idx for i, _prev, _dist in self.window.canvas.onion_indices(current)):
+            self.window.canvas.update()  # el onion del vecino se rehace por versión
+
+    def _on_load_progress(self, generation: int, done: int, total: int):
+        if generation == self._load_generation:
+            self.window.statusBar().showMessage(f'Cargando capas del proyecto: {done}/{total}')
+
+    def _on_load_finished(self, generation: int):
+        if generation == self._load_generation:
+            self._load_worker = None
+            self._tile_cache = {}
+            self.window.statusBar().showMessage('Capas del proyecto cargadas', 3000)
 
     # --- Exportaciones externas ---
     def save_frame(self, frame_index, image):
@@ -181,86 +317,115 @@ class ProjectManager:
         except Exception as e:
             QtWidgets.QMessageBox.critical(self.window, 'Error', f'Error al guardar: {e}')
 
-    def export_animation(self, frames, path=None, fps=12, background_mode: int = EXPORT_BG_VIDEO):
-        """Exporta una animación combinando frames base y overlays.
+    def export_animation(self, frames, path=None, fps=12, background_mode: int = EXPORT_BG_VIDEO,
+                         drawings: dict | None = None):
+        """Exporta una animación combinando frames base y el dibujo (capas) de cada uno.
 
         Si path termina en .mp4 exporta video, en caso contrario exporta secuencia PNG en carpeta.
         Si no se pasa path, se genera uno por defecto en exports/.
+        En modo proxy se exporta a resolución completa: fondo original y dibujo reescalado.
+        ``drawings`` es ``snapshot_drawings()`` tomado en el hilo de la UI; hace falta
+        cuando se exporta desde un worker (``ExportWorker``).
         """
         if not frames:
             QtWidgets.QMessageBox.information(self.window, 'Exportar', 'No hay frames para exportar.')
             return
+        if drawings is None:
+            drawings = self.snapshot_drawings()
+        work_size = self._work_size()
         EXPORT_DIR.mkdir(exist_ok=True, parents=True)
         if path is None:
             base_name = (self.window.project_name or 'animacion') + '.mp4'
             path = EXPORT_DIR / base_name
         path = Path(path)
-        # Preparamos composición
-        composed = []
-        for idx, frame in enumerate(frames):
-            h, w = frame.shape[:2]
-            if background_mode == EXPORT_BG_VIDEO:
-                bg = frame.copy()  # BGR (3 canales)
-            elif background_mode == EXPORT_BG_CROMA:
-                bg = np.zeros((h, w, 3), dtype=np.uint8)  # BGR
-                bg[:, :] = (0, 255, 0)  # Verde Croma (BGR)
-            else:  # EXPORT_BG_TRANSPARENT
-                # ¡Esta es la corrección! 4 canales (BGRA)
-                bg = np.zeros((h, w, 4), dtype=np.uint8)  # BGRA
-            
-            if idx in self.window.frame_layers:
-                overlay_pix = self.window.compose_layers_for_frame(idx)
-            else:
-                overlay_pix = self.window.overlays.get(idx)
-            
-            if overlay_pix is not None and not overlay_pix.isNull():
-                qimg = overlay_pix.toImage().convertToFormat(QtGui.QImage.Format_RGBA8888)
-                w = qimg.width(); h = qimg.height(); ptr = qimg.bits()
-                try:
-                    bc = qimg.sizeInBytes()
-                except AttributeError:
-                    bc = qimg.byteCount()
-                arr = np.frombuffer(ptr, np.uint8, count=bc).reshape((h, w, 4))
-                # Alpha blend manual sobre bg
-                if bg.shape[2] == 3:  # El fondo es BGR (Video o Croma)
-                    bg_rgba = np.concatenate([bg, np.full((h, w, 1), 255, dtype=np.uint8)], axis=2)
-                else:  # El fondo ya es BGRA (Transparente)
-                    bg_rgba = bg
-                alpha = arr[..., 3:4].astype(np.float32) / 255.0
-                inv_alpha = 1.0 - alpha
-                # Componer el dibujo (arr) sobre el fondo (bg_rgba)
-                bg_rgba[..., :3] = (arr[..., :3].astype(np.float32) * alpha + bg_rgba[..., :3].astype(np.float32) * inv_alpha).astype(np.uint8)
-                # Actualizar el canal alpha del fondo SOLO si estábamos en modo transparente
-                if background_mode == EXPORT_BG_TRANSPARENT:
-                    bg_rgba[..., 3:4] = np.maximum(arr[..., 3:4], bg_rgba[..., 3:4])
-            composed.append(bg_rgba if background_mode == EXPORT_BG_TRANSPARENT else bg_rgba[..., :3])
-        if path.suffix.lower() == '.mp4':
-            h, w = composed[0].shape[:2]
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            writer = cv2.VideoWriter(str(path), fourcc, fps, (w,h))
-            for img in composed:
-                writer.write(img)
-            writer.release()
-        else:
-            out_dir = path
-            out_dir.mkdir(exist_ok=True, parents=True)
-            for i, img in enumerate(composed):
-                if img.shape[2] == 4:  # Es BGRA (transparente)
-                    Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGRA2RGBA)).save(str(out_dir / f'frame_{i:05d}.png'))
+        # Composición frame a frame: los frames se decodifican bajo demanda, así que
+        # se escribe cada resultado en cuanto está listo en lugar de acumularlos.
+        is_video = path.suffix.lower() == '.mp4'
+        writer = None
+        if not is_video:
+            path.mkdir(exist_ok=True, parents=True)
+        # Las fuentes de video decodifican en paralelo (varios procesos) lo que no esté en caché
+        source = frames.iter_full_frames() if hasattr(frames, 'iter_full_frames') else enumerate(frames)
+        try:
+            rgb = getattr(frames, 'rgb', False)
+            for idx, frame in source:
+                if rgb:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)  # el export trabaja en BGR
+                img = self._compose_export_frame(frame, background_mode, drawings.get(idx), work_size)
+                if is_video:
+                    if writer is None:
+                        h, w = img.shape[:2]
+                        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                        writer = cv2.VideoWriter(str(path), fourcc, fps, (w, h))
+                    writer.write(img)
+                elif img.shape[2] == 4:  # Es BGRA (transparente)
+                    Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGRA2RGBA)).save(str(path / f'frame_{idx:05d}.png'))
                 else:  # Es BGR (video o croma)
-                    Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)).save(str(out_dir / f'frame_{i:05d}.png'))
+                    Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)).save(str(path / f'frame_{idx:05d}.png'))
+        finally:
+            if writer is not None:
+                writer.release()
+
+    def snapshot_drawings(self) -> dict:
+        """Dibujo de cada frame (``MainWindow.frame_drawing``) para componer fuera del hilo de la UI."""
+        return {idx: self.window.frame_drawing(idx) for idx in self.window.frame_layers}
+
+    def _compose_export_frame(self, frame, background_mode, drawing, work_size: QtCore.QSize):
+        """Compone el fondo elegido y ``drawing`` (``frame_drawing``, a ``work_size``) sobre ``frame`` (BGR o BGRA)."""
+        h, w = frame.shape[:2]
+        if background_mode == EXPORT_BG_VIDEO:
+            bg = frame.copy()  # BGR (3 canales)
+        elif background_mode == EXPORT_BG_CROMA:
+            bg = np.zeros((h, w, 3), dtype=np.uint8)  # BGR
+            bg[:, :] = (0, 255, 0)  # Verde Croma (BGR)
+        else:  # EXPORT_BG_TRANSPARENT
+            # ¡Esta es la corrección! 4 canales (BGRA)
+            bg = np.zeros((h, w, 4), dtype=np.uint8)  # BGRA
+
+        overlay = compose_images(drawing, work_size) if drawing else None
+
+        if bg.shape[2] == 3:  # El fondo es BGR (Video o Croma)
+            bg_rgba = np.concatenate([bg, np.full((h, w, 1), 255, dtype=np.uint8)], axis=2)
+        else:  # El fondo ya es BGRA (Transparente)
+            bg_rgba = bg
+        if overlay is not None:
+            if overlay.width() != w or overlay.height() != h:
+                # Dibujo hecho en proxy: llevarlo a la resolución del fondo
+                overlay = overlay.scaled(w, h, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+            qimg = overlay.convertToFormat(QtGui.QImage.Format_RGBA8888)
+            w = qimg.width(); h = qimg.height(); ptr = qimg.bits()
+            try:
+                bc = qimg.sizeInBytes()
+            except AttributeError:
+                bc = qimg.byteCount()
+            arr = np.frombuffer(ptr, np.uint8, count=bc).reshape((h, w, 4))
+            # Alpha blend manual sobre bg
+            alpha = arr[..., 3:4].astype(np.float32) / 255.0
+            inv_alpha = 1.0 - alpha
+            # Componer el dibujo (arr) sobre el fondo (bg_rgba)
+            bg_rgba[..., :3] = (arr[..., :3].astype(np.float32) * alpha + bg_rgba[..., :3].astype(np.float32) * inv_alpha).astype(np.uint8)
+            # Actualizar el canal alpha del fondo SOLO si estábamos en modo transparente
+            if background_mode == EXPORT_BG_TRANSPARENT:
+                bg_rgba[..., 3:4] = np.maximum(arr[..., 3:4], bg_rgba[..., 3:4])
+        return bg_rgba if background_mode == EXPORT_BG_TRANSPARENT else bg_rgba[..., :3]
 
     def write_meta(self):
         if not self.window.project_path:
             return
 
         frames_with_layers = {}
-        for frame_idx, layers in self.window.frame_layers.items():
-            if layers:
+        for frame_idx in self.window.frame_layers:
+            layer_count = self.window.memory.layer_count(frame_idx)  # sin traer de disco los frames bajados
+            if layer_count:
                 frames_with_layers[str(frame_idx)] = {
-                    'layer_count': len(layers),
+                    'layer_count': layer_count,
                     'active_layer': getattr(self.window, 'current_layer_idx', 0)
                 }
+        # Frames que todavía no llegaron del worker: conservar lo que decía meta.json
+        # (los que eran overlays antiguos pasan a la lista de capas: se leen igual)
+        old_layers = self.meta.get('frames_with_layers', {})
+        for frame_idx in self.pending_frames:
+            frames_with_layers[str(frame_idx)] = old_layers.get(str(frame_idx), {'layer_count': 1, 'active_layer': 0})
 
         fps_original = getattr(self.window, 'fps_original', None)
         fps_target = getattr(self.window, 'fps_target', None)
@@ -271,14 +436,14 @@ class ProjectManager:
         meta = {
             "version": 2,
             "video_path": self.window.video_path,
-            "frame_width": self.window.frames[0].shape[1] if self.window.frames else None,
-            "frame_height": self.window.frames[0].shape[0] if self.window.frames else None,
+            "frame_width": self.window.frames.full_shape[1] if self.window.frames else None,
+            "frame_height": self.window.frames.full_shape[0] if self.window.frames else None,
+            "proxy_scale": getattr(self.window.frames, 'proxy_scale', 1.0),
             "frame_count": len(self.window.frames),
             "fps": fps_target if fps_target else 12,
             "fps_original": fps_original,
             "fps_target": fps_target,
             "source_type": source_type,
-            "frames_with_overlay": sorted([i for i,o in self.window.overlays.items() if o is not None]),
             "frames_with_layers": frames_with_layers,
             "settings": {
                 "brush_color": self.window.canvas.pen_color.name(QtGui.QColor.HexArgb),
@@ -304,93 +469,85 @@ class ProjectManager:
             QtWidgets.QMessageBox.critical(self.window, "Error", f"No se pudo leer meta.json: {e}")
             return
         video_path = meta.get('video_path')
+        source_type = meta.get('source_type')
         if not video_path or not os.path.exists(video_path):
             QtWidgets.QMessageBox.warning(self.window, "Proyecto", "Recurso original no encontrado. Selecciona manualmente.")
-            video_path, _ = QtWidgets.QFileDialog.getOpenFileName(self.window, "Recurso del proyecto", "", "Videos/Imagenes (*.mp4 *.mov *.avi *.mkv *.png *.jpg *.jpeg *.bmp)")
+            if source_type == 'sequence':
+                video_path = QtWidgets.QFileDialog.getExistingDirectory(self.window, "Carpeta de la secuencia", "")
+            else:
+                video_path, _ = QtWidgets.QFileDialog.getOpenFileName(self.window, "Recurso del proyecto", "", "Videos/Imagenes (*.mp4 *.mov *.avi *.mkv *.png *.jpg *.jpeg *.bmp)")
             if not video_path:
                 return
-        source_type = meta.get('source_type')
+        proxy_scale = meta.get('proxy_scale') or 1.0  # reabrir con la misma resolución de trabajo
         ext = Path(video_path).suffix.lower()
-        image_exts = {'.png', '.jpg', '.jpeg', '.bmp'}
-        frames = []
-        if source_type == 'image' or ext in image_exts:
+        if source_type == 'sequence' or Path(video_path).is_dir():
+            # Secuencia de imágenes: se indexa y se decodifica bajo demanda
+            frames = open_sequence_source(video_path, meta.get('fps_target') or 12, meta.get('fps_original'),
+                                          proxy_scale=proxy_scale)
+            if frames is None:
+                QtWidgets.QMessageBox.critical(self.window, 'Error', f'No se encontraron imágenes en: {video_path}')
+                return
+            self.window.fps_original = int(round(frames.fps_original))
+            self.window.fps_target = int(meta.get('fps_target') or 12)
+            source_type = 'sequence'
+        elif source_type == 'image' or ext in IMAGE_EXTS:
             # Carga de imagen única
-            img = cv2.imread(video_path, cv2.IMREAD_COLOR)
-            if img is None:
+            frames = open_image_source(video_path, proxy_scale=proxy_scale)
+            if frames is None:
                 QtWidgets.QMessageBox.critical(self.window, 'Error', f'No se pudo leer la imagen: {video_path}')
                 return
-            frames = [img]
             self.window.fps_original = 1
             self.window.fps_target = 1
             source_type = 'image'
         else:
-            # Carga de video (con posible subsampling)
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                QtWidgets.QMessageBox.critical(self.window, 'Error', 'No se pudo abrir el video del proyecto.')
-                return
+            # Carga de video (con posible subsampling): sólo se indexa, se decodifica bajo demanda
             meta_fps_original = meta.get('fps_original')
             meta_fps_target = meta.get('fps_target')
             if meta_fps_original and meta_fps_target:
-                fps_original_val = meta_fps_original
                 target_fps_val = meta_fps_target if meta_fps_target > 0 else 12
-                real_fps = cap.get(cv2.CAP_PROP_FPS) or fps_original_val or 12.0
-                if fps_original_val <= 0:
-                    fps_original_val = real_fps
-                step = max(1, int(round(float(fps_original_val) / max(1,float(target_fps_val)))))
-                frame_idx_cap = 0
-                while True:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    if frame_idx_cap % step == 0:
-                        frames.append(frame)
-                    frame_idx_cap += 1
-                self.window.fps_original = int(round(fps_original_val))
+                frames = open_video_source(video_path, target_fps_val, fps_original=meta_fps_original,
+                                           proxy_scale=proxy_scale)
+                if frames is None:
+                    QtWidgets.QMessageBox.critical(self.window, 'Error', 'No se pudo abrir el video del proyecto.')
+                    return
+                self.window.fps_original = int(round(frames.fps_original))
                 self.window.fps_target = int(round(target_fps_val))
             else:
                 # Proyecto antiguo: todos los frames
-                fps_original_val = cap.get(cv2.CAP_PROP_FPS) or 12.0
-                if fps_original_val <= 0:
-                    fps_original_val = 12.0
-                while True:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    frames.append(frame)
-                self.window.fps_original = int(round(fps_original_val))
+                frames = open_video_source(video_path, None, proxy_scale=proxy_scale)
+                if frames is None:
+                    QtWidgets.QMessageBox.critical(self.window, 'Error', 'No se pudo abrir el video del proyecto.')
+                    return
+                self.window.fps_original = int(round(frames.fps_original))
                 self.window.fps_target = meta.get('fps', 12)
-            cap.release()
             source_type = 'video'
         if not frames:
             QtWidgets.QMessageBox.warning(self.window, 'Proyecto', 'El recurso no contiene frames (tras subsampling).')
             return
         # Actualizar estado de ventana
+        self.cancel_pending_loads()
+        self.window.prefetcher.reset()
+        self.window.bg_cache.clear()
+        self._release_frames(frames)
         self.window.frames = frames
         self.window.video_path = video_path
         self.window.current_frame_idx = 0
-        self.window.overlays.clear()
         self.window.frame_layers.clear()
         self.window.undo_stacks.clear()
         self.window.redo_stacks.clear()
         self.window.dirty_frames.clear()
         self.window.project_path = Path(path).parent
         self.window.project_name = self.window.project_path.name
-        # Cargar capas (solo si video / multiframe)
+        self.attach_disk_cache()
+        # Capas (solo si video / multiframe) y overlays antiguos, que llegan como
+        # capas: se leen en segundo plano y van apareciendo (el frame 0 primero)
+        drawn_frames = set()
         version = meta.get('version', 1)
         if version >= 2 and source_type != 'image' and 'frames_with_layers' in meta:
-            for frame_idx_str in meta['frames_with_layers'].keys():
-                frame_idx = int(frame_idx_str)
-                layers = self.load_frame_layers(frame_idx)
-                if layers:
-                    self.window.frame_layers[frame_idx] = layers
-        # Overlays antiguos
+            drawn_frames = {int(k) for k in meta['frames_with_layers'].keys()}
         if source_type != 'image':
-            for idx in meta.get('frames_with_overlay', []):
-                if idx not in self.window.frame_layers:
-                    loaded = self.load_frame(idx)
-                    if loaded is not None:
-                        self.window.overlays[idx] = loaded
+            drawn_frames |= set(meta.get('frames_with_overlay', []))
+        self.start_background_load(drawn_frames)
         # Ajustes
         settings = meta.get('settings', {})
         brush_size = settings.get('brush_size')
@@ -403,7 +560,7 @@ class ProjectManager:
             col = QtGui.QColor(brush_color)
             if col.isValid():
                 self.window.canvas.pen_color = col
-        h, w = self.window.frames[0].shape[:2]
+        h, w = self.window.frames.shape[:2]
         self.window.canvas.set_size(w, h)
         self.window.refresh_view()
         self.total_frames = len(frames)
@@ -413,48 +570,52 @@ class ProjectManager:
             pass
         QtWidgets.QMessageBox.information(self.window, 'Proyecto', f'Proyecto cargado: {self.window.project_name}')
 
-    def load_video(self, video_path: str, target_fps: int = 12):
-        """Carga un video (subsampling) o una imagen estática."""
+    def load_video(self, video_path: str, target_fps: int = 12, proxy_scale: float = 1.0,
+                   fps_original: float | None = None):
+        """Carga un video (subsampling), una secuencia de imágenes (carpeta) o una imagen estática.
+
+        ``proxy_scale`` < 1 activa el modo proxy: se edita sobre frames reducidos y
+        la exportación se hace a resolución completa. ``fps_original`` sólo hace
+        falta para secuencias (los videos lo traen en el contenedor).
+        """
         ext = Path(video_path).suffix.lower()
-        image_exts = {'.png', '.jpg', '.jpeg', '.bmp'}
         source_type = 'video'
-        if ext in image_exts:
-            img = cv2.imread(video_path, cv2.IMREAD_COLOR)
-            if img is None:
+        if Path(video_path).is_dir():
+            frames = open_sequence_source(video_path, target_fps, fps_original, proxy_scale=proxy_scale)
+            if frames is None:
+                QtWidgets.QMessageBox.critical(self.window, 'Error', f'No se encontraron imágenes en:\n{video_path}')
+                return False
+            fps_original = frames.fps_original
+            step = frames.step
+            source_type = 'sequence'
+        elif ext in IMAGE_EXTS:
+            frames = open_image_source(video_path, proxy_scale=proxy_scale)
+            if frames is None:
                 QtWidgets.QMessageBox.critical(self.window, 'Error', f'No se pudo leer la imagen:\n{video_path}')
                 return False
-            frames = [img]
             fps_original = 1.0
             target_fps = 1
             step = 1
             source_type = 'image'
         else:
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
+            # Sólo se construye el índice de frames; la decodificación es bajo demanda
+            frames = open_video_source(video_path, target_fps, proxy_scale=proxy_scale)
+            if frames is None:
                 QtWidgets.QMessageBox.critical(self.window, 'Error', f'No se pudo abrir el video:\n{video_path}')
                 return False
-            fps_original = cap.get(cv2.CAP_PROP_FPS) or 12.0
-            if fps_original <= 0:
-                fps_original = 12.0
-            step = max(1, int(round(fps_original / max(1, target_fps))))
-            frames = []
-            idx_cap = 0
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                if idx_cap % step == 0:
-                    frames.append(frame)
-                idx_cap += 1
-            cap.release()
+            fps_original = frames.fps_original
+            step = frames.step
         if not frames:
             QtWidgets.QMessageBox.warning(self.window, 'Video', f'El recurso no contiene frames.\nRuta: {video_path}')
             return False
         # Estado ventana
+        self.cancel_pending_loads()
+        self.window.prefetcher.reset()
+        self.window.bg_cache.clear()
+        self._release_frames(frames)
         self.window.frames = frames
         self.window.video_path = video_path
         self.window.current_frame_idx = 0
-        self.window.overlays.clear()
         self.window.frame_layers.clear()
         self.window.current_layer_idx = 0
         self.window.undo_stacks.clear()
@@ -468,9 +629,10 @@ class ProjectManager:
             'fps_original': self.window.fps_original,
             'fps_target': self.window.fps_target,
             'frame_count': len(frames),
-            'source_type': source_type
+            'source_type': source_type,
+            'proxy_scale': frames.proxy_scale
         })
-        h, w = frames[0].shape[:2]
+        h, w = frames.shape[:2]
         self.window.canvas.set_size(w, h)
         # Asegurar al menos una capa
         try:
@@ -483,8 +645,11 @@ class ProjectManager:
         except Exception:
             pass
         from pathlib import Path as _P
+        proxy_txt = f', proxy {int(round(frames.proxy_scale * 100))}% ({w}x{h})' if frames.is_proxy else ''
         if source_type == 'image':
-            self.window.statusBar().showMessage(f'Imagen cargada: {_P(video_path).name} (1 frame)', 5000)
+            self.window.statusBar().showMessage(f'Imagen cargada: {_P(video_path).name} (1 frame{proxy_txt})', 5000)
+        elif source_type == 'sequence':
+            self.window.statusBar().showMessage(f'Secuencia cargada: {_P(video_path).name} ({len(frames)} de {len(frames.files)} imágenes, fps {fps_original:.1f}→{target_fps}, step={step}{proxy_txt})', 5000)
         else:
-            self.window.statusBar().showMessage(f'Video cargado: {_P(video_path).name} ({len(frames)} frames, fps {fps_original:.1f}→{target_fps}, step={step})', 5000)
+            self.window.statusBar().showMessage(f'Video cargado: {_P(video_path).name} ({len(frames)} frames, fps {fps_original:.1f}→{target_fps}, step={step}{proxy_txt})', 5000)
         return True
@@ -0,0 +1,457 @@
+"""Cachés de pixmaps listos para pintar.
+
+``refresh_view`` convertía el frame en cada navegación: ``cvtColor`` BGR→RGB,
+``QImage.copy()`` y ``QPixmap.fromImage`` (tres copias del frame completo).
+``PixmapCache`` guarda los fondos ya convertidos por índice de frame, con
+límite en MB y contadores de aciertos/fallos, así que volver a un frame visitado
+no convierte nada.
+
+Con zoom ≠ 1, ``paintEvent`` reescalaba fondo y overlay completos, lo que con
+planchas 4K–8K no escala: el frame escalado a 6× no entra en memoria y alejar
+el zoom promedia millones de píxeles por repintado. ``TiledPyramid`` parte cada
+imagen en teselas de ``RENDER_TILE_SIZE`` y guarda:
+
+- una pirámide de mips por tesela (nivel L = imagen reducida 2^L veces), que se
+  arma bajo demanda sólo para las teselas que se ven;
+- las teselas ya escaladas al zoom actual (en coordenadas de pantalla), de modo
+  que repintar con el mismo zoom es sólo copiar las visibles.
+
+El zoom elige el mip más cercano por encima (la escala final nunca reduce más
+de 2×) y cada repintado toca sólo las teselas que cortan la región expuesta, así
+que la latencia de zoom/paneo depende del tamaño de la ventana y no del frame.
+Un trazo invalida únicamente las teselas que tocó (``changed``). Durante un
+gesto de zoom/paneo (``fast=True``) se copian las teselas que ya estén
+escaladas y el resto se pinta con escalado rápido (vecino más cercano) sin
+guardarlo, así los zooms intermedios no llenan la caché.
+
+``OnionCache`` arma el onion skin de varios frames: guarda cada vecino ya
+tintado por (frame, color) con la versión de su contenido, y la pila mezclada
+(del más lejano al más cercano, con opacidad decreciente) como una sola
+pirámide. Pintar el onion cuesta lo mismo que pintar una capa, sin importar
+cuántos frames muestre; al avanzar un frame sólo se tinta el que entra, pero la
+pila se vuelve a mezclar entera (cada vecino cambia de distancia y por lo tanto
+de opacidad), y editar un vecino rehace sólo ese vecino.
+
+Las capas de dibujo son teselas ``QImage`` (ver ``layers.Layer``);
+``compose_images`` las mezcla sin tocar pixmaps, así que export, reproducción y prefetch componen
+en sus hilos a partir de copias implícitas tomadas en el hilo de la UI.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+
+from PySide6 import QtCore, QtGui
+
+import math
+
+from .settings import BG_PIXMAP_CACHE_MB, ONION_CACHE_MB, RENDER_TILE_SIZE, TILE_CACHE_MB
+
+
+def pixmap_bytes(pix: QtGui.QPixmap) -> int:
+    """Memoria aproximada de un pixmap (ancho × alto × bytes por píxel)."""
+    return pix.width() * pix.height() * max(1, pix.depth() // 8)
+
+
+class PixmapCache:
+    """LRU de ``QPixmap`` acotada en MB. Sólo se usa desde el hilo de la UI."""
+
+    def __init__(self, max_mb: float = BG_PIXMAP_CACHE_MB):
+        self.max_bytes = max(0, int(max_mb * 1024 * 1024))
+        self._items: OrderedDict[object, QtGui.QPixmap] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> QtGui.QPixmap | None:
+        pix = self._items.get(key)
+        if pix is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return pix
+
+    def put(self, key, pix: QtGui.QPixmap):
+        size = pixmap_bytes(pix)
+        if size > self.max_bytes:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._bytes -= pixmap_bytes(old)
+        self._items[key] = pix
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._items:
+            _, evicted = self._items.popitem(last=False)
+            self._bytes -= pixmap_bytes(evicted)
+
+    def discard(self, key):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._bytes -= pixmap_bytes(old)
+
+    def clear(self):
+        self._items.clear()
+        self._bytes = 0
+
+    def __contains__(self, key) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def keys(self) -> list:
+        return list(self._items)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return f'{len(self._items)} pixmaps, {self._bytes / 1048576:.0f} MB, aciertos {self.hits}/{total} ({rate:.0f}%)'
+
+
+def source_rect(area: QtCore.QRect, origin: QtCore.QPointF, scale: float) -> QtCore.QRectF:
+    """Rectángulo de pantalla ``area`` llevado a coordenadas del frame."""
+    return QtCore.QRectF((area.x() - origin.x()) / scale, (area.y() - origin.y()) / scale,
+                         area.width() / scale, area.height() / scale)
+
+
+def draw_region(painter: QtGui.QPainter, pix: QtGui.QPixmap, area: QtCore.QRect,
+                origin: QtCore.QPointF, scale: float, smooth: bool = True):
+    """Pinta sólo la parte ``area`` (pantalla) de ``pix`` dibujado en ``origin`` a ``scale``.
+
+    A zoom 1 se copia el recorte tal cual; si no, se escala únicamente el recorte
+    del frame que cae en ``area`` (sin caché, ver ``TiledPyramid``), bilineal o,
+    con ``smooth=False``, por vecino más cercano.
+    """
+    if area.isEmpty() or pix is None or pix.isNull():
+        return
+    if abs(scale - 1.0) <= 1e-3:
+        painter.drawPixmap(area.topLeft(), pix, area.translated(-int(origin.x()), -int(origin.y())))
+        return
+    painter.save()
+    painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, smooth)
+    painter.drawPixmap(QtCore.QRectF(area), pix, source_rect(area, origin, scale))
+    painter.restore()
+
+
+def mip_level(scale: float) -> int:
+    """Nivel de mip para dibujar a ``scale``: el más reducido que no queda por debajo."""
+    if scale >= 1.0:
+        return 0
+    return max(0, int(math.floor(math.log2(1.0 / scale) + 1e-6)))
+
+
+class TiledPyramid:
+    """Imagen partida en teselas con pirámide de mips y teselas escaladas al zoom.
+
+    - ``set_pixmap(pix)``: imagen a pintar; si cambia (otro ``cacheKey``) se
+      descartan las teselas.
+    - ``changed(clave_vieja, nuevo, rect)``: el overlay nuevo difiere del que
+      tenía ``cacheKey()`` == ``clave_vieja`` sólo en ``rect`` (coordenadas de
+      imagen); se conservan las demás teselas. Se pasa la clave y no el pixmap
+      porque el overlay puede haberse pintado en el lugar.
+    - ``paint(painter, area, origin, scale, fast)``: pinta la región de pantalla
+      ``area``; con ``fast`` no escala teselas nuevas (ver módulo).
+
+    El nivel 0 de la pirámide es la propia imagen (se lee con un rectángulo
+    fuente, sin copiarla); los niveles ≥ 1 se guardan por tesela con 2^L px de
+    margen para que el filtrado bilineal no marque las uniones.
+    """
+
+    def __init__(self, tile: int = RENDER_TILE_SIZE, max_mb: float = TILE_CACHE_MB):
+        self.tile = max(16, int(tile))
+        self.pix: QtGui.QPixmap | None = None
+        self._key = None
+        self._tiles = PixmapCache(max_mb)
+        self.tiles_rendered = 0
+        self.mips_built = 0
+
+    def set_pixmap(self, pix: QtGui.QPixmap):
+        if pix.cacheKey() != self._key:
+            self._tiles.clear()
+            self._key = pix.cacheKey()
+        self.pix = pix
+
+    def changed(self, old_key, new: QtGui.QPixmap, rect: QtCore.QRect | None):
+        chained = (rect is not None and old_key is not None and self.pix is not None
+                   and self.pix.size() == new.size() and self._key == old_key)
+        if chained:
+            self._discard_rect(rect)
+            self._key = new.cacheKey()
+            self.pix = new
+        else:
+            self.invalidate()
+
+    def invalidate(self):
+        self._tiles.clear()
+        self._key = None
+        self.pix = None
+
+    @property
+    def size_bytes(self) -> int:
+        return self._tiles.size_bytes + (pixmap_bytes(self.pix) if self.pix is not None else 0)
+
+    def stats(self) -> str:
+        return f'teselas {self._tiles.stats()}, escaladas {self.tiles_rendered}, mips {self.mips_built}'
+
+    # ---------------- Geometría ----------------
+    def _mip_rects(self, level: int, tx: int, ty: int) -> tuple[QtCore.QRect, QtCore.QRect]:
+        """(rect de la tesela, rect con margen) en coordenadas de la imagen."""
+        f = 1 << level
+        size = self.tile * f
+        bounds = self.pix.rect()
+        rect = QtCore.QRect(tx * size, ty * size, size, size).intersected(bounds)
+        return rect, rect.adjusted(-f, -f, f, f).intersected(bounds)
+
+    def _screen_tile_rect(self, scale: float, i: int, j: int) -> QtCore.QRect:
+        disp = QtCore.QRect(0, 0, int(self.pix.width() * scale), int(self.pix.height() * scale))
+        return QtCore.QRect(i * self.tile, j * self.tile, self.tile, self.tile).intersected(disp)
+
+    def _discard_rect(self, rect: QtCore.QRect):
+        for key in self._tiles.keys():
+            if key[0] == 'mip':
+                _kind, level, tx, ty = key
+                touched = self._mip_rects(level, tx, ty)[1]
+            else:
+                _kind, scale, i, j = key
+                # La tesela en pantalla lee su rect en la imagen más el margen del mip
+                margin = (1 << mip_level(scale)) + 1
+                area = self._screen_tile_rect(scale, i, j)
+                touched = source_rect(area, QtCore.QPointF(0, 0), scale).toAlignedRect().adjusted(
+                    -margin, -margin, margin, margin)
+            if touched.intersects(rect):
+                self._tiles.discard(key)
+
+    # ---------------- Teselas ----------------
+    def _mip_tile(self, level: int, tx: int, ty: int) -> tuple[QtGui.QPixmap, QtCore.QRectF, QtCore.QRect]:
+        """Tesela del nivel ``level``: (pixmap, rect fuente sin margen, rect en la imagen)."""
+        rect, padded = self._mip_rects(level, tx, ty)
+        key = ('mip', level, tx, ty)
+        pix = self._tiles.get(key)
+        if pix is None:
+            f = 1 << level
+            w = max(1, math.ceil(padded.width() / f)); h = max(1, math.ceil(padded.height() / f))
+            pix = self.pix.copy(padded).scaled(w, h, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+            self._tiles.put(key, pix)
+            self.mips_built += 1
+        sx = pix.width() / padded.width(); sy = pix.height() / padded.height()
+        src = QtCore.QRectF((rect.x() - padded.x()) * sx, (rect.y() - padded.y()) * sy,
+                            rect.width() * sx, rect.height() * sy)
+        return pix, src, rect
+
+    def _render_tile(self, scale: float, i: int, j: int) -> QtGui.QPixmap:
+        area = self._screen_tile_rect(scale, i, j)
+        out = QtGui.QPixmap(area.size())
+        out.fill(QtCore.Qt.transparent)
+        p = QtGui.QPainter(out)
+        p.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, True)
+        p.translate(-area.x(), -area.y())
+        level = mip_level(scale)
+        src = source_rect(area, QtCore.QPointF(0, 0), scale)
+        if level == 0:
+            p.drawPixmap(QtCore.QRectF(area), self.pix, src)
+        else:
+            size = self.tile << level
+            for ty in range(int(src.top()) // size, max(int(src.top()), math.ceil(src.bottom()) - 1) // size + 1):
+                for tx in range(int(src.left()) // size, max(int(src.left()), math.ceil(src.right()) - 1) // size + 1):
+                    mip, mip_src, rect = self._mip_tile(level, tx, ty)
+                    if rect.isEmpty():
+                        continue
+                    target = QtCore.QRectF(rect.x() * scale, rect.y() * scale, rect.width() * scale, rect.height() * scale)
+                    p.drawPixmap(target, mip, mip_src)
+        p.end()
+        self.tiles_rendered += 1
+        return out
+
+    def paint(self, painter: QtGui.QPainter, area: QtCore.QRect, origin: QtCore.QPointF, scale: float,
+              fast: bool = False):
+        if area.isEmpty() or self.pix is None or self.pix.isNull():
+            return
+        if abs(scale - 1.0) <= 1e-3:
+            draw_region(painter, self.pix, area, origin, 1.0)
+            return
+        ox = int(origin.x()); oy = int(origin.y())
+        local = area.translated(-ox, -oy).intersected(
+            QtCore.QRect(0, 0, int(self.pix.width() * scale), int(self.pix.height() * scale)))
+        if local.isEmpty():
+            return
+        skey = round(scale, 6)
+        t = self.tile
+        for j in range(local.top() // t, local.bottom() // t + 1):
+            for i in range(local.left() // t, local.right() // t + 1):
+                key = ('screen', skey, i, j)
+                pix = self._tiles.get(key)
+                if pix is None and fast:
+                    tile_area = QtCore.QRect(i * t, j * t, t, t).intersected(local).translated(ox, oy)
+                    draw_region(painter, self.pix, tile_area, QtCore.QPointF(ox, oy), scale, smooth=False)
+                    continue
+                if pix is None:
+                    pix = self._render_tile(scale, i, j)
+                    self._tiles.put(key, pix)
+                painter.drawPixmap(ox + i * t, oy + j * t, pix)
+
+
+def draw_image_part(painter: QtGui.QPainter, image: QtGui.QImage, origin: QtCore.QPoint,
+                    area: QtCore.QRect | None = None):
+    """Pinta ``image`` ubicada en ``origin`` (coordenadas del frame), sólo dentro de ``area``."""
+    part = QtCore.QRect(origin, image.size())
+    if area is not None:
+        part = part.intersected(area)
+    if not part.isEmpty():
+        painter.drawImage(part.topLeft(), image, part.translated(-origin))
+
+
+def draw_tiles(painter: QtGui.QPainter, tiles: dict[tuple[int, int], QtGui.QImage],
+               area: QtCore.QRect | None = None):
+    """Pinta ``tiles`` = ``{(x, y): imagen}`` (esquinas en coordenadas del frame), sólo dentro de ``area``."""
+    for (x, y), image in tiles.items():
+        draw_image_part(painter, image, QtCore.QPoint(x, y), area)
+
+
+def compose_images(layers: list[tuple[dict, float]], size: QtCore.QSize) -> QtGui.QImage:
+    """Mezcla ``layers`` = ``[(teselas, opacidad), ...]`` en orden sobre un QImage transparente.
+
+    ``teselas`` como en ``draw_tiles``; una imagen entera es ``{(0, 0): imagen}``.
+
+    Sólo usa ``QImage``: se puede llamar desde cualquier hilo.
+    """
+    out = QtGui.QImage(size, QtGui.QImage.Format_ARGB32_Premultiplied)
+    out.fill(QtCore.Qt.transparent)
+    p = QtGui.QPainter(out)
+    for tiles, opacity in layers:
+        p.setOpacity(opacity)
+        draw_tiles(p, tiles)
+    p.end()
+    return out
+
+
+def tint_pixmap(pix: QtGui.QPixmap, color: QtGui.QColor) -> QtGui.QPixmap:
+    """``pix`` pintado de ``color`` sólo sobre sus píxeles (conserva el alfa)."""
+    out = QtGui.QPixmap(pix.size())
+    out.fill(QtCore.Qt.transparent)
+    p = QtGui.QPainter(out)
+    p.drawPixmap(0, 0, pix)
+    p.setCompositionMode(QtGui.QPainter.CompositionMode_SourceIn)
+    p.fillRect(out.rect(), color)
+    p.end()
+    return out
+
+
+class OnionCache:
+    """Onion skin de varios frames: vecinos tintados y pila mezclada, LRU acotada en MB.
+
+    ``version`` identifica el contenido de un frame (ver ``MainWindow.frame_version``):
+    si no coincide con la guardada, ese vecino se vuelve a componer y tintar. El
+    zoom no es parte de la clave porque la pirámide de la pila guarda sus teselas
+    por escala.
+
+    Lo incremental es el tintado, no la mezcla: al moverse un frame todos los
+    vecinos cambian de distancia (y de opacidad), así que la pila se rehace
+    pintando de nuevo cada vecino tintado (hasta ``2 * MAX_ONION_FRAMES``
+    ``drawPixmap`` de frame completo) y su pirámide empieza vacía.
+
+    ``max_bytes`` acota sólo los vecinos tintados; la pila es un frame más su
+    pirámide, que tiene su propio límite (``TILE_CACHE_MB``).
+    """
+
+    def __init__(self, max_mb: float = ONION_CACHE_MB):
+        self.max_bytes = max(0, int(max_mb * 1024 * 1024))
+        self._tinted: OrderedDict[tuple, tuple[object, QtGui.QPixmap | None]] = OrderedDict()
+        self._stack_key = None
+        self._stack = TiledPyramid()
+        self.tinted_built = 0
+        self.stacks_built = 0
+        self.hits = 0      # vecinos tintados reutilizados
+        self.misses = 0    # vecinos tintados (re)compuestos
+
+    def tinted(self, idx: int, color: QtGui.QColor, version, compose) -> QtGui.QPixmap | None:
+        """Frame ``idx`` tintado de ``color`` (opaco); ``compose(idx)`` lo arma si hace falta."""
+        key = (idx, color.rgb())
+        entry = self._tinted.get(key)
+        if entry is not None and entry[0] == version:
+            self._tinted.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        pix = compose(idx)
+        tinted = tint_pixmap(pix, color) if pix is not None and not pix.isNull() else None
+        self._tinted.pop(key, None)
+        self._tinted[key] = (version, tinted)
+        self.tinted_built += 1
+        return tinted
+
+    def stack(self, entries: list[tuple], compose) -> TiledPyramid | None:
+        """Pila mezclada de ``entries`` = ``[(frame, color, versión, opacidad), ...]``.
+
+        Se pintan en el orden dado (del más lejano al más cercano, para que el
+        más cercano quede arriba). Mientras la lista no cambie se reutiliza la
+        pila y sus teselas escaladas.
+        """
+        key = tuple((idx, color.rgb(), version, round(alpha, 4)) for idx, color, version, alpha in entries)
+        if key == self._stack_key:
+            return self._stack if self._stack.pix is not None else None
+        layers = [(self.tinted(idx, color, version, compose), alpha) for idx, color, version, alpha in entries]
+        layers = [(pix, alpha) for pix, alpha in layers if pix is not None and alpha > 0]
+        self._stack_key = key
+        if not layers:
+            self._stack.invalidate()
+            self._trim()
+            return None
+        out = QtGui.QPixmap(layers[0][0].size())
+        out.fill(QtCore.Qt.transparent)
+        p = QtGui.QPainter(out)
+        for pix, alpha in layers:
+            p.setOpacity(alpha)
+            p.drawPixmap(0, 0, pix)
+        p.end()
+        self._stack.set_pixmap(out)
+        self.stacks_built += 1
+        self._trim()
+        return self._stack
+
+    def discard(self, idx: int):
+        for key in [k for k in self._tinted if k[0] == idx]:
+            del self._tinted[key]
+        self._stack_key = None
+
+    def clear(self):
+        self._tinted.clear()
+        self._stack_key = None
+        self._stack.invalidate()
+
+    def _trim(self):
+        """Descarta vecinos tintados, del más viejo al más nuevo, hasta entrar en ``max_bytes``.
+
+        Primero los que no forman la pila actual; si con eso no alcanza (muchos
+        frames de onion para el presupuesto) también los de la pila, que ya
+        están mezclados en ella y sólo se vuelven a tintar al rehacerla.
+        """
+        in_stack = {(idx, rgb) for idx, rgb, _version, _alpha in (self._stack_key or ())}
+        size = self.size_bytes
+        for keep_stack in (True, False):
+            for key in list(self._tinted):
+                if size <= self.max_bytes:
+                    return
+                if keep_stack and key in in_stack:
+                    continue
+                pix = self._tinted.pop(key)[1]
+                if pix is not None:
+                    size -= pixmap_bytes(pix)
+
+    @property
+    def size_bytes(self) -> int:
+        """Bytes de los vecinos tintados (la pila va aparte, ver ``stack_bytes``)."""
+        return sum(pixmap_bytes(pix) for _version, pix in self._tinted.values() if pix is not None)
+
+    @property
+    def stack_bytes(self) -> int:
+        return self._stack.size_bytes
+
+    def stats(self) -> str:
+        return (f'{len(self._tinted)} vecinos, {self.size_bytes / 1048576:.0f} MB '
+                f'+ pila {self.stack_bytes / 1048576:.0f} MB, '
+                f'tintados {self.tinted_built}, pilas {self.stacks_built}')
@@ -1,4 +1,5 @@
 from pathlib import Path
+import os
 import sys
 from PySide6.QtCore import Qt
 
@@ -22,6 +23,9 @@ EXPORTS_DIR.mkdir(exist_ok=True)
 
 # Valores por defecto centralizados
 DEFAULT_ONION_OPACITY = 0.3
+DEFAULT_ONION_FRAMES = 1      # frames de onion antes y después del actual
+MAX_ONION_FRAMES = 5
+ONION_FADE = 0.6              # la opacidad del onion se multiplica por esto en cada frame de distancia
 DEFAULT_BG_OPACITY = 0.5
 DEFAULT_BRUSH_SIZE = 3
 DEFAULT_BRUSH_COLOR = Qt.black  # QColor base para pincel
@@ -30,6 +34,58 @@ DEFAULT_ZOOM_MIN = 0.25
 DEFAULT_ZOOM_MAX = 6.0
 MAX_HISTORY = 20
 
+# Frames de video: se decodifican bajo demanda y se cachean (LRU) hasta este tamaño
+FRAME_CACHE_MB = 512
+# Representación de los frames en esa caché: 'raw' (BGR, sin CPU extra), 'jpeg' (con pérdida,
+# mínima RAM), 'png'/'zlib' (sin pérdida), 'yuv420' (mitad de RAM, decodificación barata).
+# En los modos comprimidos FRAME_CACHE_MB acota los bytes comprimidos y FRAME_STORE_HOT_MB
+# los frames ya decodificados de acceso inmediato.
+FRAME_STORE_MODE = 'raw'
+FRAME_STORE_JPEG_QUALITY = 92
+FRAME_STORE_HOT_MB = 96
+# Orden de canales de los frames desde la ingesta: 'bgr' (OpenCV) o 'rgb' (el que pinta Qt;
+# se convierte una sola vez al decodificar en lugar de en cada conversión a QImage)
+FRAME_CHANNEL_ORDER = 'bgr'
+# Fondos ya convertidos a QPixmap listos para pintar (por frame)
+BG_PIXMAP_CACHE_MB = 256
+# Render con zoom: lado (px) de las teselas y memoria por imagen (fondo, overlay, cada
+# onion) para sus mips y teselas ya escaladas al zoom actual
+RENDER_TILE_SIZE = 256
+TILE_CACHE_MB = 96
+# Onion skins ya tintados (por frame vecino); sobreviven a la navegación. La pila mezclada
+# que se pinta no cuenta aquí: es un frame más sus teselas escaladas (TILE_CACHE_MB)
+ONION_CACHE_MB = 160
+# Durante zoom/paneo se pinta con escalado rápido; tras este tiempo sin gestos (ms) se
+# repinta una vez con calidad completa
+INTERACTIVE_IDLE_MS = 150
+# Las capas guardan sólo las teselas dibujadas, cuadradas de este lado (px); las copias las comparten
+LAYER_GRID = 128
+# Dibujo de todos los frames (capas, deshacer/rehacer) en RAM; al pasarse,
+# los frames visitados hace más tiempo bajan sin pérdida a SCRATCH_DIR y vuelven al navegar
+# (None = carpeta temporal del sistema)
+DRAWING_MEMORY_MB = 1024
+SCRATCH_DIR = None
+# Frames ya compuestos (fondo + capas) que prepara por delante la reproducción
+PLAYBACK_BUFFER_FRAMES = 12
+# Estadísticas de render (paintEvent, composición, onion, cachés, fps) en la barra de
+# estado. Apagadas no cuestan nada; también se encienden con ROTOSCOPIA_RENDER_STATS=1
+RENDER_STATS = os.environ.get('ROTOSCOPIA_RENDER_STATS', '0') not in ('', '0')
+RENDER_STATS_WINDOW = 240     # muestras por histograma (las más recientes)
+RENDER_STATS_INTERVAL_MS = 500
+# Frames vecinos (en la dirección de navegación) que se preparan en segundo plano
+PREFETCH_FRAMES = 4
+# Caché persistente de frames decodificados por proyecto (<proyecto>/cache/)
+DISK_FRAME_CACHE = True
+DISK_CACHE_MAX_MB = 8192
+# Procesos para decodificar en bloque (exportar): 0 = automático según núcleos, 1 = secuencial
+INGEST_WORKERS = 0
+# Secuencias de imágenes (carpetas de PNG/JPG numerados): hilos de lectura y fps por defecto
+SEQUENCE_WORKERS = 4
+SEQUENCE_DEFAULT_FPS = 24
+# Modo proxy: para videos más anchos que esto se ofrece editar a resolución reducida
+PROXY_SUGGEST_WIDTH = 2560
+PROXY_SCALES = (1.0, 0.5, 0.25)
+
 # Paleta de colores por defecto (hex)
 PALETTE_COLORS = ['#000000', '#FFFFFF', '#FF0000', '#0066FF', '#00AA00']
 
@@ -43,6 +99,7 @@ SHORTCUTS = {
     "next_frame": "Right",
     "prev_frame": "Left",
     "copy_prev_frame": "Ctrl+D",  # copiar dibujo/capas del frame anterior
+    "play_pause": "Space",        # reproducir / pausar la animación
 
     # Guardado y exportación
     "save_overlay": "Ctrl+S",
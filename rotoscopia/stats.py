@@ -0,0 +1,113 @@
+"""Estadísticas de render para diagnosticar un canvas lento (``RENDER_STATS``).
+
+Cada medición (``paint``, ``compose``, ``onion``...) guarda sus últimas
+``RENDER_STATS_WINDOW`` muestras en un ``RollingHistogram``: de ahí salen
+percentiles, repintados por segundo y un histograma por cubetas de tiempo para
+ver *cuándo* se va el tiempo (p. ej. picos de 60 ms al cambiar de frame) y no
+sólo el promedio.
+
+Con ``RENDER_STATS`` apagado no se crea ningún ``RenderStats``: el canvas y la
+ventana sólo preguntan ``if stats is not None`` antes de medir.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+
+from .settings import RENDER_STATS_WINDOW
+
+# Límites superiores (ms) de las cubetas del histograma; la última es "más lento"
+BUCKETS_MS = (2, 4, 8, 16, 33, 66)
+_BARS = ' ▁▂▃▄▅▆▇█'
+
+
+class RollingHistogram:
+    """Últimas ``window`` duraciones (ms) con su instante, para percentiles y tasa."""
+
+    def __init__(self, window: int = RENDER_STATS_WINDOW):
+        self._samples: deque[tuple[float, float]] = deque(maxlen=max(1, int(window)))
+        self.total = 0
+
+    def add(self, ms: float, now: float | None = None):
+        self._samples.append((time.perf_counter() if now is None else now, ms))
+        self.total += 1
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> float:
+        if not self._samples:
+            return 0.0
+        values = sorted(ms for _t, ms in self._samples)
+        return values[min(len(values) - 1, int(len(values) * p / 100.0))]
+
+    def rate(self, span: float = 1.0, now: float | None = None) -> float:
+        """Muestras por segundo en los últimos ``span`` segundos."""
+        now = time.perf_counter() if now is None else now
+        return sum(1 for t, _ms in self._samples if now - t <= span) / span
+
+    def buckets(self) -> list[int]:
+        counts = [0] * (len(BUCKETS_MS) + 1)
+        for _t, ms in self._samples:
+            i = 0
+            while i < len(BUCKETS_MS) and ms >= BUCKETS_MS[i]:
+                i += 1
+            counts[i] += 1
+        return counts
+
+    def sparkline(self) -> str:
+        counts = self.buckets()
+        top = max(counts) or 1
+        return ''.join(_BARS[round(c * (len(_BARS) - 1) / top)] for c in counts)
+
+
+class RenderStats:
+    """Tiempos de render por nombre y tasas de acierto de cachés, para la barra de estado."""
+
+    def __init__(self, window: int = RENDER_STATS_WINDOW):
+        self.window = window
+        self.timings: dict[str, RollingHistogram] = {}
+        self._hits: dict[str, tuple[int, int]] = {}
+
+    def add(self, name: str, ms: float):
+        hist = self.timings.get(name)
+        if hist is None:
+            hist = self.timings[name] = RollingHistogram(self.window)
+        hist.add(ms)
+
+    def add_since(self, name: str, t0: float):
+        """Registra el tiempo transcurrido desde ``t0`` (``time.perf_counter()``)."""
+        self.add(name, (time.perf_counter() - t0) * 1000.0)
+
+    def hit_rate(self, name: str, hits: int, misses: int) -> float | None:
+        """% de aciertos desde la lectura anterior de ``name`` (None si no hubo accesos)."""
+        prev_hits, prev_misses = self._hits.get(name, (0, 0))
+        if hits < prev_hits or misses < prev_misses:  # la caché se reinició
+            prev_hits = prev_misses = 0
+        self._hits[name] = (hits, misses)
+        total = (hits - prev_hits) + (misses - prev_misses)
+        return 100.0 * (hits - prev_hits) / total if total else None
+
+    def summary(self, rates: dict[str, float | None]) -> str:
+        """Una línea: fps de repintado, p50/p95 de cada medición y aciertos de cachés."""
+        parts = []
+        paint = self.timings.get('paint')
+        if paint is not None:
+            parts.append(f'{paint.rate():.0f} fps')
+        for name, hist in self.timings.items():
+            parts.append(f'{name} {hist.percentile(50):.1f}/{hist.percentile(95):.1f} ms')
+        hits = ' '.join(f'{name} {rate:.0f}%' for name, rate in rates.items() if rate is not None)
+        if hits:
+            parts.append(f'aciertos: {hits}')
+        return ' · '.join(parts)
+
+    def details(self) -> str:
+        """Histogramas por medición (para el tooltip)."""
+        edges = ' '.join(f'<{ms}' for ms in BUCKETS_MS) + f' ≥{BUCKETS_MS[-1]} ms'
+        lines = [f'Histograma de las últimas {self.window} muestras ({edges}):']
+        for name, hist in self.timings.items():
+            counts = ' '.join(str(c) for c in hist.buckets())
+            lines.append(f'{name:>8} {hist.sparkline()}  [{counts}]  máx {hist.percentile(100):.1f} ms, '
+                         f'total {hist.total}')
+        return '\n'.join(lines)
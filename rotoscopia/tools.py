@@ -19,19 +19,45 @@ class BaseTool:
             p = event.pos()
         return self.canvas.mapToOverlay(p)
 
-    def _get_active_layer_pixmap(self) -> QtGui.QPixmap | None:
+    def _get_active_layer(self):
+        """Capa activa, donde dibujan las herramientas (None si el frame no tiene capas aún)."""
         if self.canvas.window_ref:
-            layer = self.canvas.window_ref.get_active_layer()
-            if layer:
-                return layer.pixmap
-        return self.canvas.overlay  # fallback
+            return self.canvas.window_ref.get_active_layer()
+        return None
 
-    def _update_after_draw(self):
+    def _layer_painter(self, rect: QtCore.QRect, grow: bool = True) -> QtGui.QPainter | None:
+        """``QPainter`` sobre la capa activa para dibujar dentro de ``rect`` (ver ``Layer.painter``)."""
+        layer = self._get_active_layer()
+        return layer.painter(rect, grow) if layer is not None else None
+
+    def _update_after_draw(self, rect: QtCore.QRect | None = None):
+        """Recompone tras dibujar; ``rect`` = región tocada (None = toda la capa)."""
         if self.canvas.window_ref:
-            self.canvas.window_ref.compose_layers()
+            if rect is None:
+                layer = self._get_active_layer()
+                rect = layer.rect() if layer is not None else None
+            self.canvas.window_ref.compose_layers(rect)
         else:
             self.canvas.update()
 
+    def _shape_rect(self, rect: QtCore.QRect) -> QtCore.QRect:
+        """``rect`` ampliado por el grosor del pincel (lo que puede tocar su contorno)."""
+        m = self.canvas.pen_width // 2 + 2
+        return rect.normalized().adjusted(-m, -m, m, m)
+
+    def _restore_preview(self, base: tuple, rect: QtCore.QRect | None):
+        """Devuelve ``rect`` de la capa activa al ``snapshot()`` ``base`` (borra la previsualización anterior)."""
+        layer = self._get_active_layer()
+        if layer is not None:
+            layer.restore_rect(base, rect)
+
+    def _stroke_rect(self, a: QtCore.QPoint, b: QtCore.QPoint | None = None) -> QtCore.QRect:
+        """Rectángulo que cubre un trazo de ``a`` a ``b`` con el grosor del pincel."""
+        b = a if b is None else b
+        m = self.canvas.pen_width // 2 + 2  # radio + margen de antialiasing
+        return QtCore.QRect(QtCore.QPoint(min(a.x(), b.x()) - m, min(a.y(), b.y()) - m),
+                            QtCore.QPoint(max(a.x(), b.x()) + m, max(a.y(), b.y()) + m))
+
 # --- LassoTool (top-level) ---
 class LassoTool(BaseTool):
     name = "lasso"
@@ -122,11 +148,11 @@ class LassoTool(BaseTool):
         self.canvas.update()
 
     def extract_selection_pixmap(self):
-        tgt = self._get_active_layer_pixmap()
-        if not tgt or tgt.isNull() or not self.path:
+        layer = self._get_active_layer()
+        if layer is None or not self.path:
             return
         rect = self.path.boundingRect().toRect().adjusted(-1, -1, 1, 1)
-        rect = rect.intersected(QtCore.QRect(0, 0, tgt.width(), tgt.height()))
+        rect = rect.intersected(layer.rect())
         if rect.isEmpty():
             return
         pm = QtGui.QPixmap(rect.width(), rect.height())
@@ -135,15 +161,14 @@ class LassoTool(BaseTool):
         painter.setRenderHint(QtGui.QPainter.Antialiasing)
         painter.translate(-rect.topLeft())
         painter.setClipPath(self.path)
-        painter.drawPixmap(0, 0, tgt)
+        layer.draw(painter, rect)
         painter.end()
         self._init_selection_state(pm, rect.topLeft())
 
     def apply_move(self):
         if not self.selection_pixmap or self.selection_rect.isNull():
             return
-        tgt = self._get_active_layer_pixmap()
-        if not tgt:
+        if self._get_active_layer() is None:
             return
         if self.canvas.window_ref and hasattr(self.canvas.window_ref, 'push_undo_snapshot'):
             self.canvas.window_ref.push_undo_snapshot()
@@ -158,14 +183,16 @@ class LassoTool(BaseTool):
         p.translate(-self.selection_anchor)
         p.drawPixmap(0, 0, self.selection_pixmap)
         p.end()
-        painter = QtGui.QPainter(tgt)
-        painter.setRenderHint(QtGui.QPainter.Antialiasing)
-        painter.setCompositionMode(QtGui.QPainter.CompositionMode_Clear)
-        painter.fillRect(self.selection_rect, QtCore.Qt.transparent)
-        painter.setCompositionMode(QtGui.QPainter.CompositionMode_SourceOver)
         origin = self.selection_rect.topLeft() + self.selection_offset
-        painter.drawImage(int(origin.x()), int(origin.y()), result)
-        painter.end()
+        dest = QtCore.QRect(int(origin.x()), int(origin.y()), w, h)
+        painter = self._layer_painter(self.selection_rect.toAlignedRect().united(dest))
+        if painter is not None:
+            painter.setRenderHint(QtGui.QPainter.Antialiasing)
+            painter.setCompositionMode(QtGui.QPainter.CompositionMode_Clear)
+            painter.fillRect(self.selection_rect, QtCore.Qt.transparent)
+            painter.setCompositionMode(QtGui.QPainter.CompositionMode_SourceOver)
+            painter.drawImage(dest.topLeft(), result)
+            painter.end()
         self._update_after_draw()
         if self.path is not None:
             top_left_delta = (origin - self.selection_rect.topLeft())
@@ -230,10 +257,10 @@ class LassoTool(BaseTool):
         self._accumulate_transform(t)
 
     def invert_selection(self):
-        tgt = self._get_active_layer_pixmap()
-        if not tgt or tgt.isNull():
+        layer = self._get_active_layer()
+        if layer is None:
             return
-        whole = QtGui.QPainterPath(); whole.addRect(0, 0, tgt.width(), tgt.height())
+        whole = QtGui.QPainterPath(); whole.addRect(QtCore.QRectF(layer.rect()))
         self.path = whole.subtracted(self.path) if self.path else whole
         self.points.clear()
         self.selection_pixmap = None
@@ -245,10 +272,10 @@ class LassoTool(BaseTool):
         self.canvas.update()
 
     def select_all(self):
-        tgt = self._get_active_layer_pixmap()
-        if not tgt or tgt.isNull():
+        layer = self._get_active_layer()
+        if layer is None:
             return
-        self.path = QtGui.QPainterPath(); self.path.addRect(0, 0, tgt.width(), tgt.height())
+        self.path = QtGui.QPainterPath(); self.path.addRect(QtCore.QRectF(layer.rect()))
         self.points.clear()
         self.selection_pixmap = None
         self.selection_rect = QtCore.QRectF()
@@ -335,6 +362,7 @@ class HandTool(BaseTool):
         current_pos = event.globalPosition().toPoint() if hasattr(event, 'globalPosition') else event.globalPos()
         dx = current_pos.x() - self.last_pos.x(); dy = current_pos.y() - self.last_pos.y()
         h_bar = parent.horizontalScrollBar(); v_bar = parent.verticalScrollBar()
+        self.canvas.begin_interaction()
         h_bar.setValue(h_bar.value() - dx); v_bar.setValue(v_bar.value() - dy)
         self.last_pos = current_pos
 
@@ -378,10 +406,9 @@ class BrushTool(BaseTool):
             self.last_point = None
 
     def _draw_point(self, pt: QtCore.QPoint):
-        pm = self._get_active_layer_pixmap()
-        if not pm:
+        painter = self._layer_painter(self._stroke_rect(pt))
+        if painter is None:
             return
-        painter = QtGui.QPainter(pm)
         painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
         color = self.canvas.pen_color
         if self.mode == 0:
@@ -392,15 +419,14 @@ class BrushTool(BaseTool):
             painter.fillRect(QtCore.QRect(pt.x()-half, pt.y()-half, self.canvas.pen_width, self.canvas.pen_width), color)
         else:  # modo suave
             self._draw_soft_brush(painter, pt)
-        painter.end(); self._update_after_draw()
+        painter.end(); self._update_after_draw(self._stroke_rect(pt))
 
     def _draw_line(self, a: QtCore.QPoint, b: QtCore.QPoint):
         if a == b:
             self._draw_point(a); return
-        pm = self._get_active_layer_pixmap()
-        if not pm:
+        painter = self._layer_painter(self._stroke_rect(a, b))
+        if painter is None:
             return
-        painter = QtGui.QPainter(pm)
         painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
         color = self.canvas.pen_color
         if self.mode == 0:
@@ -425,7 +451,7 @@ class BrushTool(BaseTool):
             for i in range(steps + 1):
                 x = int(a.x() + dx * i / steps); y = int(a.y() + dy * i / steps)
                 self._draw_soft_brush(painter, QtCore.QPoint(x, y))
-        painter.end(); self._update_after_draw()
+        painter.end(); self._update_after_draw(self._stroke_rect(a, b))
 
     def _draw_soft_brush(self, painter: QtGui.QPainter, pt: QtCore.QPoint):
         size = self.canvas.pen_width
@@ -448,10 +474,10 @@ class EraserTool(BrushTool):
     name = "eraser"
 
     def _draw_point(self, pt: QtCore.QPoint):
-        pm = self._get_active_layer_pixmap()
-        if not pm:
+        # Borrar nunca agranda la capa: fuera del contenido no hay nada que borrar
+        painter = self._layer_painter(self._stroke_rect(pt), grow=False)
+        if painter is None:
             return
-        painter = QtGui.QPainter(pm)
         painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
         if self.mode == 0:  # círculo duro
             pen = QtGui.QPen(QtCore.Qt.transparent, self.canvas.pen_width, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin)
@@ -472,7 +498,7 @@ class EraserTool(BrushTool):
             painter.setCompositionMode(QtGui.QPainter.CompositionMode_Clear)
             tl = QtCore.QPoint(pt.x()-size//2, pt.y()-size//2)
             painter.drawPixmap(tl, pm_mask)
-        painter.end(); self._update_after_draw()
+        painter.end(); self._update_after_draw(self._stroke_rect(pt))
 
     def _draw_line(self, a: QtCore.QPoint, b: QtCore.QPoint):
         # Simple interpolación de puntos usando método de punto
@@ -491,7 +517,8 @@ class LineTool(BaseTool):
     def __init__(self, canvas):
         super().__init__(canvas)
         self.start = None
-        self.temp_pixmap = None
+        self.temp_image = None  # ``snapshot()`` de la capa antes de la línea (copia implícita)
+        self._preview_rect = None
 
     def activate(self):
         self.canvas.setCursor(QtCore.Qt.CrossCursor)
@@ -500,30 +527,33 @@ class LineTool(BaseTool):
         if event.button() != QtCore.Qt.LeftButton:
             return
         self.start = self._overlay_point(event)
-        base = self._get_active_layer_pixmap()
-        self.temp_pixmap = QtGui.QPixmap(base) if base else None
+        layer = self._get_active_layer()
+        self.temp_image = layer.snapshot() if layer is not None else None
+        self._preview_rect = None
 
     def on_mouse_move(self, event):
-        if self.start is None or not (event.buttons() & QtCore.Qt.LeftButton) or self.temp_pixmap is None:
+        if self.start is None or not (event.buttons() & QtCore.Qt.LeftButton) or self.temp_image is None:
             return
         current = self._overlay_point(event)
-        base_layer = self._get_active_layer_pixmap()
-        if base_layer is None:
+        rect = self._stroke_rect(self.start, current)
+        # Restaurar sólo la zona de la previsualización anterior y dibujar la nueva
+        self._restore_preview(self.temp_image, self._preview_rect)
+        painter = self._layer_painter(rect)
+        if painter is None:
             return
-        # Restaurar base y dibujar línea de previsualización
-        base_layer.fill(QtCore.Qt.transparent)
-        painter = QtGui.QPainter(base_layer)
-        painter.drawPixmap(0, 0, self.temp_pixmap)
         pen = QtGui.QPen(self.canvas.pen_color, self.canvas.pen_width, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin)
         painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
         painter.setPen(pen)
         painter.drawLine(self.start, current)
-        painter.end(); self._update_after_draw()
+        painter.end()
+        dirty = rect.united(self._preview_rect) if self._preview_rect is not None else rect
+        self._preview_rect = rect
+        self._update_after_draw(dirty)
 
     def on_mouse_release(self, event):
         if event.button() != QtCore.Qt.LeftButton or self.start is None:
             return
-        self.start = None; self.temp_pixmap = None
+        self.start = None; self.temp_image = None; self._preview_rect = None
 
 
 
@@ -534,26 +564,27 @@ class BucketTool(BaseTool):
     def on_mouse_press(self, event):
         pt = self._overlay_point(event)
         x = int(pt.x()); y = int(pt.y())
-        target_pixmap = self._get_active_layer_pixmap()
-        if not target_pixmap or target_pixmap.isNull():
-            return
-        if x < 0 or y < 0 or x >= target_pixmap.width() or y >= target_pixmap.height():
+        layer = self._get_active_layer()
+        if layer is None or not layer.rect().contains(x, y):
             return
         if self.canvas.window_ref and hasattr(self.canvas.window_ref, 'push_undo_snapshot'):
             self.canvas.window_ref.push_undo_snapshot()
-        self.apply_fill(target_pixmap, QtCore.QPoint(x, y), self.canvas.pen_color)
+        # El relleno puede llegar a todo el frame: se trabaja sobre la capa completa y se recorta
+        target = layer.to_image()
+        self.apply_fill(target, QtCore.QPoint(x, y), self.canvas.pen_color)
+        layer.set_image(target)
         self._update_after_draw()
 
-    def apply_fill(self, pixmap: QtGui.QPixmap, start_point: QtCore.QPoint, new_color: QtGui.QColor):
+    def apply_fill(self, image: QtGui.QImage, start_point: QtCore.QPoint, new_color: QtGui.QColor):
         """Flood fill con soporte de límites anti-alias (alpha) y similitud RGB.
 
         - Si el pixel seed es transparente (alpha == 0): solo rellena píxeles con alpha <= ALPHA_PASS.
         - Si es opaco: rellena por similitud de color (suma de diferencias RGB <= 3 * tolerance), ignorando alpha.
         - Acceso directo BGRA.
         """
-        if pixmap.isNull():
+        if image.isNull():
             return
-        img = pixmap.toImage().convertToFormat(QtGui.QImage.Format_ARGB32)
+        img = image.convertToFormat(QtGui.QImage.Format_ARGB32)
         w = img.width(); h = img.height()
         x0 = start_point.x(); y0 = start_point.y()
         if x0 < 0 or y0 < 0 or x0 >= w or y0 >= h:
@@ -621,8 +652,11 @@ class BucketTool(BaseTool):
                         visited[nidx] = 1
                         stack.append((nx, ny))
 
-        # Actualizar el pixmap directamente desde la QImage para asegurar refresco correcto
-        pixmap.convertFromImage(img)
+        # Volcar el resultado sobre la capa (misma QImage: cambia su cacheKey)
+        p = QtGui.QPainter(image)
+        p.setCompositionMode(QtGui.QPainter.CompositionMode_Source)
+        p.drawImage(0, 0, img)
+        p.end()
 
 
 class RectangleTool(BaseTool):
@@ -632,26 +666,29 @@ class RectangleTool(BaseTool):
         super().__init__(canvas)
         self.start = None
         self.base = None
-        self.preview = None
+        self.preview = None  # zona de la previsualización dibujada en la capa
 
     def on_mouse_press(self, event):
         self.start = self._overlay_point(event)
-        target = self._get_active_layer_pixmap()
-        self.base = QtGui.QPixmap(target) if target else None
+        layer = self._get_active_layer()
+        self.base = layer.snapshot() if layer is not None else None
+        self.preview = None
 
     def on_mouse_move(self, event):
         if self.start is None or self.base is None:
             return
-        target = self._get_active_layer_pixmap()
-        if target is None:
-            return
         pt = self._overlay_point(event)
         rect = QtCore.QRect(self.start, pt).normalized()
         if event.modifiers() & QtCore.Qt.ShiftModifier:
             size = min(rect.width(), rect.height())
             rect.setWidth(size); rect.setHeight(size)
-        temp = QtGui.QPixmap(self.base)
-        p = QtGui.QPainter(temp); p.setRenderHint(QtGui.QPainter.Antialiasing)
+        # Restaurar sólo la zona de la previsualización anterior y dibujar la nueva
+        shape = self._shape_rect(rect)
+        self._restore_preview(self.base, self.preview)
+        p = self._layer_painter(shape)
+        if p is None:
+            return
+        p.setRenderHint(QtGui.QPainter.Antialiasing)
         pen = QtGui.QPen(self.canvas.pen_color, self.canvas.pen_width, QtCore.Qt.SolidLine, QtCore.Qt.SquareCap, QtCore.Qt.RoundJoin)
         p.setPen(pen)
         if event.modifiers() & QtCore.Qt.AltModifier:
@@ -660,14 +697,9 @@ class RectangleTool(BaseTool):
             p.fillRect(rect, brush)
         p.drawRect(rect)
         p.end()
-        # Update preview into active layer
-        if self.canvas.window_ref:
-            active_layer = self.canvas.window_ref.get_active_layer()
-            if active_layer:
-                active_layer.pixmap = temp
-        else:
-            self.canvas.overlay = temp
-        self._update_after_draw()
+        dirty = shape.united(self.preview) if self.preview is not None else shape
+        self.preview = shape
+        self._update_after_draw(dirty)
 
     def on_mouse_release(self, event):
         if self.start is None or self.base is None:
@@ -682,17 +714,19 @@ class RectangleTool(BaseTool):
         # Snapshot undo
         if self.canvas.window_ref and hasattr(self.canvas.window_ref, 'push_undo_snapshot'):
             self.canvas.window_ref.push_undo_snapshot()
-        target = self._get_active_layer_pixmap()
-        if target is None:
+        shape = self._shape_rect(rect)
+        self._restore_preview(self.base, self.preview)
+        painter = self._layer_painter(shape)
+        if painter is None:
             self.start = None; self.base = None; return
-        painter = QtGui.QPainter(target); painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
         pen = QtGui.QPen(self.canvas.pen_color, self.canvas.pen_width, QtCore.Qt.SolidLine, QtCore.Qt.SquareCap, QtCore.Qt.RoundJoin)
         painter.setPen(pen)
         if event.modifiers() & QtCore.Qt.AltModifier:
             painter.fillRect(rect, QtGui.QBrush(self.canvas.pen_color))
         painter.drawRect(rect); painter.end()
-        self._update_after_draw()
-        self.start = None; self.base = None
+        self._update_after_draw(shape.united(self.preview) if self.preview is not None else shape)
+        self.start = None; self.base = None; self.preview = None
 
 
 class EllipseTool(BaseTool):
@@ -702,25 +736,29 @@ class EllipseTool(BaseTool):
         super().__init__(canvas)
         self.start = None
         self.base = None
+        self.preview = None  # zona de la previsualización dibujada en la capa
 
     def on_mouse_press(self, event):
         self.start = self._overlay_point(event)
-        target = self._get_active_layer_pixmap()
-        self.base = QtGui.QPixmap(target) if target else None
+        layer = self._get_active_layer()
+        self.base = layer.snapshot() if layer is not None else None
+        self.preview = None
 
     def on_mouse_move(self, event):
         if self.start is None or self.base is None:
             return
-        target = self._get_active_layer_pixmap()
-        if target is None:
-            return
         pt = self._overlay_point(event)
         rect = QtCore.QRect(self.start, pt).normalized()
         if event.modifiers() & QtCore.Qt.ShiftModifier:
             size = min(rect.width(), rect.height())
             rect.setWidth(size); rect.setHeight(size)
-        temp = QtGui.QPixmap(self.base)
-        p = QtGui.QPainter(temp); p.setRenderHint(QtGui.QPainter.Antialiasing)
+        # Restaurar sólo la zona de la previsualización anterior y dibujar la nueva
+        shape = self._shape_rect(rect)
+        self._restore_preview(self.base, self.preview)
+        p = self._layer_painter(shape)
+        if p is None:
+            return
+        p.setRenderHint(QtGui.QPainter.Antialiasing)
         pen = QtGui.QPen(self.canvas.pen_color, self.canvas.pen_width, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin)
         p.setPen(pen)
         if event.modifiers() & QtCore.Qt.AltModifier:
@@ -729,13 +767,9 @@ class EllipseTool(BaseTool):
             p.setBrush(QtCore.Qt.NoBrush)
         p.drawEllipse(rect)
         p.end()
-        if self.canvas.window_ref:
-            active_layer = self.canvas.window_ref.get_active_layer()
-            if active_layer:
-                active_layer.pixmap = temp
-        else:
-            self.canvas.overlay = temp
-        self._update_after_draw()
+        dirty = shape.united(self.preview) if self.preview is not None else shape
+        self.preview = shape
+        self._update_after_draw(dirty)
 
     def on_mouse_release(self, event):
         if self.start is None or self.base is None:
@@ -749,10 +783,12 @@ class EllipseTool(BaseTool):
             rect.setWidth(size); rect.setHeight(size)
         if self.canvas.window_ref and hasattr(self.canvas.window_ref, 'push_undo_snapshot'):
             self.canvas.window_ref.push_undo_snapshot()
-        target = self._get_active_layer_pixmap()
-        if target is None:
+        shape = self._shape_rect(rect)
+        self._restore_preview(self.base, self.preview)
+        painter = self._layer_painter(shape)
+        if painter is None:
             self.start = None; self.base = None; return
-        painter = QtGui.QPainter(target); painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
         pen = QtGui.QPen(self.canvas.pen_color, self.canvas.pen_width, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin)
         painter.setPen(pen)
         if event.modifiers() & QtCore.Qt.AltModifier:
@@ -760,8 +796,8 @@ class EllipseTool(BaseTool):
         else:
             painter.setBrush(QtCore.Qt.NoBrush)
         painter.drawEllipse(rect); painter.end()
-        self._update_after_draw()
-        self.start = None; self.base = None
+        self._update_after_draw(shape.united(self.preview) if self.preview is not None else shape)
+        self.start = None; self.base = None; self.preview = None
 
 
 # Nuevas constantes y herramienta Pluma
@@ -810,19 +846,18 @@ class PlumaTool(BaseTool):
                 except TypeError:
                     # En caso de compatibilidad con versiones previas, fallback al comportamiento antiguo
                     self.canvas.window_ref.push_undo_snapshot()
-            pixmap = self._get_active_layer_pixmap()
-            if pixmap is None:
+            path = QtGui.QPainterPath()
+            path.moveTo(self.p1)
+            path.quadTo(control_point, self.p2)
+            painter = self._layer_painter(self._shape_rect(path.boundingRect().toAlignedRect()))
+            if painter is None:
                 # reset y salir
                 self.p1 = None; self.p2 = None; self.state = STATE_WAITING_P1
                 self.canvas.update()
                 return
-            painter = QtGui.QPainter(pixmap)
             pen = QtGui.QPen(self.canvas.pen_color, self.canvas.pen_width, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin)
             painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
             painter.setPen(pen)
-            path = QtGui.QPainterPath()
-            path.moveTo(self.p1)
-            path.quadTo(control_point, self.p2)
             painter.drawPath(path)
             painter.end()
             # reset state
@@ -945,20 +980,20 @@ class DynamicLineTool(BaseTool):
             if self.canvas.window_ref:
                 self.canvas.window_ref.push_undo_snapshot(force=True)
             
+            path = QtGui.QPainterPath(self.active_points[0])
+            for i in range(1, len(self.active_points)):
+                path.lineTo(self.active_points[i])
+
             # Preparar el painter para dibujar en la capa real
-            pixmap = self._get_active_layer_pixmap()
-            if pixmap is None:
+            painter = self._layer_painter(self._shape_rect(path.boundingRect().toAlignedRect()))
+            if painter is None:
                 return True
-            painter = QtGui.QPainter(pixmap)
             pen = QtGui.QPen(self.canvas.pen_color, self.canvas.pen_width, 
                              QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin)
             painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
             painter.setPen(pen)
             
             # Dibujar la línea "plasmada"
-            path = QtGui.QPainterPath(self.active_points[0])
-            for i in range(1, len(self.active_points)):
-                path.lineTo(self.active_points[i])
             painter.drawPath(path)
             painter.end()
             
@@ -1127,6 +1162,8 @@ class AutoCalcoTool:
         # Verificar que el ROI no esté vacío
         if roi_img.size == 0:
             return
+        if getattr(win.frames, 'rgb', False):
+            roi_img = cv2.cvtColor(roi_img, cv2.COLOR_RGB2BGR)  # el motor espera BGR
 
         # Procesar con parámetros del dock
         dock = win.auto_calco_dock
@@ -1149,9 +1186,12 @@ class AutoCalcoTool:
             return
         
         layer = self.canvas.window_ref.get_active_layer()
-        painter = QtGui.QPainter(layer.pixmap)
-        painter.drawPixmap(self.roi_rect.topLeft(), self.preview_pixmap)
-        painter.end()
+        if layer is None or self.preview_pixmap is None:
+            return  # frame sin capas todavía (cargando) o sin preview
+        painter = layer.painter(QtCore.QRect(self.roi_rect.topLeft(), self.preview_pixmap.size()))
+        if painter is not None:
+            painter.drawPixmap(self.roi_rect.topLeft(), self.preview_pixmap)
+            painter.end()
         self.canvas.window_ref.compose_layers()
         self.preview_pixmap = None
         self.canvas.update()
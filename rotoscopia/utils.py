@@ -4,18 +4,29 @@ from PIL import Image
 from PySide6 import QtGui
 
 
-def cvimg_to_qimage(cv_img):
+def cvimg_to_qimage(cv_img, rgb: bool = False, copy: bool = True):
+    """Convierte un ndarray (BGR/BGRA, o RGB/RGBA si ``rgb``) a QImage.
+
+    Los frames de 3 canales se envuelven directo con ``Format_BGR888``/``Format_RGB888``
+    (sin ``cvtColor``). Con ``copy=False`` la QImage apunta al buffer del array: sirve
+    sólo para usarla en el acto (p.ej. ``QPixmap.fromImage``) mientras el array viva.
+    """
     if cv_img is None:
         return None
     h, w = cv_img.shape[:2]
+    if not cv_img.flags['C_CONTIGUOUS']:
+        cv_img = np.ascontiguousarray(cv_img)
     if cv_img.ndim == 2:
         fmt = QtGui.QImage.Format_Grayscale8
         qimg = QtGui.QImage(cv_img.data, w, h, cv_img.strides[0], fmt)
-        return qimg.copy()
+        return qimg.copy() if copy else qimg
     if cv_img.shape[2] == 3:
-        cv_img_rgb = cv2.cvtColor(cv_img, cv2.COLOR_BGR2RGB)
-        qimg = QtGui.QImage(cv_img_rgb.data, w, h, cv_img_rgb.strides[0], QtGui.QImage.Format_RGB888)
-        return qimg.copy()
+        fmt = QtGui.QImage.Format_RGB888 if rgb else QtGui.QImage.Format_BGR888
+        qimg = QtGui.QImage(cv_img.data, w, h, cv_img.strides[0], fmt)
+        return qimg.copy() if copy else qimg
+    if cv_img.shape[2] == 4 and rgb:
+        qimg = QtGui.QImage(cv_img.data, w, h, cv_img.strides[0], QtGui.QImage.Format_RGBA8888)
+        return qimg.copy() if copy else qimg
     if cv_img.shape[2] == 4:
         cv_img_rgba = cv2.cvtColor(cv_img, cv2.COLOR_BGRA2RGBA)
         qimg = QtGui.QImage(cv_img_rgba.data, w, h, cv_img_rgba.strides[0], QtGui.QImage.Format_RGBA8888)
@@ -24,7 +35,12 @@ def cvimg_to_qimage(cv_img):
 
 
 def qpixmap_to_pil(pix):
-    qimg = pix.toImage().convertToFormat(QtGui.QImage.Format_RGBA8888)
+    return qimage_to_pil(pix.toImage())
+
+
+def qimage_to_pil(image):
+    """``QImage`` (cualquier formato) a PIL RGBA; no toca pixmaps, sirve en cualquier hilo."""
+    qimg = image.convertToFormat(QtGui.QImage.Format_RGBA8888)
     w = qimg.width(); h = qimg.height(); ptr = qimg.bits()
     try:
         bc = qimg.sizeInBytes()